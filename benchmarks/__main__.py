@@ -0,0 +1,217 @@
+"""
+Runs the ner_processing benchmark suite and stores the results as JSON.
+
+The suite measures:
+    - Each decoder in MESSAGE_IDS, both one message at a time and as a batch of frames
+    - End to end throughput (lines/sec and MB/sec) of the CLI and of FileModel, on
+      synthetic logs following the id mix of a real log (see generate_logs)
+
+Every result is a throughput, so higher is better. When given a baseline results file,
+any result that drops below the threshold fraction of its baseline value is reported as a
+regression, and the script exits with an error.
+
+Example usage:
+    python -m benchmarks --output results.json
+    python -m benchmarks --compare results.json --threshold 0.8
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from ner_processing.decode_batch import FRAME_DTYPE, decodeFrames
+from ner_processing.decode_files import LogFormat
+from ner_processing.master_mapping import MESSAGE_IDS
+from ner_processing.message import Message
+
+from .generate_logs import generate_log, load_profile
+
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUTPUT_PATH = "./benchmark_results.json"
+DEFAULT_SIZE_MB = 20
+DEFAULT_THRESHOLD = 0.8
+DECODER_BATCH_FRAMES = 20000
+MIN_RUN_SECONDS = 0.2
+
+
+def time_rate(func: Callable[[], Any], units: int) -> float:
+    """
+    Gets the number of units per second processed by the given function, taking the best
+    of repeated runs lasting at least MIN_RUN_SECONDS in total.
+    """
+    best = float("inf")
+    total = 0.0
+    while total < MIN_RUN_SECONDS:
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        total += elapsed
+    return units / max(best, 1e-9)
+
+
+def bench_decoders() -> Dict[str, Dict[str, Any]]:
+    """
+    Measures each decoder on random full length payloads, one message at a time (messages
+    per second) and as a batch of frames (frames per second).
+    """
+    rng = np.random.default_rng(0)
+    results = {}
+    for id, message in MESSAGE_IDS.items():
+        payloads = rng.integers(0, 256, (DECODER_BATCH_FRAMES, 8), dtype=np.uint8)
+        messages = [bytes(payload) for payload in payloads[:1000].tolist()]
+        frames = np.zeros(DECODER_BATCH_FRAMES, dtype=FRAME_DTYPE)
+        frames["id"] = id
+        frames["length"] = 8
+        frames["data"] = payloads
+
+        def decode_scalar():
+            for data in messages:
+                Message.decodeFields(id, data)
+
+        result = {"name": message["description"]}
+        try:
+            result["scalar_per_sec"] = time_rate(decode_scalar, len(messages))
+            result["batch_per_sec"] = time_rate(lambda: decodeFrames(frames), frames.size)
+        except BaseException as e:
+            result["error"] = str(e)
+        results[str(id)] = result
+    return results
+
+
+def bench_cli(filepath: str, line_count: int) -> Dict[str, float]:
+    """
+    Measures the CLI on a TEXTUAL1 log, including process startup.
+    """
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "ner_processing", output_dir, filepath],
+                       check=True, stdout=subprocess.DEVNULL, cwd=ROOT_DIRECTORY)
+        elapsed = time.perf_counter() - start
+    return throughput(filepath, line_count, elapsed)
+
+
+def bench_file_model(filepath: str, format: LogFormat, line_count: int) -> Dict[str, float]:
+    """
+    Measures FileModel processing of a log into a DataModelManager.
+    """
+    from PyQt6.QtCore import QCoreApplication
+    from ner_telhub.model.data_models import DataModelManager
+    from ner_telhub.model.file_models import FileModel
+
+    class Signal:
+        def emit(self, *args):
+            pass
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    manager = DataModelManager(None)
+    start = time.perf_counter()
+    FileModel._processFileData(filepath, format=format, manager=manager,
+                               progress=Signal(), message=Signal())
+    elapsed = time.perf_counter() - start
+    return throughput(filepath, line_count, elapsed)
+
+
+def throughput(filepath: str, line_count: int, elapsed: float) -> Dict[str, float]:
+    """
+    Gets the end to end throughput of processing a file in the given time.
+    """
+    return {
+        "seconds": elapsed,
+        "lines_per_sec": line_count / elapsed,
+        "mb_per_sec": os.path.getsize(filepath) / 1e6 / elapsed
+    }
+
+
+def bench_end_to_end(size_mb: float, skip_gui: bool) -> Dict[str, Dict[str, float]]:
+    """
+    Generates a log in each format and measures processing it end to end.
+    """
+    profile = load_profile()
+    results = {}
+    with tempfile.TemporaryDirectory() as log_dir:
+        for format in LogFormat:
+            filepath = os.path.join(log_dir, f"{format.name.lower()}.log")
+            line_count = generate_log(filepath, format, size_mb, profile)
+            if format == LogFormat.TEXTUAL1:
+                results["cli_textual1"] = bench_cli(filepath, line_count)
+            if not skip_gui:
+                results[f"file_model_{format.name.lower()}"] = bench_file_model(filepath, format, line_count)
+    return results
+
+
+def find_regressions(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+                     path: str = "") -> List[str]:
+    """
+    Compares every throughput in the results against the baseline. Returns a description
+    of each one that dropped below the threshold fraction of its baseline value.
+    """
+    regressions = []
+    for key, base_value in baseline.items():
+        value = results.get(key)
+        name = f"{path}.{key}" if path else key
+        if isinstance(base_value, dict) and isinstance(value, dict):
+            regressions.extend(find_regressions(value, base_value, threshold, name))
+        elif key.endswith("_per_sec") and isinstance(value, (int, float)) and base_value > 0:
+            if value < threshold * base_value:
+                regressions.append(f"{name}: {value:.1f} (baseline {base_value:.1f}, {value / base_value:.0%})")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmarks decoding throughput of ner_processing.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH,
+                        help=f"path to write the JSON results to (default: {DEFAULT_OUTPUT_PATH})")
+    parser.add_argument("--size-mb", type=float, default=DEFAULT_SIZE_MB,
+                        help=f"size of each generated log in MB (default: {DEFAULT_SIZE_MB})")
+    parser.add_argument("--compare", help="baseline JSON results to check for regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"fraction of the baseline a result must reach (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--skip-gui", action="store_true", help="skip the FileModel benchmarks")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "date": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "size_mb": args.size_mb
+        }
+    }
+    print("Benchmarking decoders")
+    results["decoders"] = bench_decoders()
+    print("Benchmarking end to end processing")
+    results["end_to_end"] = bench_end_to_end(args.size_mb, args.skip_gui)
+    for name, result in results["end_to_end"].items():
+        print(f"{name}: {result['lines_per_sec']:.0f} lines/sec, {result['mb_per_sec']:.2f} MB/sec")
+
+    # Load the baseline first, in case it is the file being written
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Wrote results to {args.output}")
+
+    if baseline is not None:
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} results regressed below {args.threshold:.0%} of the baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"No results regressed below {args.threshold:.0%} of the baseline")
@@ -0,0 +1,161 @@
+"""
+This script generates synthetic log files of any size, for benchmarking.
+
+The CAN id mix, payload lengths, frame rate and how often each id repeats its last payload
+are all taken from a profile log (data/format1-valid.txt by default), so the generated logs
+are as repetitive as real ones. Payloads start from the last payload seen for each id in
+the profile, and change a random byte whenever they do not repeat.
+
+Example usage:
+    python -m benchmarks.generate_logs TEXTUAL1 100 ./logs/synthetic.txt
+    (generates a 100 MB TEXTUAL1 log)
+"""
+
+import argparse
+import os
+from collections import Counter
+from datetime import datetime
+from typing import Dict, NamedTuple
+
+import numpy as np
+
+from ner_processing.decode_batch import FRAME_DTYPE
+from ner_processing.decode_files import LogFormat, processLine, writeBinary
+
+DEFAULT_PROFILE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                    "data", "format1-valid.txt")
+DEFAULT_PROFILE_FORMAT = LogFormat.TEXTUAL1_LEGACY
+DEFAULT_START_TIME = 1679511802367  # ms since epoch
+WRITE_CHUNK_FRAMES = 100000
+
+
+class IdProfile(NamedTuple):
+    """
+    The behaviour of a single CAN id in a profile log.
+    """
+    weight: float  # Fraction of all frames with this id
+    repeat: float  # Fraction of frames that repeat the previous payload of this id
+    payload: bytes  # Last payload seen
+
+
+class LogProfile(NamedTuple):
+    """
+    The CAN id mix and frame rate of a profile log.
+    """
+    ids: Dict[int, IdProfile]
+    frame_interval: float  # Mean time between frames in ms
+
+
+def load_profile(filepath: str = DEFAULT_PROFILE_PATH, format: LogFormat = DEFAULT_PROFILE_FORMAT) -> LogProfile:
+    """
+    Builds a profile from the frames of a log file.
+    """
+    with open(filepath) as file:
+        messages = [processLine(line, format) for line in file if line.strip()]
+
+    counts = Counter(message.id for message in messages)
+    repeats = Counter()
+    last_payloads: Dict[int, bytes] = {}
+    for message in messages:
+        if last_payloads.get(message.id) == message.data:
+            repeats[message.id] += 1
+        last_payloads[message.id] = message.data
+
+    ids = {id: IdProfile(count / len(messages), repeats[id] / max(count - 1, 1), last_payloads[id])
+           for id, count in counts.items()}
+    duration = messages[-1].time - messages[0].time
+    return LogProfile(ids, max(duration, 1) / len(messages))
+
+
+def generate_frames(profile: LogProfile, count: int, seed: int = 0,
+                    start_time: int = DEFAULT_START_TIME) -> np.ndarray:
+    """
+    Generates an array of frames (see FRAME_DTYPE) following the given profile.
+    """
+    rng = np.random.default_rng(seed)
+    id_list = list(profile.ids)
+    weights = np.array([profile.ids[id].weight for id in id_list])
+
+    frames = np.zeros(count, dtype=FRAME_DTYPE)
+    intervals = rng.exponential(profile.frame_interval, count)
+    frames["timestamp"] = start_time + np.round(np.cumsum(intervals)).astype(np.int64)
+    frames["id"] = np.array(id_list)[rng.choice(len(id_list), size=count, p=weights / weights.sum())]
+
+    for id in id_list:
+        rows = np.flatnonzero(frames["id"] == id)
+        if rows.size == 0:
+            continue
+        template = np.frombuffer(profile.ids[id].payload, dtype=np.uint8)
+        length = template.size
+        # Each change replaces a random byte of the template, and holds until the next change
+        changes = rng.random(rows.size) >= profile.ids[id].repeat
+        changed = np.tile(template, (rows.size, 1))
+        if length > 0:
+            positions = rng.integers(0, length, rows.size)
+            changed[np.arange(rows.size), positions] = rng.integers(0, 256, rows.size)
+        last_change = np.maximum.accumulate(np.where(changes, np.arange(rows.size), -1))
+        payloads = np.where((last_change >= 0)[:, None], changed[np.maximum(last_change, 0)], template)
+        frames["length"][rows] = length
+        frames["data"][rows, :length] = payloads
+    return frames
+
+
+def format_lines(frames: np.ndarray, format: LogFormat) -> str:
+    """
+    Formats an array of frames as lines of a text log format.
+    """
+    lines = []
+    for timestamp, id, length, data in zip(frames["timestamp"].tolist(), frames["id"].tolist(),
+                                          frames["length"].tolist(), frames["data"].tolist()):
+        payload = data[:length]
+        if format == LogFormat.TEXTUAL1:
+            lines.append(f"{timestamp} {id} {length} [{','.join(map(str, payload))}]\n")
+        elif format == LogFormat.TEXTUAL1_LEGACY:
+            time = datetime.fromtimestamp(timestamp / 1000).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]
+            lines.append(f"{time}Z {id} {length} [{','.join(map(str, payload))}]\n")
+        elif format == LogFormat.TEXTUAL2:
+            lines.append(f"{timestamp // 1000}.{timestamp % 1000:03d} {id} {length} {' '.join(map(str, payload))}\n")
+        else:
+            raise ValueError("Invalid text format.")
+    return "".join(lines)
+
+
+def generate_log(filepath: str, format: LogFormat, size_mb: float, profile: LogProfile = None,
+                 seed: int = 0) -> int:
+    """
+    Writes a log file of roughly the given size in MB. Returns the number of frames.
+    """
+    profile = profile or load_profile()
+    target_size = int(size_mb * 1e6)
+
+    if format == LogFormat.BINARY:
+        frames = generate_frames(profile, max(1, target_size // 19), seed)
+        writeBinary(filepath, frames)
+        return frames.size
+
+    # Estimate the frame count from the line length of a sample
+    sample = format_lines(generate_frames(profile, 1000, seed), format)
+    line_size = len(sample) / 1000
+    count = max(1, int(target_size / line_size))
+    frames = generate_frames(profile, count, seed)
+    with open(filepath, "w") as file:
+        for start in range(0, count, WRITE_CHUNK_FRAMES):
+            file.write(format_lines(frames[start:start + WRITE_CHUNK_FRAMES], format))
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.generate_logs",
+        description="Generates a synthetic log file following the id mix of a profile log.")
+    parser.add_argument("format", choices=[format.name for format in LogFormat])
+    parser.add_argument("size_mb", type=float, help="approximate size of the log in MB")
+    parser.add_argument("output", help="path of the log file to write")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE_PATH,
+                        help=f"TEXTUAL1_LEGACY log to take the id mix from (default: {DEFAULT_PROFILE_PATH})")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    count = generate_log(args.output, LogFormat[args.format], args.size_mb,
+                         load_profile(args.profile), args.seed)
+    print(f"Wrote {count} frames to {args.output}")
@@ -1,8 +1,8 @@
-from datetime import datetime
 from PyQt6.QtSerialPort import QSerialPort, QSerialPortInfo
 from PyQt6.QtCore import QIODeviceBase
 
-from ner_processing.message import Message, MessageFormatException
+from ner_processing.message import Message
+from ner_live.framing import FrameReader, parseCandapterFrame
 from ner_live.live_input import LiveInput, LiveInputException, InputState
 from ner_telhub.model.message_model import MessageModel
 
@@ -34,8 +34,7 @@ class Candapter(LiveInput):
         self.port.setBaudRate(QSerialPort.BaudRate.Baud115200.value)
         self.port.setFlowControl(QSerialPort.FlowControl.HardwareControl)
         self.port.readyRead.connect(self._handle_read)
-        self.message_started = False
-        self.current_message = ""
+        self.reader = FrameReader(self.START_TOKEN, self.END_COMMAND, parseCandapterFrame)
         self.state = InputState.NONE
         self.error_count = 0
         self.success_count = 0
@@ -99,6 +98,7 @@ class Candapter(LiveInput):
         self.port.write(self.END_COMMAND)
         self.port.write(self.OPEN_COMMAND)
         self.port.write(self.END_COMMAND)
+        self._openJournal()
         self.state = InputState.STARTED
 
     def stop(self) -> None:
@@ -109,56 +109,31 @@ class Candapter(LiveInput):
         self.port.write(self.CLOSE_COMMAND)
         self.port.write(self.END_COMMAND)
         self.port.close()
+        self.reader.reset()
+        self._closeJournal()
         self.state = InputState.CONNECTED
 
     def parse(self, message: str) -> Message:
         """
-        Overrides LiveInput.parse().
-
-        Format: 3CF1014521 - iiiLddtttt
-            - iii = id
-            - L = length
-            - dd = L data bytes each with 2 chars
-            - tttt = time stamp
+        Overrides LiveInput.parse(). See framing.parseCandapterFrame for the format.
         """
-        try:
-            id = int(message[0:3], base=16)
-            length = int(message[3])
-            data = []
-            for i in range(length):
-                data.append(int(message[(4 + 2 * i):(6 + 2 * i)], base=16))
-            timestamp = datetime.fromtimestamp(
-                float(message[(length * 2 + 4):]) / 1000)
-            return Message(timestamp, id, data)
-        except BaseException:
-            raise MessageFormatException("Error with message fields")
+        return parseCandapterFrame(message.encode())
 
     def _handle_read(self):
         """
-        Handles the reading of Candapter data.
+        Handles the reading of Candapter data, parsing every frame completed by the read.
         """
         try:
-            buf = self.port.readAll()
-            msgs = buf.data().decode()
+            msgs, errors = self.reader.read(self.port.readAll().data())
         except BaseException:
             print("Error with receiving message")
             return
 
-        for char in msgs:
-            if char == self.START_TOKEN.decode():
-                self.message_started = True
-                self.current_message = ""
-            elif char == self.END_COMMAND.decode():
-                try:
-                    msg = self.parse(self.current_message)
-                    if msg is not None:
-                        self._model.addMessage(msg)
-                    self.success_count += 1
-                except MessageFormatException:
-                    self.error_count += 1
-                except RuntimeError:
-                    self.stop()
-                self.message_started = False
-                self.current_message = ""
-            elif self.message_started:
-                self.current_message += char
+        self.error_count += errors
+        if self._journal is not None:
+            self._journal.add(msgs, errors)
+        try:
+            self._model.addMessages(msgs)
+            self.success_count += len(msgs)
+        except RuntimeError:
+            self.stop()
@@ -0,0 +1,113 @@
+"""
+This file specifies the framing of the text frames sent by the serial live inputs (see
+Candapter and XBee), shared by both.
+
+Each frame is a start token, hex encoded fields and an end token. Reads are added to a
+bytearray receive buffer, the complete frames in it are found with bytes.split, and each
+is parsed straight from bytes (bytes.fromhex for the payload, a single int conversion for
+the timestamp), so a whole read is turned into a batch of messages at once. Anything
+after the last end token is kept for the next read.
+"""
+
+from typing import Callable, List, Tuple
+
+from ner_processing.message import Message, MessageFormatException
+
+# Longest partial frame kept while waiting for its end token
+MAX_PENDING_BYTES = 1 << 12
+
+
+def parseCandapterFrame(frame: bytes) -> Message:
+    """
+    Parses the fields of a Candapter frame (without its start and end tokens).
+
+    Format: 3CF1014521 - iiiLddtttt
+        - iii = id
+        - L = length
+        - dd = L data bytes each with 2 chars
+        - tttt = time stamp
+    """
+    try:
+        length = int(frame[3:4])
+        data = bytes.fromhex(frame[4:4 + 2 * length].decode())
+        if len(data) != length:
+            raise ValueError("Missing data bytes")
+        return Message(int(frame[4 + 2 * length:]), int(frame[0:3], base=16), data)
+    except (ValueError, UnicodeDecodeError):
+        raise MessageFormatException("Error with message fields")
+
+
+def parseXBeeFrame(frame: bytes) -> Message:
+    """
+    Parses the fields of an XBee frame (without its start and end tokens).
+
+    Format: 16595049813570C18ddddtttt - ttttttttttttt iii L dd...
+        - ttttttttttttt = time stamp (13 digits, ms since epoch)
+        - iii = id
+        - L = length
+        - dd = L data bytes each with 2 chars
+    """
+    try:
+        length = int(frame[16:17])
+        data = bytes.fromhex(frame[17:17 + 2 * length].decode())
+        if len(data) != length:
+            raise ValueError("Missing data bytes")
+        return Message(int(frame[0:13]), int(frame[13:16], base=16), data)
+    except (ValueError, UnicodeDecodeError):
+        raise MessageFormatException("Error with message fields")
+
+
+class FrameReader:
+    """
+    Splits the reads of a serial stream into frames, and parses them into messages with
+    the given frame parser. Bytes outside of a frame (ex. replies to commands) are skipped.
+    """
+
+    def __init__(self, start_token: bytes, end_token: bytes, parse: Callable[[bytes], Message]):
+        self.start_token = start_token
+        self.end_token = end_token
+        self.parse = parse
+        self._buffer = bytearray()
+
+    def reset(self) -> None:
+        """
+        Drops any partial frame waiting for the rest of its bytes.
+        """
+        self._buffer.clear()
+
+    def read(self, data: bytes) -> Tuple[List[Message], int]:
+        """
+        Adds a read to the receive buffer, and parses every frame it completes. Returns the
+        messages, along with the number of frames that could not be parsed.
+        """
+        self._buffer += data
+        messages = []
+        errors = 0
+        end = self._buffer.rfind(self.end_token)
+        if end >= 0:
+            for segment in bytes(self._buffer[:end]).split(self.end_token):
+                start = segment.rfind(self.start_token)
+                if start < 0:
+                    continue
+                try:
+                    messages.append(self.parse(segment[start + len(self.start_token):]))
+                except MessageFormatException:
+                    errors += 1
+            del self._buffer[:end + len(self.end_token)]
+            self._keepFrom(self._buffer.find(self.start_token))
+
+        if len(self._buffer) > MAX_PENDING_BYTES:
+            # Too long to be a frame still waiting for its end token, so resynchronize on
+            # the last start token after the one it starts with (if that is short enough)
+            start = self._buffer.rfind(self.start_token, 1)
+            self._keepFrom(start if start >= 0 and len(self._buffer) - start <= MAX_PENDING_BYTES else -1)
+        return messages, errors
+
+    def _keepFrom(self, start: int) -> None:
+        """
+        Drops the buffer up to the given offset, or all of it if there is none (-1).
+        """
+        if start < 0:
+            self._buffer.clear()
+        else:
+            del self._buffer[:start]
@@ -0,0 +1,179 @@
+"""
+This file specifies the journal of a live input, which appends every parsed frame received
+to binary log files on disk, so no data is lost when the app closes or crashes.
+
+Frames are written in the binary log format (see decode_files.BINARY_FRAME_DTYPE), so
+journal files can be processed like any other log. That format only holds parsed frames
+with up to 8 data bytes: frames that failed to parse are not journaled and longer payloads
+are cut to 8 bytes, and both are counted. The receive path only puts each batch
+of messages on a queue: a background thread converts and writes everything queued in one
+write, syncs the file to disk every so often, and rotates to a new file once the current
+one is big or old enough. If the disk falls too far behind, frames are dropped and
+counted rather than blocking the receive path or growing memory without bound.
+"""
+
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import numpy as np
+
+from ner_processing.decode_batch import messagesToFrames
+from ner_processing.decode_files import BINARY_FRAME_DTYPE
+from ner_processing.message import Message
+
+JOURNAL_MAX_BYTES = 64 << 20  # Size of a journal file before rotating
+JOURNAL_MAX_SECONDS = 15 * 60  # Age of a journal file before rotating
+JOURNAL_SYNC_SECONDS = 1.0  # Time between syncs of the journal file to disk
+JOURNAL_MAX_PENDING = 1 << 20  # Frames waiting to be written before dropping
+
+
+class FrameJournal:
+    """
+    Appends received frames to rotating binary log files in a directory, named by the UTC
+    time each was started and their index (ex. live-20230101-120000-000.bin), from a
+    background thread.
+    """
+
+    def __init__(self, directory: str, prefix: str = "live", max_bytes: int = JOURNAL_MAX_BYTES,
+                 max_seconds: float = JOURNAL_MAX_SECONDS, sync_seconds: float = JOURNAL_SYNC_SECONDS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes - max_bytes % BINARY_FRAME_DTYPE.itemsize
+        self.max_seconds = max_seconds
+        self.sync_seconds = sync_seconds
+        self.written_count = 0
+        self.dropped_count = 0
+        self.unparsed_count = 0  # Frames received but not journaled, as they failed to parse
+        self.truncated_count = 0  # Frames journaled with their payload cut to 8 bytes
+        self.filepaths: List[str] = []
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._file = None
+        self._thread = threading.Thread(target=self._write, daemon=True)
+        self._thread.start()
+
+    def add(self, msgs: List[Message], unparsed: int = 0) -> None:
+        """
+        Queues a batch of received messages to be written, counting the number of frames in
+        the same read that failed to parse. Never blocks.
+        """
+        self.unparsed_count += unparsed
+        if not msgs:
+            return
+        with self._pending_lock:
+            if self._pending + len(msgs) > JOURNAL_MAX_PENDING:
+                self.dropped_count += len(msgs)
+                return
+            self._pending += len(msgs)
+        self._queue.put(msgs)
+
+    def close(self) -> None:
+        """
+        Writes all queued messages, syncs and closes the journal file, and reports any frames
+        not journaled in full.
+        """
+        self._queue.put(None)
+        self._thread.join()
+        if self.unparsed_count or self.truncated_count or self.dropped_count:
+            print(f"Journal skipped {self.unparsed_count} frames that failed to parse, cut "
+                  f"{self.truncated_count} payloads to 8 bytes and dropped {self.dropped_count} frames")
+
+    def getFilepath(self) -> Optional[str]:
+        """
+        Gets the path of the journal file currently being written, if any.
+        """
+        return self.filepaths[-1] if self.filepaths else None
+
+    def _open(self) -> None:
+        """
+        Starts a new journal file, named by the current time.
+        """
+        name = f"{self.prefix}-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}"
+        index = len(self.filepaths)
+        filepath = os.path.join(self.directory, f"{name}-{index:03d}.bin")
+        while os.path.exists(filepath):
+            index += 1
+            filepath = os.path.join(self.directory, f"{name}-{index:03d}.bin")
+        self._file = open(filepath, "wb")
+        self._file_bytes = 0
+        self._file_start = time.monotonic()
+        self.filepaths.append(filepath)
+
+    def _sync(self) -> None:
+        """
+        Flushes the journal file and syncs it to disk.
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+
+    def _closeFile(self) -> None:
+        """
+        Syncs and closes the journal file.
+        """
+        self._sync()
+        self._file.close()
+        self._file = None
+
+    def _writeRecords(self, records: np.ndarray) -> None:
+        """
+        Writes frame records to the journal, rotating files as needed. Files are only
+        split between records, so each is a valid binary log.
+        """
+        while records.size:
+            if self._file is not None and (self._file_bytes >= self.max_bytes or
+                                           time.monotonic() - self._file_start >= self.max_seconds):
+                self._closeFile()
+            if self._file is None:
+                self._open()
+            count = max((self.max_bytes - self._file_bytes) // records.itemsize, 1)
+            self._file.write(records[:count].tobytes())
+            self._file_bytes += min(count, records.size) * records.itemsize
+            records = records[count:]
+
+    def _write(self) -> None:
+        """
+        Writes queued messages until closed. Runs in the background thread.
+        """
+        self._last_sync = time.monotonic()
+        closing = False
+        while not closing:
+            try:
+                batches = [self._queue.get(timeout=self.sync_seconds)]
+            except queue.Empty:
+                batches = []
+            # Take everything else already queued, to write it at once
+            while True:
+                try:
+                    batches.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batches:
+                closing = True
+                batches = [batch for batch in batches if batch is not None]
+
+            msgs = [msg for batch in batches for msg in batch]
+            if msgs:
+                frames = messagesToFrames(msgs)
+                self.truncated_count += int(np.count_nonzero(frames["length"] > 8))
+                records = np.zeros(frames.size, dtype=BINARY_FRAME_DTYPE)
+                for field in BINARY_FRAME_DTYPE.names:
+                    records[field] = frames[field]
+                try:
+                    self._writeRecords(records)
+                    self.written_count += len(msgs)
+                except OSError as e:
+                    print(f"Error writing journal: {e}")
+                    self.dropped_count += len(msgs)
+                with self._pending_lock:
+                    self._pending -= len(msgs)
+            if self._file is not None and time.monotonic() - self._last_sync >= self.sync_seconds:
+                self._sync()
+        if self._file is not None:
+            self._closeFile()
@@ -1,8 +1,9 @@
-from typing import Callable, List, Tuple
+from typing import Callable, List, Optional, Tuple
 from enum import Enum
 
 from PyQt6.QtSerialPort import QSerialPortInfo
 
+from ner_live.journal import FrameJournal
 from ner_processing.message import Message
 from ner_telhub.model.message_model import MessageModel
 
@@ -31,6 +32,7 @@ class InputType(Enum):
     """
     XBEE = 0
     CANDAPTER = 1
+    REPLAY = 2
 
 
 class LiveInput():
@@ -44,8 +46,11 @@ class LiveInput():
         self.state = InputState.NONE
         self.error_count = 0
         self.success_count = 0
+        self.dropped_count = 0
         self._model = model
         self._callbacks = {}
+        self._journal_directory: Optional[str] = None
+        self._journal: Optional[FrameJournal] = None
 
     def getState(self) -> InputState:
         """
@@ -65,6 +70,41 @@ class LiveInput():
         """
         return self.success_count
 
+    def getDroppedCount(self) -> int:
+        """
+        Gets the number of frames received but dropped before reaching the model (decoded
+        values, for an input decoded in a separate process).
+        """
+        return self.dropped_count
+
+    def setJournalDirectory(self, directory: Optional[str]) -> None:
+        """
+        Sets the directory every parsed frame is journaled to (see journal.FrameJournal),
+        or None to not journal frames. Takes effect when the input is next started.
+        """
+        self._journal_directory = directory
+
+    def getJournal(self) -> Optional[FrameJournal]:
+        """
+        Gets the journal of received frames, if the input is started and journaling.
+        """
+        return self._journal
+
+    def _openJournal(self) -> None:
+        """
+        Starts journaling received frames, if a journal directory is set.
+        """
+        if self._journal_directory is not None:
+            self._journal = FrameJournal(self._journal_directory)
+
+    def _closeJournal(self) -> None:
+        """
+        Writes any frames waiting to be journaled, and stops journaling.
+        """
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
     def addCallback(self,
                     name: str,
                     callback: Callable[[Message],
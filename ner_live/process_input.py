@@ -0,0 +1,250 @@
+"""
+This file specifies running a serial live input (see Candapter and XBee) in a separate
+process, so reading and decoding never wait on the GUI thread.
+
+The decode process reads the serial port with the blocking QSerialPort API, frames and
+decodes each read as a batch, and writes the decoded values into a shared memory ring
+(see shared_ring). Battery cell info, the only value that is not a number, goes into a
+second ring as cell samples (see cells.CELL_DTYPE). The GUI drains both rings on a timer,
+adding everything read since the last drain to the models at once, so a slow repaint only
+delays the data rather than losing it (up to the capacity of the rings).
+"""
+
+import multiprocessing
+from typing import List, Optional
+
+import numpy as np
+from PyQt6.QtCore import QCoreApplication, QIODeviceBase, QTimer
+from PyQt6.QtSerialPort import QSerialPort, QSerialPortInfo
+
+from ner_live.candapter import Candapter
+from ner_live.framing import FrameReader, parseCandapterFrame, parseXBeeFrame
+from ner_live.journal import FrameJournal
+from ner_live.live_input import InputState, InputType, LiveInput, LiveInputException
+from ner_live.shared_ring import SharedRing
+from ner_live.xbee import XBee
+from ner_processing.cells import CELL_DTYPE, CELL_MESSAGE_ID, decodeCellFrames
+from ner_processing.data import DataBatch
+from ner_processing.decode_batch import decodeFrames, messagesToFrames, toDataBatch
+from ner_processing.message import Message
+from ner_telhub.model.message_model import MessageModel
+
+# A single decoded value
+VALUE_DTYPE = np.dtype([
+    ("time", np.int64),  # ms since epoch
+    ("id", np.uint16),  # data ID
+    ("integral", np.bool_),
+    ("value", np.float64)
+])
+
+VALUE_RING_RECORDS = 1 << 20  # About a minute of values at full bus load
+CELL_RING_RECORDS = 1 << 16
+READ_TIMEOUT_MS = 100  # Longest wait for a read before checking for a stop
+DRAIN_INTERVAL_MS = 50  # Time between drains of the rings by the GUI
+STOP_TIMEOUT_S = 2
+
+
+def decodeToRings(msgs: List[Message], values: SharedRing, cells: SharedRing) -> int:
+    """
+    Decodes a batch of messages, writing the values to one ring (see VALUE_DTYPE) and the
+    battery cell samples to the other (see cells.CELL_DTYPE). Returns the number of
+    messages that failed to decode.
+    """
+    frames = messagesToFrames(msgs)
+    cells.write(decodeCellFrames(frames))
+    frames = frames[frames["id"] != CELL_MESSAGE_ID]
+    columns, errors = decodeFrames(frames)
+    batch = toDataBatch(frames, columns)
+    records = np.zeros(len(batch), dtype=VALUE_DTYPE)
+    records["time"] = batch.times
+    records["id"] = batch.ids
+    records["integral"] = batch.integral
+    records["value"] = batch.values
+    values.write(records)
+    return errors
+
+
+def runDecodeProcess(port_name: str, input_type: InputType, values: SharedRing, cells: SharedRing,
+                     counts, stop, journal_directory: Optional[str] = None) -> None:
+    """
+    Reads, frames and decodes a serial live input until the stop event is set, writing the
+    decoded data to the rings and the parsed frame count and the count of frames that
+    failed to parse or decode to 'counts'. If given
+    a journal directory, the received frames are also journaled there (see
+    journal.FrameJournal). This is the target of the decode process.
+    """
+    if input_type is InputType.CANDAPTER:
+        reader = FrameReader(Candapter.START_TOKEN, Candapter.END_COMMAND, parseCandapterFrame)
+        start_commands = [Candapter.SETUP_COMMAND, Candapter.TIMEON_COMMAND, Candapter.OPEN_COMMAND]
+        stop_commands = [Candapter.CLOSE_COMMAND]
+        mode = QIODeviceBase.OpenModeFlag.ReadWrite
+    else:
+        reader = FrameReader(XBee.START_TOKEN, XBee.END_TOKEN, parseXBeeFrame)
+        start_commands, stop_commands = [], []
+        mode = QIODeviceBase.OpenModeFlag.ReadOnly
+
+    app = QCoreApplication([])  # Event dispatcher for the serial port, never run
+    port = QSerialPort()
+    port.setPortName(port_name)
+    port.setBaudRate(QSerialPort.BaudRate.Baud115200.value)
+    port.setFlowControl(QSerialPort.FlowControl.HardwareControl)
+    if not port.open(mode):
+        print(f"Error opening port {port_name}")
+        return
+    journal = FrameJournal(journal_directory) if journal_directory is not None else None
+    try:
+        for command in start_commands:
+            port.write(command + Candapter.END_COMMAND)
+        while not stop.is_set():
+            if not port.waitForReadyRead(READ_TIMEOUT_MS):
+                continue
+            msgs, errors = reader.read(port.readAll().data())
+            if journal is not None:
+                journal.add(msgs, errors)
+            if msgs:
+                errors += decodeToRings(msgs, values, cells)
+            with counts.get_lock():
+                counts[0] += len(msgs)
+                counts[1] += errors
+        for command in stop_commands:
+            port.write(command + Candapter.END_COMMAND)
+            port.waitForBytesWritten(READ_TIMEOUT_MS)
+    finally:
+        if journal is not None:
+            journal.close()
+        port.close()
+        values.close()
+        cells.close()
+
+
+class ProcessInput(LiveInput):
+    """
+    A class to represent a serial live input (Candapter or XBee) read and decoded in a
+    separate process. Messages are never created on the GUI side, so message filters and
+    recording do not apply.
+    """
+
+    def __init__(self, input_type: InputType, model: MessageModel):
+        """
+        Initialize the input type and drain timer.
+        """
+        super().__init__(model)
+        if input_type not in (InputType.XBEE, InputType.CANDAPTER):
+            raise ValueError("Invalid live input type")
+        self.input_type = input_type
+        self._timer = QTimer()
+        self._timer.timeout.connect(self._drain)
+        self._reset()
+
+    def _reset(self) -> None:
+        """
+        Resets this input.
+        """
+        self.port_name = None
+        self._process = None
+        self._stop = None
+        self._counts = None
+        self._values = None
+        self._cells = None
+        self.state = InputState.NONE
+        self.error_count = 0
+        self.success_count = 0
+        self.dropped_count = 0
+
+    def _validateState(self, desired_state: InputState) -> None:
+        """
+        Validates states and throws appropriate error messages.
+        """
+        name = self.input_type.name
+        if desired_state == InputState.NONE and self.state != InputState.NONE:
+            raise LiveInputException(f"{name} is already connected.")
+        elif desired_state == InputState.CONNECTED:
+            if self.state == InputState.NONE:
+                raise LiveInputException(f"{name} is not yet connected.")
+            elif self.state == InputState.STARTED:
+                raise LiveInputException(f"{name} has already started.")
+        elif desired_state == InputState.STARTED:
+            if self.state == InputState.NONE:
+                raise LiveInputException(f"{name} is not yet connected.")
+            elif self.state == InputState.CONNECTED:
+                raise LiveInputException(f"{name} has not yet been started.")
+
+    def connect(self, *args, **kwargs) -> None:
+        """
+        Overrides LiveInput.connect()
+        """
+        self._validateState(InputState.NONE)
+
+        if len(args) != 1:
+            raise TypeError("Missing port name argument.")
+        if not isinstance(args[0], str):
+            raise TypeError("Invalid input type for port name.")
+        port_name = args[0]
+
+        for port in QSerialPortInfo.availablePorts():
+            if port.portName() == port_name:
+                self.port_name = port.systemLocation()
+                self.state = InputState.CONNECTED
+                return
+        raise LiveInputException("Invalid port name")
+
+    def disconnect(self, *args, **kwargs) -> None:
+        """
+        Overrides LiveInput.disconnect()
+        """
+        self._validateState(InputState.CONNECTED)
+        self._reset()
+
+    def start(self, *args, **kwargs) -> None:
+        """
+        Overrides LiveInput.start()
+        """
+        self._validateState(InputState.CONNECTED)
+        # Spawn rather than fork, since the GUI process holds Qt state and threads
+        context = multiprocessing.get_context("spawn")
+        self._values = SharedRing(VALUE_DTYPE, VALUE_RING_RECORDS)
+        self._cells = SharedRing(CELL_DTYPE, CELL_RING_RECORDS)
+        self._counts = context.Array("q", 2)
+        self._stop = context.Event()
+        self._process = context.Process(
+            target=runDecodeProcess,
+            args=(self.port_name, self.input_type, self._values, self._cells, self._counts, self._stop,
+                  self._journal_directory),
+            daemon=True)
+        self._process.start()
+        self._timer.start(DRAIN_INTERVAL_MS)
+        self.state = InputState.STARTED
+
+    def stop(self) -> None:
+        """
+        Overrides LiveInput.stop()
+        """
+        self._validateState(InputState.STARTED)
+        self._stop.set()
+        self._process.join(STOP_TIMEOUT_S)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._timer.stop()
+        self.state = InputState.CONNECTED
+        self._drain()
+        for ring in (self._values, self._cells):
+            ring.close()
+            ring.unlink()
+        self._values = self._cells = None
+
+    def _drain(self) -> None:
+        """
+        Adds everything decoded since the last drain to the model.
+        """
+        if self._values is None:
+            return
+        values = self._values.read()
+        cells = self._cells.read()
+        self.success_count, self.error_count = self._counts[:]
+        self.dropped_count = self._values.getDropped() + self._cells.getDropped()
+        if values.size or cells.size:
+            self._model.addDecodedData(
+                DataBatch(values["time"], values["id"], values["value"], values["integral"]), cells)
+        if self.state == InputState.STARTED and not self._process.is_alive():
+            print("Live decode process stopped unexpectedly")
+            self.stop()
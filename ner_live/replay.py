@@ -0,0 +1,225 @@
+"""
+This file specifies replaying a log file as a live input, to exercise and benchmark the
+live pipeline (input, message model, data models and views) without a car or serial
+hardware.
+
+Frames are delivered from a timer on the GUI thread, in batches, the same way a serial
+input delivers each read. Playback follows the timestamps of the log: a replay clock runs
+at a multiple of real time from the first frame, and each tick delivers every frame due by
+then, so the original gaps between frames are kept. Frames that fall too far behind the
+clock (when the pipeline cannot keep up) are dropped and counted, as a serial input would
+overflow. With no speed, frames are delivered as fast as the pipeline takes them.
+"""
+
+import os
+import time
+from typing import Iterator, Optional
+
+import numpy as np
+from PyQt6.QtCore import QTimer
+
+from ner_live.live_input import InputState, LiveInput, LiveInputException
+from ner_processing.compressed import readDecompressed
+from ner_processing.decode_batch import framesToMessages, parseBytes
+from ner_processing.decode_files import BINARY_FRAME_DTYPE, LogFormat
+from ner_processing.detect_format import detectFormat
+from ner_telhub.model.message_model import MessageModel
+
+REPLAY_INTERVAL_MS = 10  # Time between deliveries
+REPLAY_MAX_LAG_MS = 1000  # Time a frame can be overdue before it is dropped
+REPLAY_MAX_BATCH = 1 << 12  # Frames delivered at a time when replaying as fast as possible
+REPLAY_CHUNK_BYTES = 1 << 18  # Decompressed bytes of the log read at a time
+
+
+class ReplayInput(LiveInput):
+    """
+    A class to represent the replay of a log file (in any supported format) as a live input.
+    """
+
+    def __init__(self, model: MessageModel):
+        """
+        Initialize the replay timer.
+        """
+        super().__init__(model)
+        self._timer = QTimer()
+        self._timer.timeout.connect(self._handle_read)
+        self._reset()
+
+    def _reset(self) -> None:
+        """
+        Resets this replay.
+        """
+        self.filepath = None
+        self.format = None
+        self.speed: Optional[float] = 1.0
+        self._chunks: Optional[Iterator[np.ndarray]] = None
+        self._frames = np.empty(0, dtype=BINARY_FRAME_DTYPE)
+        self._start_time = 0.0
+        self._end_time: Optional[float] = None
+        self._log_start: Optional[int] = None
+        self.state = InputState.NONE
+        self.error_count = 0
+        self.success_count = 0
+        self.dropped_count = 0
+
+    def _validateState(self, desired_state: InputState) -> None:
+        """
+        Validates states and throws appropriate error messages.
+        """
+        if desired_state == InputState.NONE and self.state != InputState.NONE:
+            raise LiveInputException("Replay is already connected.")
+        elif desired_state == InputState.CONNECTED:
+            if self.state == InputState.NONE:
+                raise LiveInputException("Replay is not yet connected.")
+            elif self.state == InputState.STARTED:
+                raise LiveInputException("Replay has already started.")
+        elif desired_state == InputState.STARTED:
+            if self.state == InputState.NONE:
+                raise LiveInputException("Replay is not yet connected.")
+            elif self.state == InputState.CONNECTED:
+                raise LiveInputException("Replay has not yet been started.")
+
+    def getFrameRate(self) -> float:
+        """
+        Gets the average number of frames delivered per second since the replay started.
+        """
+        if self.state == InputState.NONE or self._start_time == 0.0:
+            return 0.0
+        end_time = self._end_time if self._end_time is not None else time.perf_counter()
+        return self.success_count / max(end_time - self._start_time, 1e-9)
+
+    def connect(self, *args, **kwargs) -> None:
+        """
+        Overrides LiveInput.connect(). Takes the path of the log file to replay, and
+        optionally the speed as a multiple of real time (kwargs["speed"], None to replay
+        as fast as possible).
+        """
+        self._validateState(InputState.NONE)
+
+        if len(args) != 1:
+            raise TypeError("Missing log file argument.")
+        if not isinstance(args[0], str):
+            raise TypeError("Invalid input type for log file.")
+        speed = kwargs.get("speed", 1.0)
+        if speed is not None and speed <= 0:
+            raise LiveInputException("Invalid replay speed")
+        if not os.path.isfile(args[0]):
+            raise LiveInputException("Invalid log file")
+        try:
+            self.format = detectFormat(args[0])
+        except ValueError:
+            raise LiveInputException("Could not detect the format of the log file")
+        self.filepath = args[0]
+        self.speed = speed
+        self.state = InputState.CONNECTED
+
+    def disconnect(self, *args, **kwargs) -> None:
+        """
+        Overrides LiveInput.disconnect()
+        """
+        self._validateState(InputState.CONNECTED)
+        self._reset()
+
+    def start(self, *args, **kwargs) -> None:
+        """
+        Overrides LiveInput.start(). Replays the log from its start.
+        """
+        self._validateState(InputState.CONNECTED)
+        self._chunks = self._readFrames()
+        self._frames = np.empty(0, dtype=BINARY_FRAME_DTYPE)
+        self._log_start = None
+        self.error_count = 0
+        self.success_count = 0
+        self.dropped_count = 0
+        self._start_time = time.perf_counter()
+        self._end_time = None
+        self._openJournal()
+        self._timer.start(0 if self.speed is None else REPLAY_INTERVAL_MS)
+        self.state = InputState.STARTED
+
+    def stop(self) -> None:
+        """
+        Overrides LiveInput.stop()
+        """
+        self._validateState(InputState.STARTED)
+        self._finish()
+        self._closeJournal()
+        self.state = InputState.CONNECTED
+
+    def _finish(self) -> None:
+        """
+        Stops delivering frames, and reports how the replay went.
+        """
+        if self._end_time is not None:
+            return
+        self._timer.stop()
+        self._chunks.close()
+        self._end_time = time.perf_counter()
+        print(f"Replayed {self.success_count} frames of {self.filepath} at {self.getFrameRate():.0f} frames/s "
+              f"({self.dropped_count} dropped, {self.error_count} errors)")
+
+    def _readFrames(self) -> Iterator[np.ndarray]:
+        """
+        Reads the log file in chunks of frames, decompressing it in a background thread if
+        compressed (see compressed.readDecompressed).
+        """
+        binary = self.format == LogFormat.BINARY
+        record_size = BINARY_FRAME_DTYPE.itemsize if binary else None
+        for buf, _ in readDecompressed(self.filepath, REPLAY_CHUNK_BYTES, record_size):
+            if binary:
+                yield np.frombuffer(buf, dtype=BINARY_FRAME_DTYPE)
+            else:
+                frames, errors = parseBytes(buf, self.format)
+                self.error_count += errors
+                yield frames
+
+    def _nextFrames(self) -> bool:
+        """
+        Reads the next chunk of frames once the current one is delivered. Returns False
+        at the end of the log.
+        """
+        while self._frames.size == 0:
+            frames = next(self._chunks, None)
+            if frames is None:
+                return False
+            self._frames = frames
+        if self._log_start is None:
+            self._log_start = int(self._frames["timestamp"][0])
+        return True
+
+    def _handle_read(self):
+        """
+        Delivers the frames due by the replay clock (or the next batch of frames, when
+        replaying as fast as possible) to the model, as a single read.
+        """
+        delivered = []
+        if self.speed is None:
+            while len(delivered) < REPLAY_MAX_BATCH and self._nextFrames():
+                count = REPLAY_MAX_BATCH - len(delivered)
+                delivered.extend(framesToMessages(self._frames[:count]))
+                self._frames = self._frames[count:]
+        else:
+            log_time = (time.perf_counter() - self._start_time) * 1000 * self.speed
+            while self._nextFrames():
+                times = self._frames["timestamp"] - self._log_start
+                late = times > log_time
+                count = int(np.argmax(late)) if late.any() else late.size
+                due = self._frames[:count]
+                self._frames = self._frames[count:]
+                dropped = times[:count] < log_time - REPLAY_MAX_LAG_MS * self.speed
+                self.dropped_count += int(np.count_nonzero(dropped))
+                delivered.extend(framesToMessages(due[~dropped]))
+                if self._frames.size:
+                    break
+
+        if delivered:
+            if self._journal is not None:
+                self._journal.add(delivered)
+            try:
+                self._model.addMessages(delivered)
+                self.success_count += len(delivered)
+            except RuntimeError:
+                self.stop()
+                return
+        if not self._nextFrames():
+            self._finish()
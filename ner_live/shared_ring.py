@@ -0,0 +1,102 @@
+"""
+This file specifies a ring buffer of fixed size records in shared memory, used to pass
+decoded live data from a decoding process to the GUI (see process_input).
+
+The ring has a single writer and a single reader, each in its own process. The header
+holds the total number of records written and read, each only advanced by its owner once
+the records are copied, so neither side needs a lock and the writer never waits on the
+reader. When the ring is full, new records are dropped and counted rather than blocking.
+"""
+
+from multiprocessing import shared_memory
+from typing import Any, Dict
+
+import numpy as np
+
+# Header fields, as int64s at the start of the shared memory
+_WRITTEN = 0  # Records written in total
+_READ = 1  # Records read in total
+_DROPPED = 2  # Records dropped because the ring was full
+_HEADER_FIELDS = 3
+
+
+class SharedRing:
+    """
+    A single writer, single reader ring buffer of records of a numpy dtype, in shared
+    memory. Create one with a capacity in the reading process, and pass it to the writing
+    process (it pickles as the name of its shared memory). The creator must unlink it once
+    both sides are done with it.
+    """
+
+    def __init__(self, dtype: np.dtype, capacity: int, name: str = None):
+        self.dtype = np.dtype(dtype)
+        self.capacity = capacity
+        header_size = _HEADER_FIELDS * np.dtype(np.int64).itemsize
+        size = header_size + capacity * self.dtype.itemsize
+        if name is None:
+            self._memory = shared_memory.SharedMemory(create=True, size=size)
+            self._memory.buf[:header_size] = bytes(header_size)
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+        self._header = np.ndarray(_HEADER_FIELDS, dtype=np.int64, buffer=self._memory.buf)
+        self._records = np.ndarray(capacity, dtype=self.dtype, buffer=self._memory.buf, offset=header_size)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"dtype": self.dtype, "capacity": self.capacity, "name": self._memory.name}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["dtype"], state["capacity"], state["name"])
+
+    def __len__(self) -> int:
+        return int(self._header[_WRITTEN] - self._header[_READ])
+
+    def getDropped(self) -> int:
+        """
+        Gets the number of records dropped because the ring was full.
+        """
+        return int(self._header[_DROPPED])
+
+    def write(self, records: np.ndarray) -> int:
+        """
+        Writes records to the ring, dropping any that do not fit. Returns the number written.
+        Must only be called by the writer.
+        """
+        written = int(self._header[_WRITTEN])
+        count = min(records.size, self.capacity - (written - int(self._header[_READ])))
+        if count < records.size:
+            self._header[_DROPPED] += records.size - count
+        start = written % self.capacity
+        first = min(count, self.capacity - start)
+        self._records[start:start + first] = records[:first]
+        self._records[:count - first] = records[first:count]
+        self._header[_WRITTEN] = written + count
+        return count
+
+    def read(self, max_count: int = None) -> np.ndarray:
+        """
+        Reads (and removes) the oldest records in the ring, up to max_count if given.
+        Must only be called by the reader.
+        """
+        read = int(self._header[_READ])
+        count = int(self._header[_WRITTEN]) - read
+        if max_count is not None:
+            count = min(count, max_count)
+        start = read % self.capacity
+        first = min(count, self.capacity - start)
+        records = np.concatenate((self._records[start:start + first], self._records[:count - first]))
+        self._header[_READ] = read + count
+        return records
+
+    def close(self) -> None:
+        """
+        Detaches from the shared memory.
+        """
+        del self._header, self._records
+        self._memory.close()
+
+    def unlink(self) -> None:
+        """
+        Frees the shared memory, once both sides have closed it. Must only be called by
+        the creator.
+        """
+        self._memory.unlink()
@@ -1,20 +1,28 @@
 from ner_live.candapter import Candapter
 from ner_live.live_input import LiveInput, InputType
+from ner_live.process_input import ProcessInput
+from ner_live.replay import ReplayInput
 from ner_live.xbee import XBee
 from ner_telhub.model.message_model import MessageModel
 
 
 def createConnection(
         input_type: InputType,
-        message_model: MessageModel) -> LiveInput:
+        message_model: MessageModel,
+        separate_process: bool = False) -> LiveInput:
     """
-    Create a live input of the given type.
+    Create a live input of the given type, read and decoded in a separate process if
+    specified (see ProcessInput). Replays always run in this process.
     """
     if LiveInput.instance is None:
-        if input_type is InputType.XBEE:
+        if separate_process and input_type is not InputType.REPLAY:
+            LiveInput.instance = ProcessInput(input_type, message_model)
+        elif input_type is InputType.XBEE:
             LiveInput.instance = XBee(message_model)
         elif input_type is InputType.CANDAPTER:
             LiveInput.instance = Candapter(message_model)
+        elif input_type is InputType.REPLAY:
+            LiveInput.instance = ReplayInput(message_model)
         else:
             raise ValueError("Invalid live input type")
     return LiveInput.instance
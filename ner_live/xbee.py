@@ -1,8 +1,8 @@
-from datetime import datetime
 from PyQt6.QtSerialPort import QSerialPort, QSerialPortInfo
 from PyQt6.QtCore import QIODeviceBase
 
-from ner_processing.message import Message, MessageFormatException
+from ner_processing.message import Message
+from ner_live.framing import FrameReader, parseXBeeFrame
 from ner_live.live_input import LiveInput, LiveInputException, InputState
 from ner_telhub.model.message_model import MessageModel
 
@@ -12,8 +12,8 @@ class XBee(LiveInput):
     A class to represent an XBee wireless module as a live input.
     """
 
-    START_TOKEN = "T"
-    END_TOKEN = "\r"
+    START_TOKEN = "T".encode()
+    END_TOKEN = "\r".encode()
 
     def __init__(self, model: MessageModel):
         """
@@ -30,8 +30,7 @@ class XBee(LiveInput):
         self.port.setBaudRate(QSerialPort.BaudRate.Baud115200.value)
         self.port.setFlowControl(QSerialPort.FlowControl.HardwareControl)
         self.port.readyRead.connect(self._handle_read)
-        self.message_started = False
-        self.current_message = ""
+        self.reader = FrameReader(self.START_TOKEN, self.END_TOKEN, parseXBeeFrame)
         self.state = InputState.NONE
         self.error_count = 0
         self.success_count = 0
@@ -89,6 +88,7 @@ class XBee(LiveInput):
         """
         self._validateState(InputState.CONNECTED)
         self.port.open(QIODeviceBase.OpenModeFlag.ReadOnly)
+        self._openJournal()
         self.state = InputState.STARTED
 
     def stop(self) -> None:
@@ -97,49 +97,31 @@ class XBee(LiveInput):
         """
         self._validateState(InputState.STARTED)
         self.port.close()
+        self.reader.reset()
+        self._closeJournal()
         self.state = InputState.CONNECTED
 
     def parse(self, message: str) -> Message:
         """
-        Overrides LiveInput.parse()
+        Overrides LiveInput.parse(). See framing.parseXBeeFrame for the format.
         """
-        try:
-            timestamp = datetime.fromtimestamp(float(message[0:13]) / 1000)
-            id = int(message[13:16], base=16)
-            length = int(message[16])
-            data = []
-            for i in range(length):
-                data.append(int(message[(17 + 2 * i):(19 + 2 * i)], base=16))
-            return Message(timestamp, id, data)
-        except BaseException:
-            raise MessageFormatException("Error with message fields")
+        return parseXBeeFrame(message.encode())
 
     def _handle_read(self):
         """
-        Handles the reading of Xbee data.
+        Handles the reading of XBee data, parsing every frame completed by the read.
         """
         try:
-            buf = self.port.readAll()
-            msgs = buf.data().decode()
+            msgs, errors = self.reader.read(self.port.readAll().data())
         except BaseException:
             print("Error with receiving message")
             return
 
-        for char in msgs:
-            if char == self.START_TOKEN:
-                self.message_started = True
-                self.current_message = ""
-            elif char == self.END_TOKEN:
-                try:
-                    msg = self.parse(self.current_message)
-                    if msg is not None:
-                        self._model.addMessage(msg)
-                    self.success_count += 1
-                except MessageFormatException:
-                    self.error_count += 1
-                except RuntimeError:
-                    self.stop()
-                self.message_started = False
-                self.current_message = ""
-            elif self.message_started:
-                self.current_message += char
+        self.error_count += errors
+        if self._journal is not None:
+            self._journal.add(msgs, errors)
+        try:
+            self._model.addMessages(msgs)
+            self.success_count += len(msgs)
+        except RuntimeError:
+            self.stop()
@@ -1,44 +1,65 @@
+import argparse
+import collections
+import functools
+import json
 import multiprocessing
 from datetime import datetime
 
-from os import listdir, path
-import csv
-import sys
-from typing import List
+from os import cpu_count, listdir, path, truncate
+import queue
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
-from .master_mapping import DATA_IDS
-from .thread import thread
+from .compressed import estimateDecompressedSize, isCompressed, readDecompressed, readSample
+from .data import toEpochMillis
+from .decode_files import BINARY_FRAME_DTYPE, LogFormat, findLastLineEnd, splitByteRanges
+from .decode_profile import DecodeProfile, timeStage
+from .detect_format import detectFormat
+from .export import CSVWriter, OutputFormat, createWriter
+from .frame_filter import FrameFilter
+from .manifest import MANIFEST_SUFFIX, Manifest
+from .merge import MergeChunk, batchToSignalColumns, mergeChunks
+from .time_index import INDEX_SUFFIX, TimeWindow, findTimeRanges
+from .thread import CSV_LINE_END, FORMAT, thread_binary, thread_buffer, thread_range
 
 DEFAULT_LOGS_DIRECTORY = "./logs/"
-DEFAULT_OUTPUT_PATH = "./output.csv"
-PROCESSORS = 8
-PROCESS_CHUNK_SIZE = 85000  # Processes data in chunks, specified by this variable
+DEFAULT_OUTPUT_DIRECTORY = "."
+PROCESSORS = cpu_count() or 1
+PROCESS_CHUNK_SIZE = 20000  # Binary frames sent to a worker at a time
+PROCESS_CHUNK_BYTES = 1 << 20  # Bytes of a text log sent to a worker at a time
+MAX_CHUNKS_IN_FLIGHT = 2 * PROCESSORS  # Chunks being decoded or waiting to be written
+ABORT_POLL_S = 0.1  # Time between checks by the writer that splitting has not failed
 
 
-def getLineCount(filepaths: List[str]) -> int:
+def getLineCount(files: Dict[str, LogFormat]) -> int:
     """
-    Gets the total line count of all the files in the list.
+    Gets the total line count of all the files, given the format of each.
     
     There is no native way to get line counts of files without looping, so 
     this function gets the total size and estimates the line count based
-    on a subset of N lines.
+    on a subset of N lines. Binary files have fixed width records, so their
+    count is exact.
     """
+    binary_count = sum(estimateDecompressedSize(fp) // BINARY_FRAME_DTYPE.itemsize
+                       for fp, format in files.items() if format == LogFormat.BINARY)
+    filepaths = [fp for fp, format in files.items() if format != LogFormat.BINARY]
     if len(filepaths) == 0:
-        return 0
+        return binary_count
 
     N = 20
     tested_lines = 0
     tested_size = 0
-    total_size = sum(path.getsize(fp) for fp in filepaths)
+    total_size = sum(estimateDecompressedSize(fp) for fp in filepaths)
 
     for fp in filepaths:
-        with open(fp) as file:
-            for line in file:
-                tested_lines += 1
-                tested_size += len(line)
-                if tested_lines >= N:
-                    return int(total_size / (tested_size / tested_lines))
-    return int(total_size / (tested_size / tested_lines))
+        for line in readSample(fp).splitlines(keepends=True):
+            tested_lines += 1
+            tested_size += len(line)
+            if tested_lines >= N:
+                return binary_count + int(total_size / (tested_size / tested_lines))
+    if tested_lines == 0:
+        return binary_count
+    return binary_count + int(total_size / (tested_size / tested_lines))
 
 
 def find_time(start, finish):
@@ -66,84 +87,420 @@ def find_time(start, finish):
         microseconds))
 
 
-def process_lines(lines, writer):
+def parse_time(value: str) -> int:
     """
-    Processes a chunk of lines and writes the results to the CSV.
+    Parses a time argument, given either in ms since epoch or as an ISO 8601 datetime
+    (ex. 2022-07-31T20:04:07.004Z), into ms since epoch.
     """
-    with multiprocessing.Pool(PROCESSORS) as p:
-        out = p.map(thread, lines)
-    lines.clear()
-    for data in out:
-        for sub_data in data:
-            str_time = sub_data.timestamp.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
-            writer.writerow([str_time, sub_data.id, DATA_IDS[sub_data.id]["name"], sub_data.value])
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return toEpochMillis(datetime.fromisoformat(value.rstrip("Z")))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid time: {value}")
+
+
+def parse_ids(value: str) -> List[int]:
+    """
+    Parses a comma separated list of ids (ex. 162,514).
+    """
+    try:
+        return [int(id) for id in value.split(",") if id.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid id list: {value}")
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parses the command line arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m ner_processing",
+        description="Processes log files into a single output file.")
+    parser.add_argument(
+        "output_dir", nargs="?",
+        help="directory to write the output file to (default: current directory)")
+    parser.add_argument(
+        "paths", nargs="*",
+        help=f"log files to process (default: all files in {DEFAULT_LOGS_DIRECTORY})")
+    parser.add_argument(
+        "--output-format", choices=[format.value for format in OutputFormat], default="csv",
+        help="csv writes one row per data point, npz and parquet write typed columns")
+    parser.add_argument(
+        "--format", choices=["auto"] + [format.name.lower() for format in LogFormat], default="auto",
+        help="format of the log files, auto detects the format of each file from its start "
+             "(default: auto)")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="only process data appended since the last run, and append it to the output "
+             "(uses a manifest stored next to the output, csv only)")
+    parser.add_argument(
+        "--start-time", type=parse_time,
+        help="only process data from this time on (ms since epoch or ISO 8601)")
+    parser.add_argument(
+        "--end-time", type=parse_time,
+        help="only process data before this time (ms since epoch or ISO 8601)")
+    parser.add_argument(
+        "--merge", action="store_true",
+        help="decode all the files at once and merge them into a single time ordered output "
+             "(for logs split across files, or recorded by several loggers at once)")
+    parser.add_argument(
+        "--can-ids", type=parse_ids,
+        help="only process messages with these CAN ids (comma separated)")
+    parser.add_argument(
+        "--data-ids", type=parse_ids,
+        help="only output these data ids (comma separated), only the messages producing "
+             "them are processed")
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="print the frames, bytes, errors and decode time of each CAN id, and the time "
+             "spent in each stage (also written as JSON next to the output)")
+    args = parser.parse_args()
+    if args.incremental and args.output_format != OutputFormat.CSV.value:
+        parser.error("--incremental is only supported for csv output")
+    if args.incremental and args.merge:
+        parser.error("--incremental cannot be used with --merge")
+    if args.incremental and get_filter(args) is not None:
+        parser.error("--incremental cannot be used with a time window or id filters")
+    return args
+
+
+def get_window(args: argparse.Namespace) -> Optional[TimeWindow]:
+    """
+    Gets the time window to process from the command line arguments, if any.
+    """
+    if args.start_time is None and args.end_time is None:
+        return None
+    start = args.start_time if args.start_time is not None else -2 ** 63
+    end = args.end_time if args.end_time is not None else 2 ** 63 - 1
+    return (start, end)
+
+
+def is_log_file(name: str) -> bool:
+    """
+    Checks if a file in the logs directory is a log, rather than a time index or manifest
+    written next to the logs.
+    """
+    return not name.endswith((INDEX_SUFFIX, MANIFEST_SUFFIX, MANIFEST_SUFFIX + ".tmp"))
+
+
+def get_formats(filepaths: List[str], format_name: str) -> Dict[str, LogFormat]:
+    """
+    Gets the format of each log file, given the name of a format for all of them, or
+    'auto' to detect the format of each file (see detect_format). Files whose format
+    cannot be detected are left out.
+    """
+    if format_name != "auto":
+        return {fp: LogFormat[format_name.upper()] for fp in filepaths}
+    files = {}
+    for fp in filepaths:
+        try:
+            files[fp] = detectFormat(fp, FORMAT)
+        except ValueError:
+            print(f"Skipping {fp}, its format could not be detected")
+            continue
+        print(f"Detected {files[fp].name} format for {fp}")
+    return files
+
+
+def get_filter(args: argparse.Namespace) -> Optional[FrameFilter]:
+    """
+    Gets the filter of the frames to process from the command line arguments, if any.
+    """
+    window = get_window(args)
+    if args.can_ids is None and args.data_ids is None and window is None:
+        return None
+    return FrameFilter(args.can_ids, args.data_ids, window)
+
+
+def get_chunks(fp: str, format: LogFormat, manifest: Manifest = None,
+               frame_filter: FrameFilter = None) -> Iterator[Tuple[Callable, tuple, str, int]]:
+    """
+    Splits a log file in the given format into chunks. Gives the worker function (for the
+    format) and position arguments of each chunk in file order, along with a description
+    of its position and the byte offset it ends at.
+
+    Workers read their chunk of the file themselves, so only the chunk position is sent
+    to them: (offset, length) byte ranges ending on line boundaries for text logs, and
+    (start, count) frame ranges for binary logs. Compressed logs cannot be read by
+    position, so they are decompressed here while the workers process the previous
+    chunks, and each chunk is sent as a buffer (see compressed).
+
+    If given a manifest, the file is only split from the offset it was last processed
+    up to, and text logs stop at their last complete line. If given a filter with a time
+    window, only the parts of the file covering the window are split (see time_index).
+    """
+    frame_size = BINARY_FRAME_DTYPE.itemsize
+    if isCompressed(fp):
+        yield from get_compressed_chunks(fp, format, manifest)
+        return
+    if frame_filter is not None and frame_filter.window is not None:
+        ranges = findTimeRanges(fp, format, frame_filter.window)
+    elif manifest:
+        end_offset = path.getsize(fp) if format == LogFormat.BINARY else findLastLineEnd(fp)
+        start_offset = manifest.getOffset(fp)
+        ranges = [(start_offset, end_offset - start_offset)]
+    else:
+        ranges = [(0, path.getsize(fp))]
+
+    func = functools.partial(thread_range, format=format)
+    for range_offset, range_length in ranges:
+        if format == LogFormat.BINARY:
+            first = range_offset // frame_size
+            last = (range_offset + range_length) // frame_size
+            for start in range(first, last, PROCESS_CHUNK_SIZE):
+                count = min(PROCESS_CHUNK_SIZE, last - start)
+                yield thread_binary, (fp, start, count), f"frame {start}", (start + count) * frame_size
+        else:
+            range_end = range_offset + range_length
+            for offset, length in splitByteRanges(fp, PROCESS_CHUNK_BYTES, range_offset, range_end):
+                yield func, (fp, offset, length), f"byte {offset}", offset + length
+
+
+def get_compressed_chunks(fp: str, format: LogFormat,
+                          manifest: Manifest = None) -> Iterator[Tuple[Callable, tuple, str, int]]:
+    """
+    Splits a compressed log file into chunks of decompressed data (see get_chunks).
+    Positions are given in compressed bytes, and errors are located in decompressed bytes.
+
+    A compressed file can only be processed from its start, so it is only committed to
+    the manifest once it is done: chunks before the last end at no offset (None), and a
+    file already in the manifest is skipped.
+    """
+    if manifest and manifest.getOffset(fp) > 0:
+        return
+    record_size = BINARY_FRAME_DTYPE.itemsize if format == LogFormat.BINARY else None
+    func = functools.partial(thread_buffer, format=format)
+    position = 0
+    decompressed_position = 0
+    previous = None
+    for buf, offset in readDecompressed(fp, PROCESS_CHUNK_BYTES, record_size):
+        if previous is not None:
+            yield previous
+        previous = (func, (buf, decompressed_position), f"compressed byte {position}", None)
+        position = offset
+        decompressed_position += len(buf)
+    if previous is not None:
+        yield previous[:3] + (path.getsize(fp),)
+
+
+def submit_chunks(pool, files: Dict[str, LogFormat], pending: queue.Queue, abort: threading.Event,
+                  output: OutputFormat, manifest: Manifest = None, frame_filter: FrameFilter = None,
+                  profile: bool = False) -> None:
+    """
+    Splits the log files into chunks (see get_chunks) and submits them to the pool, given
+    the format of each file.
+
+    Each chunk's pending result is put on the queue in file order, along with the byte
+    offset the chunk ends at. The queue is bounded, so splitting blocks whenever too many
+    chunks are waiting to be decoded or written. A final None marks the end of the input.
+    If splitting or submitting fails (or is interrupted), the abort event is set instead,
+    so the writer stops rather than waiting for chunks that will never arrive.
+
+    If given a filter, workers only decode the frames it selects (see frame_filter). If
+    profiling, each worker also returns a profile of its chunk (see decode_profile).
+    """
+    try:
+        for fp, format in files.items():
+            for func, position_args, position, end_offset in get_chunks(fp, format, manifest, frame_filter):
+                result = pool.apply_async(func, position_args + (output, frame_filter, profile))
+                pending.put((fp, position, end_offset, result))
+    except BaseException:
+        abort.set()
+        raise
+    finally:
+        if not abort.is_set():
+            pending.put(None)
+
+
+def stream_chunks(pool, fp: str, format: LogFormat, output: OutputFormat, frame_filter: FrameFilter = None,
+                  profile: DecodeProfile = None, depth: int = 2) -> Iterator[MergeChunk]:
+    """
+    Submits the chunks of a log file in the given format to the pool, and gives back each
+    processed chunk in time order for the merge (see merge). Up to 'depth' chunks of the file are submitted
+    ahead of the one being read, and the first of them are submitted straight away, so
+    every file being merged is decoded at the same time.
+    """
+    chunks = get_chunks(fp, format, frame_filter=frame_filter)
+    pending = collections.deque()
+
+    def submit() -> None:
+        chunk = next(chunks, None)
+        if chunk is not None:
+            func, position_args, position, _ = chunk
+            args = position_args + (output, frame_filter, profile is not None, True)
+            pending.append((position, pool.apply_async(func, args)))
+
+    for _ in range(depth):
+        submit()
+
+    def results() -> Iterator[MergeChunk]:
+        while pending:
+            position, result = pending.popleft()
+            submit()
+            try:
+                chunk, errors, chunk_profile = result.get()
+                if errors:
+                    print(f"Error with {errors.total} lines in chunk starting at {position} in file {fp}: "
+                          f"{errors.formatSummary()}")
+                if profile is not None and chunk_profile is not None:
+                    profile.merge(chunk_profile)
+                print(f"Done with chunk starting at {position} in file {fp}")
+            except BaseException:
+                print(f"Error with chunk starting at {position} in file {fp}")
+                continue
+            yield chunk
+    return results()
+
+
+def write_merged(pool, files: Dict[str, LogFormat], writer, output: OutputFormat,
+                 frame_filter: FrameFilter = None, profile: DecodeProfile = None) -> None:
+    """
+    Processes all the log files at once, given the format of each, and writes them as a
+    single time ordered output, merging the processed chunks of every file as they arrive
+    (see merge).
+    """
+    depth = max(1, MAX_CHUNKS_IN_FLIGHT // max(len(files), 1))
+    streams = [stream_chunks(pool, fp, format, output, frame_filter, profile, depth)
+               for fp, format in files.items()]
+    for _, rows in mergeChunks(streams):
+        with timeStage(profile, "write"):
+            if output == OutputFormat.CSV:
+                writer.write(CSV_LINE_END.join(rows) + CSV_LINE_END)
+            else:
+                writer.write(batchToSignalColumns(rows))
+
+
+def write_chunks(pending: queue.Queue, abort: threading.Event, writer, manifest: Manifest = None,
+                 profile: DecodeProfile = None) -> None:
+    """
+    Writes decoded chunks to the output writer in the order they were submitted, until
+    the end of the input or until the abort event is set (see submit_chunks). If given a
+    manifest, each chunk is committed to it once written. If given a profile, the
+    profile of each chunk is merged into it, along with the time spent writing. Once a
+    chunk fails, nothing more is committed, so a resumed run starts from the failed chunk
+    (the output size in the manifest is shared by all files, so committing a later file
+    would also keep the rows written after the gap).
+    """
+    committing = True
+    while not abort.is_set():
+        try:
+            item = pending.get(timeout=ABORT_POLL_S)
+        except queue.Empty:
+            continue
+        if item is None:
+            return
+        fp, position, end_offset, result = item
+        while not result.ready():
+            if abort.is_set():
+                return
+            result.wait(ABORT_POLL_S)
+        try:
+            chunk, errors, chunk_profile = result.get()
+            if errors:
+                print(f"Error with {errors.total} lines in chunk starting at {position} in file {fp}: "
+                      f"{errors.formatSummary()}")
+            with timeStage(profile, "write"):
+                writer.write(chunk)
+            if profile is not None and chunk_profile is not None:
+                profile.merge(chunk_profile)
+            print(f"Done with chunk starting at {position} in file {fp}")
+        except BaseException:
+            print(f"Error with chunk starting at {position} in file {fp}")
+            committing = False
+            continue
+        if manifest and committing and end_offset is not None:
+            manifest.commit(fp, end_offset, writer.getSize())
 
 
 if __name__ == "__main__":
     """
-    Processes the log files in the log folder and puts them in the output.csv file.
-    Command line args:
-        - arg 1 = output directory of the csv file
+    Processes the log files in the log folder and puts them in the output file.
+    Command line args (see parse_args):
+        - arg 1 = output directory of the output file
             - Must be a directory name
-            - A file called 'output.csv' is created here
+            - A file called 'output.<format>' is created here
         - args 2... = space separated list of file paths to process
-            - Each path must be a text file
+            - Each path must be a log file in one of the formats of decode_files.LogFormat
+        - --output-format = csv (default), npz or parquet (see export)
+        - --format = format of the log files, detected for each file by default (see detect_format)
+        - --incremental = only process data appended since the last run (see manifest)
+        - --start-time/--end-time = only process data in a time window (see time_index)
+        - --can-ids/--data-ids = only process the given messages or data (see frame_filter)
+        - --merge = merge the files into a single time ordered output (see merge)
+        - --profile = print a per CAN id decode profile (see decode_profile)
     Default file paths are all those in "./logs/"
     Default output directory is the current location
+
+    Processing is a pipeline: this thread splits the files into chunks and submits them to
+    a single pool of workers, which read, decode and format them, while a writer thread
+    writes the finished chunks in order.
+    When merging, the chunks of every file are submitted at once, and this thread merges
+    and writes the finished chunks in time order instead.
     """
     
     start_time = datetime.now().strftime("%M:%S:%f").split(":")
-    output_path = ""
-    paths_to_process = []
+    args = parse_args()
+    output_format = OutputFormat(args.output_format)
 
     # If manually specifying the paths
-    if len(sys.argv) > 1:
+    if args.output_dir is not None:
         # Formats the input file path strings correctly
-        for i in range(1, len(sys.argv)):
-            sys.argv[i] = sys.argv[i].replace("\\","/") 
-        
-        output_path = sys.argv[1] + "/output.csv"
-        paths_to_process = sys.argv[2:]
+        output_dir = args.output_dir.replace("\\", "/")
+        paths_to_process = [fp.replace("\\", "/") for fp in args.paths]
     else:
-        output_path = DEFAULT_OUTPUT_PATH
-        paths_to_process = [DEFAULT_LOGS_DIRECTORY + name for name in listdir(DEFAULT_LOGS_DIRECTORY)]
+        output_dir = DEFAULT_OUTPUT_DIRECTORY
+        paths_to_process = [DEFAULT_LOGS_DIRECTORY + name for name in listdir(DEFAULT_LOGS_DIRECTORY)
+                            if is_log_file(name)]
+    output_path = f"{output_dir}/output.{output_format.value}"
 
-    line_count = getLineCount(paths_to_process)
+    files = get_formats(paths_to_process, args.format)
+    line_count = getLineCount(files)
     print(f"Processing a total of {line_count} lines")
 
-    current_line = 0
-    manager = multiprocessing.Manager()
-    return_dict = manager.dict()
-
-    print(f"Writing to the CSV")
-    header = ["time", "data_id", "description", "value"]
-
-    with open(output_path, "w", encoding="UTF8", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(header)
-
-        for fp in paths_to_process:
-            with open(fp) as file:
-                line_num = 0
-                lines = []
-                for line in file:
-                    line_num += 1
-                    current_line += 1
-                    if current_line % 5000 == 0:
-                        print(f"Line {line_num}")
-
-                    lines.append(line)
-                    try:
-                        if line_num % PROCESS_CHUNK_SIZE == 0:
-                            # When stored data reaches specified amount, use threads to decode data faster
-                            process_lines(lines, writer)
-                    except:
-                        print(f"Error with line {line_num} in file {file.name}")
-                        pass
-
-                if lines:
-                    # Handles leftover stored lines when the loop ends
-                    process_lines(lines, writer)
+    print(f"Writing to {output_path}")
+    manifest = None
+    if args.incremental:
+        manifest = Manifest.load(output_path + MANIFEST_SUFFIX)
+        if manifest.output_size > 0 and manifest.canResume(list(files), output_path):
+            # Drop anything written after the last committed chunk, then add to the end
+            print(f"Resuming from {manifest.path}")
+            truncate(output_path, manifest.output_size)
+            writer = CSVWriter(output_path, append=True)
+        else:
+            print(f"Starting a new manifest at {manifest.path}")
+            manifest = Manifest(manifest.path)
+            writer = CSVWriter(output_path)
+            manifest.output_size = writer.getSize()
+            manifest.save()
+    else:
+        writer = createWriter(output_path, output_format)
+    profile = DecodeProfile() if args.profile else None
+    try:
+        if args.merge:
+            with multiprocessing.Pool(PROCESSORS) as pool:
+                write_merged(pool, files, writer, output_format, get_filter(args), profile)
+        else:
+            pending = queue.Queue(maxsize=MAX_CHUNKS_IN_FLIGHT)
+            abort = threading.Event()
+            writer_thread = threading.Thread(target=write_chunks, args=(pending, abort, writer, manifest, profile))
+            with multiprocessing.Pool(PROCESSORS) as pool:
+                writer_thread.start()
+                try:
+                    submit_chunks(pool, files, pending, abort, output_format, manifest, get_filter(args),
+                                  args.profile)
+                finally:
+                    writer_thread.join()
+    finally:
+        writer.close()
+
+    if profile is not None:
+        print(profile.formatTable())
+        with open(output_path + ".profile.json", "w") as file:
+            json.dump(profile.toDict(), file, indent=2)
+        print(f"Wrote profile to {output_path}.profile.json")
 
     finish_time = datetime.now().strftime("%M:%S:%f").split(":")
     find_time(start_time, finish_time)
@@ -0,0 +1,176 @@
+"""
+This file specifies structured battery cell data, decoded from the cell voltage info message
+into typed columns, and the cell store, which keeps the history of every cell of the pack.
+
+The message decoder (see decode_data.decode22) gives each frame as a formatted string for
+data ID 97, which has to be parsed again by anything analysing the pack. Here the same
+fields are decoded for whole arrays of frames at once into a structured array (see
+CELL_DTYPE), about 15 bytes a frame. The cell store keeps them in a dense matrix with a row
+per cell and a column per sample of that cell, since the BMS reports every cell in turn,
+so the latest values of the pack and the history of a cell are both single array lookups.
+"""
+
+from typing import List, Optional
+
+import numpy as np
+
+CELL_MESSAGE_ID = 7  # CAN id of the cell voltage info message
+CELL_DATA_ID = 97  # Data ID of the formatted cell voltage info
+CELL_PAYLOAD_BYTES = 7
+
+# A single sample of a cell
+CELL_SAMPLE_DTYPE = np.dtype([
+    ("timestamp", np.int64),  # ms since epoch
+    ("instant_voltage", np.uint16),
+    ("open_voltage", np.uint16),
+    ("internal_resistance", np.uint16),
+    ("shunted", np.bool_)
+])
+
+# A single sample of a cell, with the id of the cell
+CELL_DTYPE = np.dtype([("cell_id", np.uint8)] + [
+    (name, CELL_SAMPLE_DTYPE.fields[name][0]) for name in CELL_SAMPLE_DTYPE.names
+])
+
+
+def decodeCells(timestamps: np.ndarray, data: np.ndarray) -> np.ndarray:
+    """
+    Decodes cell voltage info payloads, given as a uint8 matrix with a row per payload,
+    along with the timestamp of each. Gives the same fields as decode_data.decode22, as a
+    structured array (see CELL_DTYPE).
+    """
+    data = np.asarray(data, dtype=np.uint16)
+    cells = np.zeros(data.shape[0], dtype=CELL_DTYPE)
+    cells["timestamp"] = timestamps
+    cells["cell_id"] = data[:, 0]
+    cells["instant_voltage"] = (data[:, 1] << 8) | data[:, 2]
+    cells["internal_resistance"] = ((data[:, 3] << 8) | data[:, 4]) & 0x7fff  # clear last bit
+    cells["shunted"] = (data[:, 3] >> 7) & 1  # get last bit
+    cells["open_voltage"] = (data[:, 5] << 8) | data[:, 6]
+    return cells
+
+
+def decodeCellFrames(frames: np.ndarray) -> np.ndarray:
+    """
+    Decodes the cell voltage info frames of an array of frames (see
+    decode_batch.FRAME_DTYPE), skipping any frame too short to decode.
+    """
+    selected = (frames["id"] == CELL_MESSAGE_ID) & (frames["length"] >= CELL_PAYLOAD_BYTES)
+    return decodeCells(frames["timestamp"][selected], frames["data"][selected])
+
+
+def formatCells(cells: np.ndarray) -> List[str]:
+    """
+    Formats cell samples (see CELL_DTYPE) as the strings decode_data.decode22 gives for
+    data ID 97.
+    """
+    fields = ("cell_id", "instant_voltage", "open_voltage", "internal_resistance", "shunted")
+    return [f"{cell_id} {instant} {open} {resistance} {shunted}"
+            for cell_id, instant, open, resistance, shunted
+            in zip(*(cells[name].astype(np.int64).tolist() for name in fields))]
+
+
+class CellStore:
+    """
+    Stores the samples of every cell (see CELL_DTYPE) in a dense matrix, with a row per
+    cell id and a column per sample of the cell, in the order they were added. Both
+    dimensions grow as needed, so samples can be added a frame or a log at a time.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._samples = np.zeros((0, capacity), dtype=CELL_SAMPLE_DTYPE)
+        self._counts = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return int(self._counts.sum())
+
+    def _reserve(self, cell_count: int, capacity: int) -> None:
+        """
+        Grows the matrix to hold at least the given number of cells and samples per cell,
+        doubling the samples per cell so adding a sample at a time stays cheap.
+        """
+        rows, columns = self._samples.shape
+        if cell_count <= rows and capacity <= columns:
+            return
+        if capacity > columns:
+            columns = max(capacity, 2 * columns)
+        samples = np.zeros((max(cell_count, rows), columns), dtype=CELL_SAMPLE_DTYPE)
+        samples[:rows, :self._samples.shape[1]] = self._samples
+        self._samples = samples
+        counts = np.zeros(samples.shape[0], dtype=np.int64)
+        counts[:self._counts.size] = self._counts
+        self._counts = counts
+
+    def add(self, cells: np.ndarray) -> None:
+        """
+        Adds an array of cell samples (see CELL_DTYPE) to the store.
+        """
+        if cells.size == 0:
+            return
+        cell_ids = cells["cell_id"].astype(np.int64)
+        cell_count = int(cell_ids.max()) + 1
+        new_counts = np.bincount(cell_ids, minlength=cell_count)
+        counts = np.zeros(max(cell_count, self._counts.size), dtype=np.int64)
+        counts[:self._counts.size] = self._counts
+        self._reserve(cell_count, int((counts[:cell_count] + new_counts).max()))
+
+        # Find the column of each new sample: after the samples already in its row, in the
+        # order the samples were given
+        order = np.argsort(cell_ids, kind="stable")
+        sorted_ids = cell_ids[order]
+        ranks = np.arange(order.size) - np.searchsorted(sorted_ids, sorted_ids)
+        rows = sorted_ids
+        columns = self._counts[rows] + ranks
+        for name in CELL_SAMPLE_DTYPE.names:
+            self._samples[name][rows, columns] = cells[name][order]
+        self._counts[:cell_count] += new_counts
+
+    def getCellIds(self) -> np.ndarray:
+        """
+        Gets the ids of the cells with samples, in order.
+        """
+        return np.flatnonzero(self._counts)
+
+    def getCount(self, cell_id: int) -> int:
+        """
+        Gets the number of samples of a cell.
+        """
+        return int(self._counts[cell_id]) if cell_id < self._counts.size else 0
+
+    def getLatest(self) -> np.ndarray:
+        """
+        Gets the latest sample of every cell with samples (see CELL_DTYPE), in cell order.
+        """
+        cell_ids = self.getCellIds()
+        latest = self._samples[cell_ids, self._counts[cell_ids] - 1]
+        cells = np.zeros(cell_ids.size, dtype=CELL_DTYPE)
+        cells["cell_id"] = cell_ids
+        for name in CELL_SAMPLE_DTYPE.names:
+            cells[name] = latest[name]
+        return cells
+
+    def getHistory(self, cell_id: int, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        """
+        Gets the samples of a cell (see CELL_SAMPLE_DTYPE) in the order they were added,
+        only those in the given time window (start and end in ms since epoch) if given.
+        """
+        history = self._samples[cell_id, :self.getCount(cell_id)].copy()
+        if start is not None:
+            history = history[history["timestamp"] >= start]
+        if end is not None:
+            history = history[history["timestamp"] < end]
+        return history
+
+    def getMatrix(self, field: str) -> np.ndarray:
+        """
+        Gets a field of every sample as a cell x sample matrix, with a row per cell id.
+        Cells with fewer samples than others are padded with zeros (see getCount).
+        """
+        return self._samples[field][:, :int(self._counts.max(initial=0))].copy()
+
+    def clear(self) -> None:
+        """
+        Removes all samples.
+        """
+        self._samples = np.zeros((0, self._samples.shape[1]), dtype=CELL_SAMPLE_DTYPE)
+        self._counts = np.zeros(0, dtype=np.int64)
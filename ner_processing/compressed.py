@@ -0,0 +1,172 @@
+"""
+This file specifies reading of compressed log files (gzip, zstd and xz), so archived logs
+can be processed without first decompressing them to disk.
+
+Compression is detected from the magic bytes at the start of a file rather than its name.
+Compressed files cannot be read from an arbitrary offset, so they are streamed from the
+start: a background thread decompresses the file into a bounded queue of blocks while the
+caller parses the previous ones (zlib, lzma and zstandard release the GIL while they
+work). Positions and progress are given in compressed bytes consumed, which can be
+compared against the size of the file on disk.
+
+zstd support requires the optional zstandard package.
+"""
+
+import gzip
+import lzma
+import os
+import queue
+import threading
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+# Magic bytes at the start of each supported compressed format
+COMPRESSION_MAGIC = {
+    "gzip": b"\x1f\x8b",
+    "xz": b"\xfd7zXZ\x00",
+    "zstd": b"\x28\xb5\x2f\xfd"
+}
+DECOMPRESS_BLOCK_BYTES = 1 << 20  # Decompressed bytes read at a time
+DECOMPRESS_QUEUE_BLOCKS = 4  # Decompressed blocks waiting to be parsed
+SIZE_SAMPLE_BYTES = 1 << 20  # Decompressed bytes read to estimate the size of a file
+LINE_SAMPLE_BYTES = 1 << 16  # Decompressed bytes read to sample the lines of a file
+
+
+def getCompression(filepath: str) -> Optional[str]:
+    """
+    Gets the compression of a file ('gzip', 'xz' or 'zstd') from its magic bytes, or None
+    if it is not compressed.
+    """
+    with open(filepath, "rb") as file:
+        head = file.read(max(len(magic) for magic in COMPRESSION_MAGIC.values()))
+    for compression, magic in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def isCompressed(filepath: str) -> bool:
+    """
+    Checks if a file is compressed in a supported format.
+    """
+    return getCompression(filepath) is not None
+
+
+def openDecompressed(raw: BinaryIO, compression: Optional[str]) -> BinaryIO:
+    """
+    Wraps an open binary file in a stream of its decompressed contents.
+    """
+    if compression is None:
+        return raw
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=raw)
+    if compression == "xz":
+        return lzma.LZMAFile(raw)
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("Reading zstd compressed logs requires zstandard (pip install zstandard)")
+        return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+    raise ValueError("Invalid compression.")
+
+
+def estimateDecompressedSize(filepath: str, sample_size: int = SIZE_SAMPLE_BYTES) -> int:
+    """
+    Estimates the decompressed size of a file from the compression ratio of its start.
+    Files that are not compressed, or small enough to fully decompress, get an exact size.
+    """
+    compression = getCompression(filepath)
+    size = os.path.getsize(filepath)
+    if compression is None:
+        return size
+    with open(filepath, "rb") as raw, openDecompressed(raw, compression) as file:
+        sample = file.read(sample_size)
+        if len(sample) < sample_size or not file.read(1):
+            return len(sample)
+        return int(size * len(sample) / max(raw.tell(), 1))
+
+
+def readSample(filepath: str, sample_size: int = LINE_SAMPLE_BYTES) -> bytes:
+    """
+    Reads up to 'sample_size' decompressed bytes from the start of a file.
+    """
+    with open(filepath, "rb") as raw, openDecompressed(raw, getCompression(filepath)) as file:
+        return file.read(sample_size)
+
+
+class DecompressedReader:
+    """
+    Decompresses a file in a background thread, giving it back in chunks of whole records:
+    lines for text logs, or fixed size records for binary logs (any trailing partial record
+    is dropped, as with decode_files.readBinary).
+
+    Iterating gives (chunk, offset) pairs, where the offset is the number of compressed
+    bytes consumed to decompress everything up to the end of the chunk.
+    """
+
+    def __init__(self, filepath: str, block_size: int = DECOMPRESS_BLOCK_BYTES, record_size: int = None):
+        self.filepath = filepath
+        self.block_size = block_size
+        self.record_size = record_size
+        self._blocks: queue.Queue = queue.Queue(maxsize=DECOMPRESS_QUEUE_BLOCKS)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._decompress, daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        """
+        Puts an item on the queue, waiting for space unless the reader is closed.
+        """
+        while not self._stop.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _decompress(self) -> None:
+        try:
+            with open(self.filepath, "rb") as raw, \
+                    openDecompressed(raw, getCompression(self.filepath)) as file:
+                while block := file.read(self.block_size):
+                    if not self._put((block, raw.tell())):
+                        return
+            self._put(None)
+        except BaseException as e:
+            self._put(e)
+
+    def __iter__(self) -> Iterator[Tuple[bytes, int]]:
+        remainder = b""
+        offset = 0
+        try:
+            while (item := self._blocks.get()) is not None:
+                if isinstance(item, BaseException):
+                    raise item
+                block, offset = item
+                data = remainder + block
+                if self.record_size is None:
+                    end = data.rfind(b"\n") + 1
+                else:
+                    end = len(data) - len(data) % self.record_size
+                remainder = data[end:]
+                if end > 0:
+                    yield data[:end], offset
+            if remainder and self.record_size is None:
+                yield remainder, offset
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """
+        Stops decompressing.
+        """
+        self._stop.set()
+
+
+def readDecompressed(filepath: str, chunk_size: int = DECOMPRESS_BLOCK_BYTES,
+                     record_size: int = None) -> Iterator[Tuple[bytes, int]]:
+    """
+    Reads a compressed file in chunks of whole records (see DecompressedReader).
+    """
+    return iter(DecompressedReader(filepath, chunk_size, record_size))
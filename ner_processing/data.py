@@ -1,23 +1,153 @@
-from typing import List, Any
+from typing import Any, Iterator, List, Union
 from datetime import datetime
 
+import numpy as np
+
+
+def toEpochMillis(timestamp: Union[datetime, int]) -> int:
+    """
+    Converts a timestamp to an int in ms since epoch. Ints are assumed to already be in ms.
+    """
+    if isinstance(timestamp, datetime):
+        return round(timestamp.timestamp() * 1000)
+    return int(timestamp)
+
+
+def fromEpochMillis(time: int) -> datetime:
+    """
+    Converts a timestamp in ms since epoch to a datetime.
+    """
+    return datetime.fromtimestamp(time / 1000)
+
 
 class Data:
     """
     Wrapper class for an individual piece of data.
+
+    Uses slots and stores the timestamp as an int in ms since epoch, since millions of
+    these can be held at once. For large amounts of data, use DataBatch instead.
     """
 
-    def __init__(self, timestamp: datetime, id: int, value: Any):
-        self.timestamp = timestamp
+    __slots__ = ("time", "id", "value")
+
+    def __init__(self, timestamp: Union[datetime, int], id: int, value: Any):
+        self.time = toEpochMillis(timestamp)
         self.id = id
         self.value = value
 
+    @property
+    def timestamp(self) -> datetime:
+        """
+        Gets the timestamp of the data as a datetime.
+        """
+        return fromEpochMillis(self.time)
+
     def __str__(self):
         """
         Overrides the string representation of the class.
         """
         return f"ID {self.id} - {self.timestamp} - {self.value}"
 
+
+class DataBatch:
+    """
+    A batch of data points, stored as parallel arrays rather than one object per point:
+        - times : int64 timestamps in ms since epoch
+        - ids : uint16 data IDs
+        - values : float64 values, or python objects if any value is not numeric
+        - integral : whether each numeric value is an integer
+
+    The arrays pickle as a few buffers, so batches are cheap to send between processes.
+    """
+
+    __slots__ = ("times", "ids", "values", "integral")
+
+    def __init__(self, times: np.ndarray, ids: np.ndarray, values: np.ndarray, integral: np.ndarray = None):
+        self.times = np.asarray(times, dtype=np.int64)
+        self.ids = np.asarray(ids, dtype=np.uint16)
+        self.values = values
+        self.integral = np.zeros(len(values), dtype=bool) if integral is None else integral
+
+    def __len__(self) -> int:
+        return self.times.size
+
+    def __iter__(self) -> Iterator[Data]:
+        return iter(self.toDataList())
+
+    def getValues(self) -> List[Any]:
+        """
+        Gets the values as a list of python values, with integers restored as ints.
+        """
+        if self.values.dtype == object:
+            return self.values.tolist()
+        values = self.values.astype(object)
+        values[self.integral] = self.values[self.integral].astype(np.int64).astype(object)
+        return values.tolist()
+
+    def toDataList(self) -> List[Data]:
+        """
+        Converts the batch into a list of data points.
+        """
+        return [Data(time, id, value) for time, id, value
+                in zip(self.times.tolist(), self.ids.tolist(), self.getValues())]
+
+    def select(self, indices: np.ndarray) -> "DataBatch":
+        """
+        Gets the data points at the given indices (or boolean mask) as a new batch.
+        """
+        return DataBatch(self.times[indices], self.ids[indices], self.values[indices], self.integral[indices])
+
+    @staticmethod
+    def empty() -> "DataBatch":
+        """
+        Creates a batch with no data.
+        """
+        return DataBatch(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint16),
+                         np.empty(0, dtype=np.float64))
+
+    @staticmethod
+    def fromDataList(data_list: List[Data]) -> "DataBatch":
+        """
+        Creates a batch from a list of data points.
+        """
+        return DataBatch.fromValues(
+            [data.time for data in data_list], [data.id for data in data_list],
+            [data.value for data in data_list])
+
+    @staticmethod
+    def fromValues(times: List[int], ids: List[int], values: List[Any]) -> "DataBatch":
+        """
+        Creates a batch from lists of timestamps (ms since epoch), data IDs and python values.
+        Values are stored as floats if they are all numbers, and as objects otherwise.
+        """
+        numeric = all(isinstance(value, (int, float)) and not isinstance(value, bool)
+                      for value in values)
+        if not numeric:
+            return DataBatch(times, ids, np.array(values + [None], dtype=object)[:-1])
+        return DataBatch(times, ids, np.array(values, dtype=np.float64),
+                         np.array([isinstance(value, int) for value in values], dtype=bool))
+
+    @staticmethod
+    def concatenate(batches: List["DataBatch"]) -> "DataBatch":
+        """
+        Joins a list of batches into a single batch, in order.
+        """
+        batches = [batch for batch in batches if len(batch) != 0]
+        if len(batches) == 0:
+            return DataBatch.empty()
+        if len(batches) == 1:
+            return batches[0]
+        if any(batch.values.dtype == object for batch in batches):
+            values = np.concatenate([np.array(batch.getValues() + [None], dtype=object)[:-1]
+                                     for batch in batches])
+        else:
+            values = np.concatenate([batch.values for batch in batches])
+        return DataBatch(
+            np.concatenate([batch.times for batch in batches]),
+            np.concatenate([batch.ids for batch in batches]),
+            values,
+            np.concatenate([batch.integral for batch in batches]))
+
     
 class ProcessData:
     """
@@ -35,10 +165,10 @@ class ProcessData:
     def twosComp(val: int, bits: int = 16) -> int:
         """
         Computes the twos complement of the given value.
+
+        Written without branching so that it also works on numpy arrays (see decode_batch).
         """
-        if (val & (1 << (bits - 1))) != 0:
-            val = val - (1 << bits)
-        return val
+        return val - ((val & (1 << (bits - 1))) << 1)
 
     @staticmethod
     def littleEndian(data_bytes: List[int], bits: int = 8) -> int:
@@ -0,0 +1,637 @@
+"""
+This file specifies a batch decode engine that parses whole chunks of log lines into
+structured frame arrays and evaluates the message decoders as column operations.
+
+Messages described by signals have a compiled batch decoder (see decode_signals), which
+is called once per (CAN id, length) group rather than once per frame. The hand-written
+decoders in decode_data.py only index, slice, shift, mask and scale their input, so they
+can be handed a list of numpy columns (one per payload byte) instead of a list of ints.
+Decoders that cannot be evaluated this way (ex. ones returning strings) fall back to the
+per-frame path for their group only.
+"""
+
+import time
+from numbers import Number
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .data import Data, DataBatch
+from .decode_files import LogFormat, processLine
+from .decode_profile import DecodeProfile
+from .frame_filter import FrameFilter
+from .master_mapping import MESSAGE_IDS
+from .message import Message
+from .parse_errors import BAD_PAYLOAD, BAD_TIMESTAMP, DECODER_ERROR, TRUNCATED, UNKNOWN_ID, ErrorStats
+from .timestamps import isoFieldsToMillis, isoFieldsValid, parseEpochMillis, parseIsoMillis
+
+# Structured layout of a single CAN frame
+FRAME_DTYPE = np.dtype([
+    ("timestamp", np.int64),  # ms since epoch
+    ("id", np.uint16),
+    ("length", np.uint8),
+    ("data", np.uint8, (8,))
+])
+
+_NEWLINE = ord("\n")
+_SPACE = ord(" ")
+_MAX_TIME_DIGITS = 18  # Longest timestamp field that can be read into an int64 without overflowing
+
+# Layout of the ISO timestamp starting each TEXTUAL1_LEGACY line (and the space after it),
+# with a 0 wherever a digit is expected, and the (start, width) of each of its fields
+_LEGACY_LAYOUT = np.frombuffer(b"0000-00-00T00:00:00.000Z ", dtype=np.uint8)
+_LEGACY_FIELDS = [(0, 4), (5, 2), (8, 2), (11, 2), (14, 2), (17, 2), (20, 3)]
+_LEGACY_TIME_DIGITS = 18  # Digits of ms since epoch written over each ISO timestamp
+
+# Whether each (id, length) group can be decoded on int64 columns, filled on first use
+_column_safe: Dict[Tuple[int, int], bool] = {}
+
+# Decoded data, keyed by data ID. Each entry holds the index of the frame the value came
+# from, the position of the data ID in its decoder output, and the values themselves.
+DecodedColumns = Dict[int, Tuple[np.ndarray, int, np.ndarray]]
+
+# Decoded data, keyed by data ID. Each entry holds the timestamps (ms since epoch) and
+# the values of the data ID.
+SignalColumns = Dict[int, Tuple[np.ndarray, np.ndarray]]
+
+
+def parseTextual1(lines: List[str]) -> Tuple[np.ndarray, int]:
+    """
+    Parses a list of TEXTUAL1 lines into a frame array. Returns the frames and the number
+    of lines that could not be parsed.
+    """
+    return parseTextual1Bytes("".join(lines).encode())
+
+
+def parseLines(lines: List[str], format: LogFormat, return_sizes: bool = False,
+               frame_filter: Optional[FrameFilter] = None, error_stats: Optional[ErrorStats] = None) -> Tuple:
+    """
+    Parses a list of lines in any text format into a frame array. Returns the frames and
+    the number of lines that could not be parsed, and if requested, the size of the line
+    each frame was parsed from. If given a filter, only the frames passing it are returned.
+    If given error statistics, the lines that could not be parsed are recorded in them,
+    along with the offset of each frame (see parse_errors).
+
+    TEXTUAL1 and TEXTUAL1_LEGACY lines are parsed without a per-line loop, other formats
+    are parsed line by line (see _parseEachLine).
+    """
+    if format == LogFormat.TEXTUAL1:
+        return parseTextual1Bytes("".join(lines).encode(), return_sizes, frame_filter, error_stats)
+    if format == LogFormat.TEXTUAL1_LEGACY:
+        return parseTextual1LegacyBytes("".join(lines).encode(), return_sizes, frame_filter, error_stats)
+    return _parseResult(_parseEachLine(lines, format, frame_filter, error_stats), return_sizes, error_stats)
+
+
+def _parseResult(parsed: Tuple[np.ndarray, int, np.ndarray, np.ndarray], return_sizes: bool,
+                 error_stats: Optional[ErrorStats]) -> Tuple:
+    """
+    Gives the frames, error count and (if requested) sizes of a parse, recording the offset
+    of each frame in the error statistics if given them.
+    """
+    frames, errors, sizes, offsets = parsed
+    if error_stats is not None:
+        error_stats.setFrames(offsets)
+    if return_sizes:
+        return frames, errors, sizes
+    return frames, errors
+
+
+def _lineError(line: str, format: LogFormat) -> str:
+    """
+    Gets the category (see parse_errors) of a text line that could not be parsed.
+    """
+    fields = line.split()
+    if len(fields) < 4:
+        return TRUNCATED
+    try:
+        if format == LogFormat.TEXTUAL1_LEGACY:
+            parseIsoMillis(fields[0])
+        elif format == LogFormat.TEXTUAL1:
+            if not (fields[0].isascii() and fields[0].isdigit()):
+                raise ValueError(fields[0])
+        else:
+            parseEpochMillis(fields[0])
+    except (ValueError, OverflowError):
+        return BAD_TIMESTAMP
+    if not fields[1].isdecimal() or int(fields[1]) >= 2 ** 16:
+        return UNKNOWN_ID
+    if format == LogFormat.TEXTUAL2:
+        payload_bytes = len(fields) - 3
+    elif not fields[3].startswith("["):
+        return BAD_PAYLOAD
+    elif not fields[-1].endswith("]"):
+        return TRUNCATED
+    else:
+        payload_bytes = len(" ".join(fields[3:]).split(","))
+    if fields[2].isdecimal() and payload_bytes < int(fields[2]):
+        return TRUNCATED
+    return BAD_PAYLOAD
+
+
+def _parseEachLine(lines: List[str], format: LogFormat, frame_filter: Optional[FrameFilter] = None,
+                   error_stats: Optional[ErrorStats] = None,
+                   line_offsets: Optional[List[int]] = None) -> Tuple[np.ndarray, int, np.ndarray, np.ndarray]:
+    """
+    Parses a list of lines one at a time with processLine (see parseLines). Lines with a
+    CAN id rejected by the filter are skipped before the rest of the line is processed.
+    Returns the frames, the number of lines that could not be parsed, and the size and
+    offset of the line each frame was parsed from. Lines are taken to follow each other
+    unless given the offset of each.
+    """
+    if line_offsets is None:
+        line_offsets = np.concatenate(([0], np.cumsum([len(line) for line in lines], dtype=np.int64)))[:-1].tolist()
+    frames = np.zeros(len(lines), dtype=FRAME_DTYPE)
+    sizes = np.zeros(len(lines), dtype=np.int64)
+    offsets = np.zeros(len(lines), dtype=np.int64)
+    count = 0
+    errors = 0
+    for line, line_offset in zip(lines, line_offsets):
+        if not line.strip():
+            continue
+        try:
+            if frame_filter is not None and not frame_filter.matchesId(int(line.split(None, 2)[1])):
+                continue
+        except (IndexError, ValueError):
+            pass  # Left for processLine to reject
+        try:
+            message = processLine(line, format)
+            frames[count] = (message.time, message.id, len(message.data),
+                             list(message.data.ljust(8, b"\0")))
+            sizes[count] = len(line)
+            offsets[count] = line_offset
+            count += 1
+        except BaseException:
+            errors += 1
+            if error_stats is not None:
+                error_stats.add(_lineError(line, format), [line_offset])
+    frames, sizes, offsets = frames[:count], sizes[:count], offsets[:count]
+    if frame_filter is not None:
+        selected = frame_filter.matches(frames["id"], frames["timestamp"])
+        frames, sizes, offsets = frames[selected], sizes[selected], offsets[selected]
+    return frames, errors, sizes, offsets
+
+
+def parseTextual1Bytes(buf: bytes, return_sizes: bool = False, frame_filter: Optional[FrameFilter] = None,
+                       error_stats: Optional[ErrorStats] = None) -> Tuple:
+    """
+    Parses a buffer of TEXTUAL1 lines into a frame array without a per-line python loop.
+    Returns the frames and the number of lines that could not be parsed, and if requested,
+    the size of the line each frame was parsed from. If given a filter, lines it rejects
+    are dropped from the buffer, using only their timestamp and id, before it is parsed.
+    If given error statistics, the lines that could not be parsed are recorded in them.
+
+    Every byte that is not a digit is treated as a separator, so the whole buffer can be
+    converted to integers in one call. The number of tokens per line is then used to
+    find each line's fields. Lines that are not laid out as below (ex. a missing bracket
+    or a sign), whose length field does not match the number of payload bytes, or with an
+    id or payload byte out of range are dropped, without affecting the rest.
+    Example line format: 1679511802367 514 8 [54,0,10,0,0,0,0,0]
+    """
+    return _parseResult(_parseTextual1(np.frombuffer(buf, dtype=np.uint8), frame_filter, error_stats),
+                        return_sizes, error_stats)
+
+
+def _parseTextual1(raw: np.ndarray, frame_filter: Optional[FrameFilter] = None,
+                   error_stats: Optional[ErrorStats] = None) -> Tuple[np.ndarray, int, np.ndarray, np.ndarray]:
+    """
+    Parses a buffer of TEXTUAL1 lines, as a uint8 array (see parseTextual1Bytes). Returns
+    the frames, the number of lines that could not be parsed, and the size and offset of
+    the line each frame was parsed from.
+    """
+    if raw.size > 0 and raw[-1] != _NEWLINE:
+        raw = np.append(raw, np.uint8(_NEWLINE))
+    selected_offsets = None
+    if frame_filter is not None:
+        raw, selected_offsets = frame_filter.selectTextual1(raw)
+    if raw.size == 0:
+        return np.empty(0, dtype=FRAME_DTYPE), 0, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    line_ends = np.flatnonzero(raw == _NEWLINE)
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+    line_offsets = line_starts if selected_offsets is None else selected_offsets
+    line_sizes = line_ends - line_starts + 1
+    valid, nonblank = _textual1Layout(raw, line_starts, line_ends)
+
+    # Convert every run of digits to an integer at once, and find each line's first one
+    is_digit = (raw >= ord("0")) & (raw <= ord("9"))
+    token_starts = is_digit.copy()
+    token_starts[1:] &= ~is_digit[:-1]
+    token_ends = is_digit & ~np.append(is_digit[1:], False)
+    token_widths = np.flatnonzero(token_ends) - np.flatnonzero(token_starts) + 1
+    token_cumsum = np.concatenate(([0], np.cumsum(token_starts, dtype=np.int64)))
+    line_tokens = token_cumsum[line_ends] - token_cumsum[line_starts]
+    tokens = np.fromstring(
+        np.where(is_digit, raw, _SPACE).astype(np.uint8).tobytes(),
+        dtype=np.int64, sep=" ")
+    first = token_cumsum[line_starts]
+
+    # Lines laid out as "timestamp id length [data]" must also have as many payload bytes
+    # as their length field (at most 8), an id in range and payload bytes in range, and a
+    # timestamp short enough to read (longer ones saturate rather than fail to convert)
+    lengths = line_tokens - 3
+    valid &= (lengths >= 1) & (lengths <= 8)
+    valid[valid] &= tokens[first[valid] + 2] == lengths[valid]
+    payload_error = nonblank & ~valid
+    for i in range(8):
+        has_byte = valid & (lengths > i)
+        payload_error[has_byte] |= tokens[first[has_byte] + 3 + i] > 255
+    bad_timestamp = valid & ~payload_error
+    bad_timestamp[bad_timestamp] = token_widths[first[bad_timestamp]] > _MAX_TIME_DIGITS
+    unknown_id = valid & ~payload_error & ~bad_timestamp
+    unknown_id[unknown_id] = tokens[first[unknown_id] + 1] >= 2 ** 16
+    invalid = payload_error | bad_timestamp | unknown_id
+    valid &= ~invalid
+    if error_stats is not None:
+        error_stats.add(BAD_TIMESTAMP, line_offsets[bad_timestamp])
+        error_stats.add(UNKNOWN_ID, line_offsets[unknown_id])
+        # The other rejected lines are categorized one at a time, as the per-line parser would
+        for start, end, offset in zip(line_starts[payload_error].tolist(), line_ends[payload_error].tolist(),
+                                      line_offsets[payload_error].tolist()):
+            line = raw[start:end + 1].tobytes().decode("latin-1")
+            error_stats.add(_lineError(line, LogFormat.TEXTUAL1), [offset])
+
+    first, lengths = first[valid], lengths[valid]
+    frames = np.zeros(first.size, dtype=FRAME_DTYPE)
+    frames["timestamp"] = tokens[first]
+    frames["id"] = tokens[first + 1]
+    frames["length"] = lengths
+    for i in range(8):
+        has_byte = lengths > i
+        frames["data"][has_byte, i] = tokens[first[has_byte] + 3 + i]
+    sizes, offsets = line_sizes[valid], line_offsets[valid]
+    if frame_filter is not None:
+        # Lines with fields too long to check before parsing are checked now
+        selected = frame_filter.matches(frames["id"], frames["timestamp"])
+        frames, sizes, offsets = frames[selected], sizes[selected], offsets[selected]
+    return frames, int(np.count_nonzero(invalid)), sizes, offsets
+
+
+def _textual1Layout(raw: np.ndarray, line_starts: np.ndarray, line_ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Checks the layout of each TEXTUAL1 line of a buffer: four fields of digits separated
+    by single spaces, the last one in brackets with its bytes separated by commas (any
+    other character, ex. a sign, is rejected). Whitespace around the line is ignored.
+    Returns a mask of the lines laid out correctly, and a mask of the lines that are not
+    blank.
+    """
+    line_index = np.repeat(np.arange(line_ends.size), line_ends - line_starts + 1)
+    is_blank = (raw == _SPACE) | (raw == ord("\t")) | (raw == ord("\r")) | (raw == _NEWLINE)
+    text_cumsum = np.concatenate(([0], np.cumsum(~is_blank, dtype=np.int64)))
+    line_text = text_cumsum[line_ends] - text_cumsum[line_starts]
+    # Bytes between the first and last non-blank bytes of their line
+    text_before = text_cumsum[1:] - text_cumsum[line_starts][line_index]
+    text_after = text_cumsum[line_ends][line_index] - text_cumsum[:-1]
+    inside = (text_before > 0) & (text_after > 0)
+
+    is_digit = (raw >= ord("0")) & (raw <= ord("9"))
+    is_space = inside & (raw == _SPACE)
+    is_open = raw == ord("[")
+    is_comma = raw == ord(",")
+    is_close = raw == ord("]")
+    next_digit = np.append(is_digit[1:], False)
+    prev_digit = np.concatenate(([False], is_digit[:-1]))
+    next_inside = np.append(inside[1:], False)
+    prev_inside = np.concatenate(([False], inside[:-1]))
+    open_cumsum = np.concatenate(([0], np.cumsum(is_open, dtype=np.int64)))
+    after_open = open_cumsum[1:] > open_cumsum[line_starts][line_index]
+
+    bad = inside & ~(is_digit | is_space | is_open | is_comma | is_close)
+    bad |= inside & ~prev_inside & ~is_digit  # Must start with a digit
+    bad |= inside & ~next_inside & ~is_close  # Must end with the closing bracket
+    bad |= is_space & ~(next_digit | np.append(is_open[1:], False))
+    bad |= is_space & after_open
+    bad |= is_open & ~(np.concatenate(([False], is_space[:-1])) & next_digit)
+    bad |= is_comma & ~(prev_digit & next_digit & after_open)
+    bad |= is_close & ~(prev_digit & ~next_inside)
+
+    def lineCounts(mask: np.ndarray) -> np.ndarray:
+        cumsum = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+        return cumsum[line_ends + 1] - cumsum[line_starts]
+
+    valid = ((lineCounts(bad) == 0) & (lineCounts(is_space) == 3) &
+             (lineCounts(is_open) == 1) & (lineCounts(is_close) == 1))
+    nonblank = line_text > 0
+    return valid & nonblank, nonblank
+
+
+def parseTextual1LegacyBytes(buf: bytes, return_sizes: bool = False, frame_filter: Optional[FrameFilter] = None,
+                             error_stats: Optional[ErrorStats] = None) -> Tuple:
+    """
+    Parses a buffer of TEXTUAL1_LEGACY lines into a frame array without a per-line python
+    loop (see parseTextual1Bytes for the return values).
+
+    The ISO timestamps starting each line are converted to ms since epoch all at once (see
+    timestamps.isoFieldsToMillis) and written over the timestamp as digits, which turns the
+    buffer into TEXTUAL1 lines of the same size. Only the lines that do not start with a
+    valid timestamp in the expected layout are parsed one at a time, and the frames of
+    both are put back in line order.
+    Example line format: 2021-01-01T00:00:00.003Z 514 8 [54,0,10,0,0,0,0,0]
+    """
+    raw = np.frombuffer(buf, dtype=np.uint8)
+    if raw.size > 0 and raw[-1] != _NEWLINE:
+        raw = np.append(raw, np.uint8(_NEWLINE))
+    line_ends = np.flatnonzero(raw == _NEWLINE)
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+    nonblank = np.maximum.reduceat(raw, line_starts) > _SPACE if raw.size else np.empty(0, dtype=bool)
+
+    # Find the lines starting with a timestamp in the expected layout, with fields in range
+    lines = np.flatnonzero(nonblank)
+    lines = lines[line_ends[lines] - line_starts[lines] >= _LEGACY_LAYOUT.size]
+    timestamps = raw[line_starts[lines][:, None] + np.arange(_LEGACY_LAYOUT.size)]
+    is_digit = (timestamps - np.uint8(ord("0"))) < 10
+    matches_layout = np.all((is_digit == (_LEGACY_LAYOUT == ord("0"))) & (is_digit | (timestamps == _LEGACY_LAYOUT)), axis=1)
+    lines, timestamps = lines[matches_layout], timestamps[matches_layout]
+    fields = []
+    for start, width in _LEGACY_FIELDS:
+        value = timestamps[:, start].astype(np.int64) - ord("0")
+        for i in range(start + 1, start + width):
+            value = value * 10 + (timestamps[:, i] - ord("0"))
+        fields.append(value)
+    in_range = isoFieldsValid(*fields[:6])
+    lines, fields = lines[in_range], [field[in_range] for field in fields]
+    millis = isoFieldsToMillis(*fields)
+    fits = (millis >= 0) & (millis < 10 ** _LEGACY_TIME_DIGITS)
+    lines, millis = lines[fits], millis[fits]
+
+    # Write each timestamp as zero padded digits over the end of its ISO timestamp
+    digits = np.full((millis.size, _LEGACY_LAYOUT.size - 1), _SPACE, dtype=np.uint8)
+    for i in range(digits.shape[1] - 1, digits.shape[1] - 1 - _LEGACY_TIME_DIGITS, -1):
+        digits[:, i] = millis % 10 + ord("0")
+        millis = millis // 10
+    text = raw.copy()
+    text[line_starts[lines][:, None] + np.arange(digits.shape[1])] = digits
+
+    # Blank out the other lines, and parse them one at a time
+    other = nonblank.copy()
+    other[lines] = False
+    if not other.any():
+        return _parseResult(_parseTextual1(text, frame_filter, error_stats), return_sizes, error_stats)
+    text[np.repeat(other, line_ends - line_starts + 1) & (text != _NEWLINE)] = _SPACE
+    frames, errors, sizes, offsets = _parseTextual1(text, frame_filter, error_stats)
+    other = np.flatnonzero(other)
+    other_lines = [raw[start:end + 1].tobytes().decode("latin-1")
+                   for start, end in zip(line_starts[other].tolist(), line_ends[other].tolist())]
+    other_frames, other_errors, other_sizes, other_offsets = _parseEachLine(
+        other_lines, LogFormat.TEXTUAL1_LEGACY, frame_filter, error_stats, line_starts[other].tolist())
+    order = np.argsort(np.concatenate((offsets, other_offsets)), kind="stable")
+    return _parseResult((np.concatenate((frames, other_frames))[order], errors + other_errors,
+                         np.concatenate((sizes, other_sizes))[order],
+                         np.concatenate((offsets, other_offsets))[order]), return_sizes, error_stats)
+
+
+def parseBytes(buf: bytes, format: LogFormat, return_sizes: bool = False,
+               frame_filter: Optional[FrameFilter] = None, error_stats: Optional[ErrorStats] = None) -> Tuple:
+    """
+    Parses a buffer of whole lines in any text format into a frame array. Returns the
+    frames and the number of lines that could not be parsed, and if requested, the size
+    of the line each frame was parsed from. If given a filter, only the frames passing
+    it are returned, and if given error statistics, the lines that could not be parsed
+    are recorded in them (see parseLines).
+
+    Lines are read one byte per character, so a line with corrupted bytes is counted as an
+    error rather than failing the whole buffer.
+    """
+    if format == LogFormat.TEXTUAL1:
+        return parseTextual1Bytes(buf, return_sizes, frame_filter, error_stats)
+    if format == LogFormat.TEXTUAL1_LEGACY:
+        return parseTextual1LegacyBytes(buf, return_sizes, frame_filter, error_stats)
+    return parseLines(buf.decode("latin-1").splitlines(keepends=True), format, return_sizes, frame_filter,
+                      error_stats)
+
+
+def messagesToFrames(msgs: List[Message]) -> np.ndarray:
+    """
+    Converts a list of messages into an array of frames.
+    """
+    frames = np.zeros(len(msgs), dtype=FRAME_DTYPE)
+    frames["timestamp"] = [msg.time for msg in msgs]
+    frames["id"] = [msg.id for msg in msgs]
+    frames["length"] = [len(msg.data) for msg in msgs]
+    data = b"".join(msg.data[:8].ljust(8, b"\0") for msg in msgs)
+    frames["data"] = np.frombuffer(data, dtype=np.uint8).reshape(-1, 8)
+    return frames
+
+
+def framesToMessages(frames: np.ndarray) -> List[Message]:
+    """
+    Converts an array of frames into a list of messages.
+    """
+    data = frames["data"].tobytes()
+    return [Message(time, id, data[8 * i:8 * i + length]) for i, (time, id, length) in enumerate(zip(
+        frames["timestamp"].tolist(), frames["id"].tolist(), np.minimum(frames["length"], 8).tolist()))]
+
+
+def _isColumn(value: Any, size: int) -> bool:
+    """
+    Checks if a decoder output is a valid numeric column (or scalar) for a group.
+    """
+    if isinstance(value, np.ndarray):
+        return value.shape == (size,) and value.dtype.kind in "biuf"
+    return isinstance(value, Number) and not isinstance(value, bool)
+
+
+def _isColumnSafe(id: int, length: int) -> bool:
+    """
+    Checks that the decoder for the given id gives the same result on int64 columns as it
+    does on python ints. Values built from a full 8 byte payload can overflow an int64, so
+    a saturated payload is decoded both ways and compared.
+    """
+    key = (id, length)
+    if key not in _column_safe:
+        decoder = MESSAGE_IDS[id]["decoder"]
+        payload = [255] * length
+        try:
+            expected = decoder(payload)
+            actual = decoder([np.full(1, b, dtype=np.int64) for b in payload])
+            _column_safe[key] = expected.keys() == actual.keys() and all(
+                _isColumn(actual[data_id], 1) and np.asarray(actual[data_id]).reshape(-1)[0] == value
+                for data_id, value in expected.items())
+        except BaseException:
+            _column_safe[key] = False
+    return _column_safe[key]
+
+
+def _decodeGroupColumns(decoder, data: np.ndarray, length: int) -> Dict[int, np.ndarray]:
+    """
+    Evaluates a decoder over a whole group of frames at once. Raises a ValueError if the
+    decoder output cannot be represented as numeric columns.
+    """
+    size = data.shape[0]
+    columns = [data[:, i].astype(np.int64) for i in range(length)]
+    decoded: Dict[int, Any] = decoder(columns)
+    result = {}
+    for data_id, value in decoded.items():
+        if not _isColumn(value, size):
+            raise ValueError("Decoder output is not columnar")
+        result[data_id] = np.broadcast_to(np.asarray(value), (size,))
+    return result
+
+
+def _decodeGroupRows(decoder, data: np.ndarray, length: int) -> Tuple[Dict[int, Tuple[np.ndarray, np.ndarray]], np.ndarray]:
+    """
+    Evaluates a decoder one payload at a time. Logs repeat the same payloads frame after
+    frame, so each distinct payload is only decoded once. Returns the decoded values with
+    the rows they came from, along with the rows that failed to decode.
+    """
+    payloads, inverse = np.unique(data[:, :length], axis=0, return_inverse=True)
+    order = np.argsort(inverse.reshape(-1), kind="stable")
+    ends = np.cumsum(np.bincount(inverse.reshape(-1), minlength=len(payloads)))
+    starts = ends - np.bincount(inverse.reshape(-1), minlength=len(payloads))
+
+    parts: Dict[int, Tuple[List[np.ndarray], List[Any]]] = {}
+    failed = [np.empty(0, dtype=np.int64)]
+    for payload, start, end in zip(payloads.tolist(), starts.tolist(), ends.tolist()):
+        rows = order[start:end]
+        try:
+            decoded: Dict[int, Any] = decoder(payload)
+        except BaseException:
+            failed.append(rows)
+            continue
+        for data_id, value in decoded.items():
+            row_parts, values = parts.setdefault(data_id, ([], []))
+            row_parts.append(rows)
+            values.extend([value] * rows.size)
+
+    result = {}
+    for data_id, (row_parts, values) in parts.items():
+        rows = np.concatenate(row_parts)
+        sort = np.argsort(rows, kind="stable")
+        result[data_id] = (rows[sort], np.array(values + [None], dtype=object)[:-1][sort])
+    return result, np.sort(np.concatenate(failed))
+
+
+def _decodeGroup(id: int, length: int, data: np.ndarray) -> Tuple[Dict[int, Tuple[np.ndarray, np.ndarray]], np.ndarray]:
+    """
+    Decodes a group of payloads sharing the same id and length. Returns the decoded
+    values with the rows they came from, along with the rows that failed.
+    """
+    message = MESSAGE_IDS[id]
+    size = data.shape[0]
+    all_rows = np.arange(size)
+
+    if "batch_decoder" in message:
+        # Compiled from the message signals, so the output is always columnar
+        try:
+            decoded = message["batch_decoder"](data[:, :length])
+        except IndexError:
+            return {}, all_rows
+        return {data_id: (all_rows, np.broadcast_to(values, (size,)))
+                for data_id, values in decoded.items()}, all_rows[:0]
+
+    if _isColumnSafe(id, length):
+        try:
+            decoded = _decodeGroupColumns(message["decoder"], data, length)
+            return {data_id: (all_rows, values) for data_id, values in decoded.items()}, all_rows[:0]
+        except BaseException:
+            pass
+
+    return _decodeGroupRows(message["decoder"], data, length)
+
+
+def decodeFrames(frames: np.ndarray, profile: DecodeProfile = None,
+                 error_stats: ErrorStats = None) -> Tuple[DecodedColumns, int]:
+    """
+    Decodes an array of frames, evaluating each decoder once per (id, length) group.
+    Returns the decoded columns and the number of frames that failed to decode.
+    If given a profile, the frames, errors and decode time of each CAN id are recorded.
+    If given error statistics, the frames that failed are recorded in them, located by
+    the frame offsets set by the parser (see parse_errors).
+    """
+    keys = frames["id"].astype(np.int64) * 16 + frames["length"]
+    keys[frames["length"] > 8] = -1
+    order = np.argsort(keys, kind="stable")
+    group_keys, group_starts = np.unique(keys[order], return_index=True)
+    group_ends = np.append(group_starts[1:], order.size)
+
+    parts: Dict[int, Tuple[List[np.ndarray], List[np.ndarray], int]] = {}
+    errors = 0
+    for key, start, end in zip(group_keys.tolist(), group_starts, group_ends):
+        id, length = divmod(key, 16)
+        indices = order[start:end]
+        if key < 0 or id not in MESSAGE_IDS:
+            errors += indices.size
+            if error_stats is not None:
+                error_stats.addFrames(BAD_PAYLOAD if key < 0 else UNKNOWN_ID, indices)
+            if profile is not None:
+                error_ids, counts = np.unique(frames["id"][indices], return_counts=True)
+                for error_id, count in zip(error_ids.tolist(), counts.tolist()):
+                    profile.addDecode(error_id, count, count, 0.0)
+            continue
+        decode_start = time.perf_counter()
+        decoded, failed = _decodeGroup(id, length, frames["data"][indices])
+        errors += failed.size
+        if error_stats is not None and failed.size:
+            error_stats.addFrames(DECODER_ERROR, indices[failed])
+        if profile is not None:
+            profile.addDecode(id, indices.size, failed.size, time.perf_counter() - decode_start)
+
+        for position, (data_id, (rows, values)) in enumerate(decoded.items()):
+            row_parts, value_parts, _ = parts.setdefault(data_id, ([], [], position))
+            row_parts.append(indices[rows])
+            value_parts.append(values)
+
+    columns: DecodedColumns = {}
+    for data_id, (row_parts, value_parts, position) in parts.items():
+        rows = np.concatenate(row_parts)
+        values = np.concatenate(value_parts) if len(value_parts) > 1 else value_parts[0]
+        if len(row_parts) > 1:
+            sort = np.argsort(rows, kind="stable")
+            rows, values = rows[sort], values[sort]
+        columns[data_id] = (rows, position, values)
+    return columns, errors
+
+
+def _batchValues(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converts a column of decoded values for a DataBatch. Returns the values as floats with
+    a mask of which are integers, or as objects if any value is not a number.
+    """
+    if values.dtype.kind in "iuf":
+        return values.astype(np.float64), np.full(values.size, values.dtype.kind != "f")
+    value_list = values.tolist()
+    if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in value_list):
+        return (np.array(value_list, dtype=np.float64),
+                np.array([isinstance(value, int) for value in value_list], dtype=bool))
+    return values.astype(object), np.zeros(values.size, dtype=bool)
+
+
+def toDataBatch(frames: np.ndarray, columns: DecodedColumns) -> DataBatch:
+    """
+    Converts decoded columns into a batch of data points, in the same order the per-frame
+    decode path would produce them.
+    """
+    if not columns:
+        return DataBatch.empty()
+    rows = np.concatenate([c[0] for c in columns.values()])
+    positions = np.concatenate([np.full(c[0].size, c[1]) for c in columns.values()])
+    ids = np.concatenate([np.full(c[0].size, id) for id, c in columns.items()])
+    converted = [_batchValues(values) for _, _, values in columns.values()]
+    if any(values.dtype == object for values, _ in converted):
+        values = np.concatenate([c[2].astype(object) for c in columns.values()])
+    else:
+        values = np.concatenate([values for values, _ in converted])
+    integral = np.concatenate([integral for _, integral in converted])
+
+    order = np.lexsort((positions, rows))
+    return DataBatch(frames["timestamp"][rows[order]], ids[order], values[order], integral[order])
+
+
+def toDataList(frames: np.ndarray, columns: DecodedColumns) -> List[Data]:
+    """
+    Converts decoded columns into a list of data points, in the same order the per-frame
+    decode path would produce them.
+    """
+    return toDataBatch(frames, columns).toDataList()
+
+
+def toSignalColumns(frames: np.ndarray, columns: DecodedColumns) -> SignalColumns:
+    """
+    Converts decoded columns into timestamp and value arrays for each data ID. Values
+    decoded frame by frame are converted to a typed array where possible.
+    """
+    signals: SignalColumns = {}
+    for data_id, (rows, _, values) in columns.items():
+        if values.dtype == object:
+            values = np.array(values.tolist())
+        signals[data_id] = (frames["timestamp"][rows], values)
+    return signals
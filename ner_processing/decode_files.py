@@ -3,10 +3,26 @@ This file specifies methods to decode message fields (timestamp, id, data bytes)
 a line in a log file. 
 """
 
+import mmap
+import os
+import struct
 from enum import Enum
-from datetime import datetime
+from typing import Iterator, List, Tuple
+
+import numpy as np
 
 from .message import Message
+from .timestamps import parseEpochMillis, parseIsoMillis
+
+# Fixed width record of a single frame in a binary log (19 bytes, little endian, packed):
+# int64 timestamp (ms since epoch), uint16 id, uint8 length, 8 data bytes (zero padded)
+BINARY_FRAME_DTYPE = np.dtype([
+    ("timestamp", "<i8"),
+    ("id", "<u2"),
+    ("length", "u1"),
+    ("data", "u1", (8,))
+])
+_BINARY_FRAME_STRUCT = struct.Struct("<qHB8s")
 
 
 class LogFormat(Enum):
@@ -18,7 +34,8 @@ class LogFormat(Enum):
 
 def processLine(line: str, format: LogFormat) -> Message:
     """
-    Processes a line of textual data according to a given format.
+    Processes a line of textual data according to a given format. For binary logs, the
+    line is a single frame record.
     """
     if format == LogFormat.TEXTUAL1:
         return _processTextual1(line)
@@ -32,17 +49,39 @@ def processLine(line: str, format: LogFormat) -> Message:
         raise ValueError("Invalid file format.")
 
 
+def _parseDigits(text: str) -> int:
+    """
+    Parses an unsigned decimal integer, raising a ValueError if there is anything else
+    (ex. a sign or whitespace).
+    """
+    if not (text.isascii() and text.isdigit()):
+        raise ValueError(f"Invalid unsigned integer: {text!r}")
+    return int(text)
+
+
+def _parseBracketedData(text: str, length: int) -> List[int]:
+    """
+    Parses the payload of a TEXTUAL1 line ("[data1,data2,...]"), which must have as many
+    bytes as the length field.
+    """
+    if not (text.startswith("[") and text.endswith("]")):
+        raise ValueError(f"Invalid payload: {text!r}")
+    int_data = [_parseDigits(x) for x in text[1:-1].split(",")]
+    if len(int_data) != length:
+        raise ValueError(f"Payload has {len(int_data)} bytes, expected {length}")
+    return int_data
+
+
 def _processTextual1(line: str) -> Message:
     """
     Processes a line of data in the format "Timestamp id length [data1,data2,...]"
     Example line format: 1679511802367 514 8 [54,0,10,0,0,0,0,0]
     """
     fields = line.strip().split(" ")
-    timestamp = datetime.fromtimestamp(float(fields[0]) / 1000)
-    id = int(fields[1])
-    length = int(fields[2])
-    data = fields[3][1:-1].split(",") # remove commas and brackets at start and end
-    int_data = [int(x) for x in data]
+    timestamp = _parseDigits(fields[0])
+    id = _parseDigits(fields[1])
+    length = _parseDigits(fields[2])
+    int_data = _parseBracketedData(fields[3], length)
     return Message(timestamp, id, int_data)
 
 
@@ -52,11 +91,10 @@ def _processTextual1Legacy(line: str) -> Message:
     Example line format: 2021-01-01T00:00:00.003Z 514 8 [54,0,10,0,0,0,0,0]
     """
     fields = line.strip().split(" ")
-    timestamp = datetime.strptime(fields[0], "%Y-%m-%dT%H:%M:%S.%fZ")
-    id = int(fields[1])
-    length = int(fields[2])
-    data = fields[3][1:-1].split(",") # remove commas and brackets at start and end
-    int_data = [int(x) for x in data]
+    timestamp = parseIsoMillis(fields[0])
+    id = _parseDigits(fields[1])
+    length = _parseDigits(fields[2])
+    int_data = _parseBracketedData(fields[3], length)
     return Message(timestamp, id, int_data)
 
 
@@ -66,14 +104,91 @@ def _processTextual2(line: str) -> Message:
     Example line format: 1659901910.121 514 8 54 0 10 0 0 0 0 0
     """
     fields = line.strip().split(" ")
-    timestamp = datetime.fromtimestamp(float(fields[0]))
+    timestamp = parseEpochMillis(fields[0], 1000)
     id = int(fields[1])
     length = int(fields[2])
     data = [int(x) for x in fields[3:3+length]]
     return Message(timestamp, id, data)
 
 
-def _processBinary(line: str) -> Message:
-    raise RuntimeError("Binary files not currently supported.")
+def _processBinary(record: bytes) -> Message:
+    """
+    Processes a single binary frame record (see BINARY_FRAME_DTYPE).
+    """
+    timestamp, id, length, data = _BINARY_FRAME_STRUCT.unpack(record)
+    if length > 8:
+        raise ValueError("Invalid frame length.")
+    return Message(timestamp, id, data[:length])
 
 
+def readBinary(filepath: str) -> np.ndarray:
+    """
+    Reads a binary log file as an array of frame records, without copying or parsing.
+
+    The file is memory mapped and viewed with the record dtype, so frames are only read
+    from disk as they are accessed. Any trailing partial record is ignored.
+    """
+    with open(filepath, "rb") as file:
+        count = os.fstat(file.fileno()).st_size // BINARY_FRAME_DTYPE.itemsize
+        if count == 0:
+            return np.empty(0, dtype=BINARY_FRAME_DTYPE)
+        # The array keeps a reference to the map, so it stays open after the file closes
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return np.frombuffer(buffer, dtype=BINARY_FRAME_DTYPE, count=count)
+
+
+def writeBinary(filepath: str, frames: np.ndarray) -> None:
+    """
+    Writes an array of frames (with timestamp, id, length and data fields) as a binary
+    log file.
+    """
+    records = np.zeros(frames.size, dtype=BINARY_FRAME_DTYPE)
+    for field in BINARY_FRAME_DTYPE.names:
+        records[field] = frames[field]
+    records.tofile(filepath)
+
+
+def splitByteRanges(filepath: str, chunk_size: int, start: int = 0, end: int = None) -> Iterator[Tuple[int, int]]:
+    """
+    Splits a text log file into (offset, length) byte ranges of roughly the given size,
+    each ending on a line boundary. Only the bytes around each boundary are read.
+    The ranges cover the file from the start offset to the end offset (default: the end
+    of the file), where both are expected to be on line boundaries.
+    """
+    with open(filepath, "rb") as file:
+        size = os.fstat(file.fileno()).st_size if end is None else end
+        offset = start
+        while offset < size:
+            # Extend the range to the end of the line it stops in
+            file.seek(min(offset + chunk_size, size) - 1)
+            file.readline()
+            end = min(file.tell(), size)
+            yield (offset, end - offset)
+            offset = end
+
+
+def findLastLineEnd(filepath: str) -> int:
+    """
+    Finds the offset just after the last newline of a text log file, so a line that is
+    still being written is left out. Only the end of the file is read.
+    """
+    block_size = 1 << 16
+    with open(filepath, "rb") as file:
+        position = os.fstat(file.fileno()).st_size
+        while position > 0:
+            start = max(0, position - block_size)
+            file.seek(start)
+            index = file.read(position - start).rfind(b"\n")
+            if index >= 0:
+                return start + index + 1
+            position = start
+    return 0
+
+
+def readByteRange(filepath: str, offset: int, length: int) -> bytes:
+    """
+    Reads the given byte range of a file.
+    """
+    with open(filepath, "rb") as file:
+        file.seek(offset)
+        return file.read(length)
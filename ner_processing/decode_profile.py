@@ -0,0 +1,129 @@
+"""
+This file specifies the decode profile, which collects per CAN id counters and per stage
+timings while processing logs, to find which messages dominate the processing time.
+
+Profiles are collected separately by each worker and merged, so stage times add up the
+time spent in every worker and can exceed the total (wall clock) processing time.
+"""
+
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .master_mapping import MESSAGE_IDS
+
+STAGES = ("read", "parse", "decode", "format", "write")
+
+
+class IdProfile:
+    """
+    Counters for the frames of a single CAN id.
+    """
+
+    __slots__ = ("frames", "bytes", "errors", "decode_time")
+
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+        self.errors = 0
+        self.decode_time = 0.0
+
+
+class DecodeProfile:
+    """
+    Collects, for each CAN id, the number of frames, bytes parsed, decode errors and
+    decode time, along with the time spent in each processing stage.
+    """
+
+    def __init__(self):
+        self.ids: Dict[int, IdProfile] = {}
+        self.stages: Dict[str, float] = dict.fromkeys(STAGES, 0.0)
+
+    def _getId(self, id: int) -> IdProfile:
+        if id not in self.ids:
+            self.ids[id] = IdProfile()
+        return self.ids[id]
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Times the enclosed code as part of the given stage.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def addDecode(self, id: int, frames: int, errors: int, decode_time: float) -> None:
+        """
+        Records the decoding of a group of frames with the same CAN id.
+        """
+        stats = self._getId(id)
+        stats.frames += frames
+        stats.errors += errors
+        stats.decode_time += decode_time
+
+    def addBytes(self, ids: np.ndarray, sizes: np.ndarray) -> None:
+        """
+        Records the bytes parsed for each frame, given the CAN id and size of each.
+        """
+        unique_ids, inverse = np.unique(ids, return_inverse=True)
+        totals = np.bincount(inverse.reshape(-1), weights=sizes, minlength=unique_ids.size)
+        for id, total in zip(unique_ids.tolist(), totals.tolist()):
+            self._getId(id).bytes += int(total)
+
+    def merge(self, other: "DecodeProfile") -> None:
+        """
+        Adds the counters and timings of another profile to this one.
+        """
+        for id, other_stats in other.ids.items():
+            stats = self._getId(id)
+            stats.frames += other_stats.frames
+            stats.bytes += other_stats.bytes
+            stats.errors += other_stats.errors
+            stats.decode_time += other_stats.decode_time
+        for name, seconds in other.stages.items():
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def toDict(self) -> Dict[str, Any]:
+        """
+        Gets the profile as a JSON serializable dict.
+        """
+        return {
+            "stages": dict(self.stages),
+            "ids": {str(id): {
+                "description": MESSAGE_IDS[id]["description"] if id in MESSAGE_IDS else "unknown",
+                "frames": stats.frames,
+                "bytes": stats.bytes,
+                "errors": stats.errors,
+                "decode_time": stats.decode_time
+            } for id, stats in sorted(self.ids.items())}
+        }
+
+    def formatTable(self) -> str:
+        """
+        Formats the profile as a text table, with CAN ids ordered by decode time.
+        """
+        total_decode = sum(stats.decode_time for stats in self.ids.values()) or 1.0
+        lines = [f"{'CAN ID':>6}  {'Description':<28} {'Frames':>10} {'Bytes':>12} {'Errors':>8} "
+                 f"{'Decode ms':>10} {'us/frame':>9} {'Share':>6}"]
+        for id, stats in sorted(self.ids.items(), key=lambda item: -item[1].decode_time):
+            description = MESSAGE_IDS[id]["description"] if id in MESSAGE_IDS else "unknown"
+            per_frame = 1e6 * stats.decode_time / stats.frames if stats.frames else 0.0
+            lines.append(f"{id:>6}  {description[:28]:<28} {stats.frames:>10} {stats.bytes:>12} "
+                         f"{stats.errors:>8} {1000 * stats.decode_time:>10.2f} {per_frame:>9.3f} "
+                         f"{stats.decode_time / total_decode:>6.1%}")
+        lines.append("")
+        lines.append("Stage times (s): " + ", ".join(
+            f"{name} {seconds:.3f}" for name, seconds in self.stages.items()))
+        return "\n".join(lines)
+
+
+def timeStage(profile: Optional[DecodeProfile], name: str):
+    """
+    Times the enclosed code as part of the given stage of the profile, if there is one.
+    """
+    return profile.stage(name) if profile is not None else nullcontext()
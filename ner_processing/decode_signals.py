@@ -0,0 +1,213 @@
+"""
+This file specifies the declarative signal format for CAN messages, and the compiler that
+turns a message's list of signals into decoders.
+
+Each message gets two decoders, both generated once at import time:
+    - A scalar decoder taking a list of data bytes, which unpacks every field with a
+      single precompiled struct.Struct (when the fields allow it) and applies the scale
+    - A batch decoder taking an (N, length) uint8 array of payloads, which builds each
+      field as an int64 column and applies the same scale expressions
+
+Payloads shorter than the signals are decoded the way the hand-written decoders read
+them: a field cut short is read from the bytes the payload has (none gives 0), and only
+payloads shorter than the message's minimum length are rejected with an IndexError.
+"""
+
+import struct
+from fractions import Fraction
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple, Union
+
+import numpy as np
+
+# Common scale factors (see FormatData)
+TEMPERATURE = Fraction(1, 10)
+LOW_VOLTAGE = Fraction(1, 100)
+TORQUE = Fraction(1, 10)
+HIGH_VOLTAGE = Fraction(1, 10)
+CURRENT = Fraction(1, 10)
+ANGLE = Fraction(1, 10)
+ANGULAR_VELOCITY = -1
+FREQUENCY = Fraction(1, 10)
+POWER = Fraction(1, 10)
+TIMER = 0.003
+FLUX = Fraction(1, 1000)
+
+
+class Signal(NamedTuple):
+    """
+    Describes a single data value packed in a CAN message.
+
+    The value is read from a field of 'size' bytes starting at byte 'start'. If 'bits' is
+    set, only that many bits starting at bit 'bit' of the field are used. The raw value is
+    then scaled and offset: value = offset + raw * scale.
+
+    Scales given as a Fraction are applied as a multiply and a true division, so a scale
+    of Fraction(1, 10) gives exactly the same result as dividing the raw value by 10.
+    """
+    data_id: int
+    start: int
+    size: int = 1
+    big_endian: bool = False
+    signed: bool = False
+    scale: Union[int, float, Fraction] = 1
+    offset: Union[int, float] = 0
+    bit: int = 0
+    bits: int = 0
+
+
+# A field is a whole number of bytes read from the payload: (start, size, big endian, signed)
+_Field = Tuple[int, int, bool, bool]
+
+_STRUCT_CODES = {1: "b", 2: "h", 4: "i", 8: "q"}
+
+
+def _twos(value, bits: int):
+    """
+    Computes the twos complement of the given value (or array of values).
+    """
+    return value - ((value & (1 << (bits - 1))) << 1)
+
+
+def _column(data: np.ndarray, start: int, size: int, big_endian: bool, signed: bool) -> np.ndarray:
+    """
+    Builds an int64 column from the given bytes of each payload row. A field cut short by
+    the payload is read from the bytes it has.
+    """
+    value = np.zeros(data.shape[0], dtype=np.int64)
+    available = max(min(size, data.shape[1] - start), 0)
+    for i in range(available):
+        shift = 8 * (available - 1 - i) if big_endian else 8 * i
+        value |= data[:, start + i].astype(np.int64) << shift
+    return _twos(value, 8 * size) if signed and size < 8 else value
+
+
+def _field(signal: Signal) -> _Field:
+    """
+    Gets the field a signal is read from. Signals using a subset of bits read the field
+    unsigned, and apply the sign to the extracted bits instead.
+    """
+    return (signal.start, signal.size, signal.big_endian, signal.signed and not signal.bits)
+
+
+def _structFormat(fields: List[_Field]) -> str:
+    """
+    Builds a struct format string unpacking all the given fields at once. Returns an empty
+    string if the fields overlap, have mixed byte orders or unsupported sizes.
+    """
+    byte_orders = {big_endian for (_, size, big_endian, _) in fields if size > 1}
+    if len(byte_orders) > 1 or any(size not in _STRUCT_CODES for (_, size, _, _) in fields):
+        return ""
+
+    format = ">" if True in byte_orders else "<"
+    position = 0
+    for start, size, _, signed in fields:
+        if start < position:
+            return ""
+        if start > position:
+            format += f"{start - position}x"
+        code = _STRUCT_CODES[size]
+        format += code if signed else code.upper()
+        position = start + size
+    return format
+
+
+def _expression(signal: Signal, field_name: str) -> str:
+    """
+    Builds the python expression computing the signal value from its field.
+    """
+    expr = field_name
+    if signal.bits:
+        expr = f"(({expr} >> {signal.bit}) & {(1 << signal.bits) - 1})"
+        if signal.signed:
+            expr = f"_twos({expr}, {signal.bits})"
+
+    scale = signal.scale
+    if isinstance(scale, Fraction) and scale.denominator == 1:
+        scale = int(scale)
+    if isinstance(scale, Fraction):
+        if scale.numerator != 1:
+            expr = f"{expr} * {scale.numerator}"
+        expr = f"{expr} / {scale.denominator}"
+    elif scale != 1:
+        expr = f"{expr} * {scale!r}"
+        if isinstance(scale, float) and scale < 0:
+            expr = f"{expr} + 0.0"  # A raw value of 0 gives 0.0 rather than -0.0
+
+    if signal.offset:
+        expr = f"{signal.offset!r} + {expr}"
+    return expr
+
+
+def _compile(source: str, namespace: Dict[str, Any]) -> Callable:
+    """
+    Compiles the source of a single 'decode' function.
+    """
+    namespace = dict(namespace, _twos=_twos)
+    exec(source, namespace)
+    return namespace["decode"]
+
+
+def minLength(signals: List[Signal]) -> int:
+    """
+    Gets the default minimum payload length of a message: its last field must at least
+    start in the payload.
+    """
+    return max(signal.start for signal in signals) + 1
+
+
+def compileDecoder(signals: List[Signal], min_length: int = None) -> Callable[[List[int]], Dict[int, Any]]:
+    """
+    Compiles the given signals into a decoder taking a list of data bytes and returning
+    a dict from data IDs to values. Payloads shorter than min_length (default: see
+    minLength) raise an IndexError.
+    """
+    fields = sorted(set(_field(signal) for signal in signals))
+    names = {field: f"f{i}" for i, field in enumerate(fields)}
+    end = max(start + size for (start, size, _, _) in fields)
+    min_length = minLength(signals) if min_length is None else min_length
+    format = _structFormat(fields)
+
+    namespace = {}
+    lines = ["def decode(data):", "    buf = bytes(data)"]
+    indent = "    "
+    if format:
+        namespace["_struct"] = struct.Struct(format)
+        lines.append(f"    if len(buf) >= {end}:")
+        lines.append(f"        {', '.join(names.values())}, = _struct.unpack_from(buf)")
+        lines.append("    else:")
+        indent = "        "
+    # Fields cut short are read unsigned from the bytes there are, then sign extended
+    lines.append(f"{indent}if len(buf) < {min_length}:")
+    lines.append(f"{indent}    raise IndexError('Message data too short')")
+    for (start, size, big_endian, signed), name in names.items():
+        byte_order = "big" if big_endian else "little"
+        value = f"int.from_bytes(buf[{start}:{start + size}], '{byte_order}')"
+        lines.append(f"{indent}{name} = _twos({value}, {8 * size})" if signed else f"{indent}{name} = {value}")
+    lines.append("    return {")
+    for signal in signals:
+        lines.append(f"        {signal.data_id}: {_expression(signal, names[_field(signal)])},")
+    lines.append("    }")
+    return _compile("\n".join(lines), namespace)
+
+
+def compileBatchDecoder(signals: List[Signal],
+                        min_length: int = None) -> Callable[[np.ndarray], Dict[int, np.ndarray]]:
+    """
+    Compiles the given signals into a decoder taking an (N, length) array of payloads and
+    returning a dict from data IDs to columns of N values. Payloads shorter than
+    min_length (default: see minLength) raise an IndexError.
+    """
+    fields = sorted(set(_field(signal) for signal in signals))
+    names = {field: f"f{i}" for i, field in enumerate(fields)}
+    min_length = minLength(signals) if min_length is None else min_length
+
+    lines = ["def decode(data):"]
+    lines.append(f"    if data.shape[1] < {min_length}:")
+    lines.append("        raise IndexError('Message data too short')")
+    for (start, size, big_endian, signed), name in names.items():
+        lines.append(f"    {name} = _column(data, {start}, {size}, {big_endian}, {signed})")
+    lines.append("    return {")
+    for signal in signals:
+        lines.append(f"        {signal.data_id}: {_expression(signal, names[_field(signal)])},")
+    lines.append("    }")
+    return _compile("\n".join(lines), {"_column": _column})
@@ -1,4 +1,6 @@
-from typing import Any
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
 
 from .data import Data
 
@@ -160,6 +162,13 @@ STATUS_MAP = {
     },
 }
 
+# Status names of each data ID in STATUS_MAP, with the bit index of each as an array, so
+# whole arrays of values can be split into their status bits at once
+_STATUS_BITS: Dict[int, Tuple[List[str], np.ndarray]] = {
+    data_id: (list(bitmap.keys()), np.array(list(bitmap.values()), dtype=np.int64))
+    for data_id, bitmap in STATUS_MAP.items()
+}
+
 
 def getStatus(data_id: int, data_value: Any, name: str) -> int:
     """
@@ -185,4 +194,47 @@ def getStatuses(data_id: int, data_value: Any) -> Any:
     bitmap = STATUS_MAP[data_id]
 
     # Convert each dict value to the bit value at the index
-    return {name:(data_value >> index) & 1 for (name, index) in bitmap.items()}
\ No newline at end of file
+    return {name:(data_value >> index) & 1 for (name, index) in bitmap.items()}
+
+
+def getStatusNames(data_id: int) -> List[str]:
+    """
+    Gets the names of the statuses of the given data ID, in the column order of
+    getStatusMatrix.
+    """
+    if data_id not in STATUS_MAP:
+        raise KeyError("Data ID has no associated status mapping")
+    return list(_STATUS_BITS[data_id][0])
+
+
+def getStatusMatrix(data_id: int, values: np.ndarray) -> np.ndarray:
+    """
+    Gets all the statuses of an array of values of the given data ID (ex. its whole
+    history), as a bool matrix with a row per value and a column per status (see
+    getStatusNames).
+    """
+    if data_id not in STATUS_MAP:
+        raise KeyError("Data ID has no associated status mapping")
+    indices = _STATUS_BITS[data_id][1]
+    values = np.asarray(values).astype(np.int64).reshape(-1, 1)
+    return ((values >> indices) & 1).astype(bool)
+
+
+def getStatusEdges(data_id: int, bits: np.ndarray) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Gets the rising and falling edges of each status of a status matrix (see
+    getStatusMatrix), as the indices of the values where the status turned on and off.
+    The first value is not an edge, whatever its statuses are.
+    """
+    names = getStatusNames(data_id)
+    changes = np.diff(bits.astype(np.int8), axis=0)
+    # Non-zero changes of each status in turn, in value order
+    statuses, rows = np.nonzero(changes.T)
+    rising = changes[rows, statuses] > 0
+    bounds = np.searchsorted(statuses, np.arange(len(names) + 1))
+    edges = {}
+    for column, name in enumerate(names):
+        start, end = bounds[column], bounds[column + 1]
+        status_rows, status_rising = rows[start:end] + 1, rising[start:end]
+        edges[name] = (status_rows[status_rising], status_rows[~status_rising])
+    return edges
@@ -0,0 +1,85 @@
+"""
+This file specifies detection of the format of a log file (see decode_files.LogFormat)
+from a sample of its start, so batches of logs in different formats can be processed
+without choosing the format of each file by hand.
+
+Text logs only hold printable ASCII, so a sample with any other byte is checked as a
+binary log. Otherwise the complete lines of the sample are parsed with the per-line parser
+of each text format, which (unlike the batch parsers) rejects lines laid out for another
+format, and the format that parses the most lines is chosen.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from .compressed import readSample
+from .decode_files import BINARY_FRAME_DTYPE, LogFormat, processLine
+
+DETECT_SAMPLE_BYTES = 1 << 12  # Decompressed bytes read from the start of each file
+TEXT_FORMATS = (LogFormat.TEXTUAL1, LogFormat.TEXTUAL1_LEGACY, LogFormat.TEXTUAL2)
+
+# Bytes that can appear in a text log
+_TEXT_BYTES = np.zeros(256, dtype=bool)
+_TEXT_BYTES[0x20:0x7f] = True
+_TEXT_BYTES[[ord("\t"), ord("\n"), ord("\r")]] = True
+
+
+def detectFormat(filepath: str, default: LogFormat = LogFormat.TEXTUAL1) -> LogFormat:
+    """
+    Detects the format of a log file from a sample of its start (decompressed, for a
+    compressed file). Empty files are given the default format.
+    Raises a ValueError if the sample does not match any format.
+    """
+    sample = readSample(filepath, DETECT_SAMPLE_BYTES)
+    if not sample:
+        return default
+    format = detectSampleFormat(sample)
+    if format is None:
+        raise ValueError(f"Could not detect the format of {filepath}.")
+    return format
+
+
+def detectSampleFormat(sample: bytes) -> Optional[LogFormat]:
+    """
+    Detects the format of a sample from the start of a log, or gives None if it does not
+    match any format. Most of the lines of a text sample must parse in the format found.
+    """
+    raw = np.frombuffer(sample, dtype=np.uint8)
+    if not _TEXT_BYTES[raw].all():
+        return LogFormat.BINARY if _isBinarySample(raw) else None
+
+    lines = [line for line in sample.decode("ascii").splitlines(keepends=True) if line.strip()]
+    if len(lines) > 1 and not lines[-1].endswith("\n"):
+        lines.pop()  # The sample ends part way through its last line
+    best_format, best_count = None, 0
+    for format in TEXT_FORMATS:
+        count = sum(_parsesAs(line, format) for line in lines)
+        if count > best_count:
+            best_format, best_count = format, count
+    if 2 * best_count < len(lines):
+        return None
+    return best_format
+
+
+def _isBinarySample(raw: np.ndarray) -> bool:
+    """
+    Checks if a sample is made of binary frame records (see BINARY_FRAME_DTYPE), from the
+    length field of each record.
+    """
+    count = raw.size // BINARY_FRAME_DTYPE.itemsize
+    if count == 0:
+        return False
+    records = np.frombuffer(raw[:count * BINARY_FRAME_DTYPE.itemsize].tobytes(), dtype=BINARY_FRAME_DTYPE)
+    return bool(np.all(records["length"] <= 8))
+
+
+def _parsesAs(line: str, format: LogFormat) -> bool:
+    """
+    Checks if a line parses as a valid frame in the given text format.
+    """
+    try:
+        message = processLine(line, format)
+    except (ValueError, TypeError, IndexError, OverflowError):
+        return False
+    return 0 <= message.id < 2 ** 16 and len(message.data) <= 8
@@ -0,0 +1,176 @@
+"""
+This file specifies the output formats for processed data, and a writer for each format.
+
+Columnar outputs store int64 timestamps (ms since epoch) and typed values, instead of
+formatted strings, along with the names and units of each data ID (see DATA_IDS).
+"""
+
+import csv
+import json
+import os
+from enum import Enum
+from typing import Dict, List
+
+import numpy as np
+
+from .decode_batch import SignalColumns
+from .master_mapping import DATA_IDS
+
+
+class OutputFormat(Enum):
+    CSV = "csv"
+    NPZ = "npz"
+    PARQUET = "parquet"
+
+
+def getMetadata(data_ids: List[int]) -> Dict[str, Dict[str, str]]:
+    """
+    Gets the name and units of each of the given data IDs, keyed by the ID as a string.
+    """
+    return {str(id): {"name": DATA_IDS[id]["name"], "units": DATA_IDS[id]["units"]}
+            for id in sorted(data_ids)}
+
+
+class CSVWriter:
+    """
+    Writes data to a long format CSV file, with one row per data point. Rows are
+    formatted by the workers (see thread.format_csv), so they are written as given.
+
+    If appending, rows are added to the end of an existing file and no header is written.
+    """
+
+    HEADER = ["time", "data_id", "description", "value"]
+
+    def __init__(self, path: str, append: bool = False):
+        if append:
+            self._file = open(path, "a", encoding="UTF8", newline="")
+        else:
+            self._file = open(path, "w", encoding="UTF8", newline="")
+            csv.writer(self._file).writerow(self.HEADER)
+
+    def write(self, rows: str) -> None:
+        """
+        Adds the given CSV rows to the output.
+        """
+        self._file.write(rows)
+
+    def getSize(self) -> int:
+        """
+        Flushes the output and gets the size of the file in bytes.
+        """
+        self._file.flush()
+        return os.fstat(self._file.fileno()).st_size
+
+    def close(self) -> None:
+        """
+        Closes the file.
+        """
+        self._file.close()
+
+
+class NPZWriter:
+    """
+    Writes data to a compressed numpy archive, with one pair of arrays per data ID:
+        - '<id>_time' : int64 timestamps in ms since epoch
+        - '<id>_value' : values, typed by the data (int, float or str)
+    The 'metadata' entry holds a JSON string of the names and units of each data ID.
+
+    Columns are collected as they are written and saved when the writer is closed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._times: Dict[int, List[np.ndarray]] = {}
+        self._values: Dict[int, List[np.ndarray]] = {}
+
+    def write(self, columns: SignalColumns) -> None:
+        """
+        Adds the given columns to the output.
+        """
+        for data_id, (times, values) in columns.items():
+            self._times.setdefault(data_id, []).append(times)
+            self._values.setdefault(data_id, []).append(values)
+
+    def close(self) -> None:
+        """
+        Writes the archive.
+        """
+        arrays = {}
+        for data_id in self._times:
+            arrays[f"{data_id}_time"] = np.concatenate(self._times[data_id])
+            arrays[f"{data_id}_value"] = np.concatenate(self._values[data_id])
+        arrays["metadata"] = np.array(json.dumps(getMetadata(list(self._times))))
+        np.savez_compressed(self.path, **arrays)
+
+
+class ParquetWriter:
+    """
+    Writes data to a Parquet file, one row group per write, with the columns:
+        - 'time' : int64 timestamps in ms since epoch
+        - 'data_id' : uint16 data IDs
+        - 'value' : float64 values (null for non-numeric data)
+        - 'text' : string values (null for numeric data)
+    The names and units of each data ID are stored in the schema metadata under 'data_ids'.
+
+    Requires the optional pyarrow package.
+    """
+
+    def __init__(self, path: str):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)")
+        self._pa = pyarrow
+        self._schema = pyarrow.schema([
+            ("time", pyarrow.int64()),
+            ("data_id", pyarrow.uint16()),
+            ("value", pyarrow.float64()),
+            ("text", pyarrow.string()),
+        ], metadata={"data_ids": json.dumps(getMetadata(list(DATA_IDS)))})
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+
+    def write(self, columns: SignalColumns) -> None:
+        """
+        Adds the given columns to the output as a row group.
+        """
+        if not columns:
+            return
+        pa = self._pa
+        times, ids, values, texts = [], [], [], []
+        for data_id, (column_times, column_values) in columns.items():
+            times.append(pa.array(column_times, pa.int64()))
+            ids.append(pa.array(np.full(column_times.size, data_id, dtype=np.uint16)))
+            if column_values.dtype.kind in "biuf":
+                values.append(pa.array(column_values.astype(np.float64)))
+                texts.append(pa.nulls(column_values.size, pa.string()))
+            else:
+                values.append(pa.nulls(column_values.size, pa.float64()))
+                texts.append(pa.array(column_values.astype(str), pa.string()))
+        table = pa.Table.from_arrays([
+            pa.concat_arrays(times),
+            pa.concat_arrays(ids),
+            pa.concat_arrays(values),
+            pa.concat_arrays(texts)
+        ], schema=self._schema)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        """
+        Finishes writing the file.
+        """
+        self._writer.close()
+
+
+def createWriter(path: str, format: OutputFormat):
+    """
+    Creates a writer of the given output format.
+    """
+    if format == OutputFormat.CSV:
+        return CSVWriter(path)
+    elif format == OutputFormat.NPZ:
+        return NPZWriter(path)
+    elif format == OutputFormat.PARQUET:
+        return ParquetWriter(path)
+    else:
+        raise ValueError("Invalid output format.")
@@ -0,0 +1,143 @@
+"""
+This file specifies the frame filter, which selects the frames of a log by CAN id, data id
+and time window before they are decoded.
+
+Filters are pushed down into the parsers: text lines are rejected from their id and
+timestamp fields alone, before the payload is split or any decoder is called, and binary
+frames are rejected from their id and timestamp columns. Data ids are mapped back to the
+CAN messages that produce them, so only those messages are decoded, and only the requested
+data ids are kept from them.
+"""
+
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from .master_mapping import MESSAGE_IDS
+
+# Longest decimal field that can be read into an int64 without overflowing
+_MAX_DIGITS = 18
+
+
+def getMessageIds(data_ids: Iterable[int]) -> np.ndarray:
+    """
+    Gets the ids of all the CAN messages that produce any of the given data ids.
+    """
+    data_ids = set(data_ids)
+    return np.array(sorted(id for id, message in MESSAGE_IDS.items()
+                           if data_ids.intersection(message["data_ids"])), dtype=np.int64)
+
+
+class FrameFilter:
+    """
+    Selects frames by CAN id, data id and time window (see time_index.TimeWindow). Any
+    selection left as None matches everything, and data from a frame is kept if either
+    its CAN id or its data id was selected.
+    """
+
+    def __init__(self, can_ids: Optional[Iterable[int]] = None, data_ids: Optional[Iterable[int]] = None,
+                 window: Optional[Tuple[int, int]] = None):
+        self.can_ids = None if can_ids is None else np.unique(np.array(list(can_ids), dtype=np.int64))
+        self.data_ids = None if data_ids is None else np.unique(np.array(list(data_ids), dtype=np.int64))
+        self.window = window
+
+        # The CAN ids whose frames are decoded at all
+        if self.can_ids is None and self.data_ids is None:
+            self.message_ids = None
+        else:
+            message_ids = [np.empty(0, dtype=np.int64)]
+            if self.can_ids is not None:
+                message_ids.append(self.can_ids)
+            if self.data_ids is not None:
+                message_ids.append(getMessageIds(self.data_ids.tolist()))
+            self.message_ids = np.unique(np.concatenate(message_ids))
+
+    def matches(self, ids: np.ndarray, timestamps: np.ndarray) -> np.ndarray:
+        """
+        Gets a mask of the frames with the given CAN ids and timestamps that pass the filter.
+        """
+        mask = np.ones(ids.shape, dtype=bool)
+        if self.message_ids is not None:
+            mask &= np.isin(ids, self.message_ids)
+        if self.window is not None:
+            start, end = self.window
+            mask &= (timestamps >= start) & (timestamps < end)
+        return mask
+
+    def matchesId(self, id: int) -> bool:
+        """
+        Checks if frames with the given CAN id are decoded at all.
+        """
+        return self.message_ids is None or bool(np.isin(id, self.message_ids))
+
+    def selectRows(self, frames: np.ndarray) -> np.ndarray:
+        """
+        Gets the indices of the frames (see decode_batch.FRAME_DTYPE) that pass the filter.
+        """
+        if self.message_ids is None and self.window is None:
+            return np.arange(frames.size)
+        return np.flatnonzero(self.matches(frames["id"], frames["timestamp"]))
+
+    def selectColumns(self, frames: np.ndarray, columns):
+        """
+        Drops the decoded data (see decode_batch.DecodedColumns) of data ids that were not
+        selected, from frames that were only decoded for the other data ids they produce.
+        """
+        if self.data_ids is None:
+            return columns
+        selected = {}
+        for data_id, (rows, position, values) in columns.items():
+            if np.isin(data_id, self.data_ids):
+                selected[data_id] = (rows, position, values)
+            elif self.can_ids is not None:
+                keep = np.isin(frames["id"][rows], self.can_ids)
+                if keep.any():
+                    selected[data_id] = (rows[keep], position, values[keep])
+        return selected
+
+    def selectTextual1(self, raw: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Gets the TEXTUAL1 lines of a buffer (as a uint8 array of whole lines) that pass the
+        filter, reading only the timestamp and id fields of each line. Lines without both
+        fields are kept, so the parser still counts them as errors.
+        Returns the selected lines, with the offset in the buffer of the start of each
+        (None if every line was selected).
+        """
+        if self.message_ids is None and self.window is None:
+            return raw, None
+        is_digit = (raw >= ord("0")) & (raw <= ord("9"))
+        edges = np.diff(is_digit.view(np.int8), prepend=np.int8(0), append=np.int8(0))
+        token_starts = np.flatnonzero(edges == 1)
+        token_ends = np.flatnonzero(edges == -1)
+
+        # Find the first two tokens of each line
+        line_ends = np.flatnonzero(raw == ord("\n"))
+        line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+        first = np.searchsorted(token_starts, line_starts)
+        line_tokens = np.searchsorted(token_starts, line_ends) - first
+        lines = np.flatnonzero(line_tokens >= 2)
+        time_starts, time_ends = token_starts[first[lines]], token_ends[first[lines]]
+        id_starts, id_ends = token_starts[first[lines] + 1], token_ends[first[lines] + 1]
+        readable = (time_ends - time_starts <= _MAX_DIGITS) & (id_ends - id_starts <= _MAX_DIGITS)
+        lines = lines[readable]
+        timestamps = _readDigits(raw, time_starts[readable], time_ends[readable])
+        ids = _readDigits(raw, id_starts[readable], id_ends[readable])
+
+        keep = np.ones(line_ends.size, dtype=bool)
+        keep[lines] = self.matches(ids, timestamps)
+        if keep.all():
+            return raw, None
+        line_sizes = line_ends - line_starts + 1
+        return raw[np.repeat(keep, line_sizes)], line_starts[keep]
+
+
+def _readDigits(raw: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    Reads the decimal fields at the given positions of a buffer, without a per-field loop.
+    """
+    values = np.zeros(starts.size, dtype=np.int64)
+    widths = ends - starts
+    for i in range(int(widths.max()) if widths.size else 0):
+        has_digit = widths > i
+        values[has_digit] = values[has_digit] * 10 + (raw[starts[has_digit] + i] - ord("0"))
+    return values
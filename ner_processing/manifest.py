@@ -0,0 +1,114 @@
+"""
+This file specifies the processing manifest, which records how far each log file has been
+processed into an output file so that later runs only process newly appended data.
+
+The manifest is a JSON file stored next to the output. For each input file it holds the
+file identity (size, mtime and a hash of the first bytes) seen when it was last processed,
+and the byte offset up to which it has been written to the output. It also holds the size
+of the output at that point, so a run that was interrupted part way through a chunk can
+drop the partial rows and resume from the last committed chunk.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List
+
+MANIFEST_SUFFIX = ".manifest.json"  # Appended to the path of an output to get its manifest
+
+# Number of bytes at the start of a file used to recognize it
+HEAD_HASH_BYTES = 4096
+
+
+def getFileIdentity(filepath: str, head_size: int = HEAD_HASH_BYTES) -> Dict[str, Any]:
+    """
+    Gets the size, mtime and head hash of a file. The head hash covers the first
+    'head_size' bytes (or the whole file if it is smaller).
+    """
+    stat = os.stat(filepath)
+    with open(filepath, "rb") as file:
+        head = file.read(head_size)
+    return {
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "head_size": len(head),
+        "head_hash": hashlib.sha1(head).hexdigest()
+    }
+
+
+class Manifest:
+    """
+    Records the processing state of a set of log files for a single output file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.output_size = 0
+        self.files: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def load(path: str) -> "Manifest":
+        """
+        Loads the manifest at the given path. Returns an empty manifest if there is none
+        or it cannot be read.
+        """
+        manifest = Manifest(path)
+        try:
+            with open(path) as file:
+                contents = json.load(file)
+            manifest.output_size = int(contents["output_size"])
+            manifest.files = dict(contents["files"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return Manifest(path)
+        return manifest
+
+    def save(self) -> None:
+        """
+        Writes the manifest, replacing the previous one in a single step so an interrupted
+        write never leaves a partial manifest.
+        """
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump({"output_size": self.output_size, "files": self.files}, file, indent=2)
+        os.replace(temp_path, self.path)
+
+    def _key(self, filepath: str) -> str:
+        return os.path.abspath(filepath)
+
+    def isUnchanged(self, filepath: str) -> bool:
+        """
+        Checks if the given file still starts with the same bytes as when it was last
+        processed, and has not shrunk. Files not in the manifest count as unchanged.
+        """
+        entry = self.files.get(self._key(filepath))
+        if entry is None:
+            return True
+        identity = getFileIdentity(filepath, entry["head_size"])
+        return identity["head_hash"] == entry["head_hash"] and identity["size"] >= entry["offset"]
+
+    def canResume(self, filepaths: List[str], output_path: str) -> bool:
+        """
+        Checks if the output can be appended to: it must hold at least the committed
+        output, and none of the given files can have been rewritten since.
+        """
+        if not os.path.exists(output_path) or os.path.getsize(output_path) < self.output_size:
+            return False
+        return all(self.isUnchanged(fp) for fp in filepaths)
+
+    def getOffset(self, filepath: str) -> int:
+        """
+        Gets the byte offset up to which the given file has been processed.
+        """
+        entry = self.files.get(self._key(filepath))
+        return 0 if entry is None else entry["offset"]
+
+    def commit(self, filepath: str, offset: int, output_size: int) -> None:
+        """
+        Records that the given file has been processed up to the given offset, and the
+        output has been written up to the given size, then saves the manifest.
+        """
+        entry = getFileIdentity(filepath)
+        entry["offset"] = offset
+        self.files[self._key(filepath)] = entry
+        self.output_size = output_size
+        self.save()
@@ -2,39 +2,84 @@
 This file specifes the CAN and data ID mappings. IDS:
     - External Message ID (actual CAN message id)
     - Data ID (id for individual data values contained in the messages)
+
+Messages are described by a list of signals (see decode_signals), which are compiled into
+the message's decoders when this module is imported. Shorter payloads are accepted down
+to the message's "min_length" (by default, enough bytes to start its last signal). Messages that cannot be described
+this way specify a hand-written decoder instead (see decode_data).
 """
 
+from fractions import Fraction
+
 from .decode_data import *
+from .decode_signals import *
 
 # Mapping from external message ID to decoding information
 MESSAGE_IDS = {
     1: {
         "description": "accumulator status",
-        "decoder": decodeAccumulatorStatus
+        "signals": [
+            Signal(1, 0, 2, big_endian=True),
+            Signal(2, 2, 2, big_endian=True, signed=True, scale=CURRENT),
+            Signal(3, 4, 2, big_endian=True),
+            Signal(4, 6),
+            Signal(5, 7)
+        ]
     },
     2: {
         "description": "BMS status",
-        "decoder": decodeBMSStatus
+        "signals": [
+            Signal(106, 0),
+            Signal(107, 1, 4),
+            Signal(10, 5, signed=True),
+            Signal(11, 6, signed=True)
+        ]
     },
     3: {
         "description": "shutdown control",
-        "decoder": decode3
+        "signals": [
+            Signal(12, 0)
+        ]
     },
     4: {
         "description": "cell data",
-        "decoder": decodeCellVoltages
+        "min_length": 6,
+        "signals": [
+            Signal(13, 0, 2, big_endian=True),
+            Signal(121, 2, bits=4),
+            Signal(122, 2, bit=4, bits=4),
+            Signal(15, 3, 2, big_endian=True),
+            Signal(123, 5, bits=4),
+            Signal(124, 5, bit=4, bits=4),
+            Signal(17, 6, 2, big_endian=True)
+        ]
     },
     160: {
         "description": "temperatures (igbt modules, gate driver board)",
-        "decoder": decode5
+        "signals": [
+            Signal(18, 0, 2, signed=True, scale=TEMPERATURE),
+            Signal(19, 2, 2, signed=True, scale=TEMPERATURE),
+            Signal(20, 4, 2, signed=True, scale=TEMPERATURE),
+            Signal(21, 6, 2, signed=True, scale=TEMPERATURE)
+        ]
     },
     161: {
         "description": "temperatures (control board)",
-        "decoder": decode6,
+        "signals": [
+            Signal(22, 0, 2, signed=True, scale=TEMPERATURE),
+            Signal(23, 2, 2, signed=True, scale=TEMPERATURE),
+            Signal(24, 4, 2, signed=True, scale=TEMPERATURE),
+            Signal(25, 6, 2, signed=True, scale=TEMPERATURE)
+        ],
     },
     162: {
         "description": "temperatures (motor)",
-        "decoder": decode7,
+        "signals": [
+            Signal(26, 0, 2, signed=True, scale=TEMPERATURE),
+            Signal(27, 2, 2, signed=True, scale=TEMPERATURE),
+            Signal(28, 4, 2, signed=True, scale=TEMPERATURE),
+            Signal(29, 6, 2, signed=True, scale=TORQUE)
+        ],
     },
     163: {
         "description": "analog input voltages",
@@ -42,55 +87,133 @@ MESSAGE_IDS = {
     },
     164: {
         "description": "digital input status",
-        "decoder": decode9,
+        "signals": [
+            Signal(36, 0),
+            Signal(37, 1),
+            Signal(38, 2),
+            Signal(39, 3),
+            Signal(40, 4),
+            Signal(41, 5),
+            Signal(42, 6),
+            Signal(43, 7)
+        ],
     },
     165: {
         "description": "motor position information",
-        "decoder": decode10,
+        "signals": [
+            Signal(44, 0, 2, signed=True, scale=ANGLE),
+            Signal(45, 2, 2, signed=True, scale=ANGULAR_VELOCITY),
+            Signal(46, 4, 2, signed=True, scale=FREQUENCY),
+            Signal(47, 6, 2, signed=True, scale=ANGLE),
+            Signal(101, 2, 2, signed=True, scale=ANGULAR_VELOCITY * 0.013048225)
+        ],
     },
     166: {
         "description": "current information",
-        "decoder": decode11,
+        "signals": [
+            Signal(48, 0, 2, signed=True, scale=CURRENT),
+            Signal(49, 2, 2, signed=True, scale=CURRENT),
+            Signal(50, 4, 2, signed=True, scale=CURRENT),
+            Signal(51, 6, 2, signed=True, scale=CURRENT)
+        ],
     },
     167: {
         "description": "voltage information",
-        "decoder": decode12,
+        "signals": [
+            Signal(52, 0, 2, signed=True, scale=HIGH_VOLTAGE),
+            Signal(53, 2, 2, signed=True, scale=HIGH_VOLTAGE),
+            Signal(54, 4, 2, signed=True, scale=HIGH_VOLTAGE),
+            Signal(55, 6, 2, signed=True, scale=HIGH_VOLTAGE)
+        ],
     },
     168: {
         "description": "flux information",
-        "decoder": decode13,
+        "signals": [
+            Signal(56, 0, 2, signed=True, scale=FLUX),
+            Signal(57, 2, 2, signed=True, scale=FLUX),
+            Signal(58, 4, 2, signed=True, scale=CURRENT),
+            Signal(59, 6, 2, signed=True, scale=CURRENT)
+        ],
     },
     169: {
         "description": "internal voltages",
-        "decoder": decode14,
+        "signals": [
+            Signal(60, 0, 2, signed=True, scale=LOW_VOLTAGE),
+            Signal(61, 2, 2, signed=True, scale=LOW_VOLTAGE),
+            Signal(62, 4, 2, signed=True, scale=LOW_VOLTAGE),
+            Signal(63, 6, 2, signed=True, scale=LOW_VOLTAGE)
+        ],
     },
     170: {
         "description": "internal states",
-        "decoder": decode15,
+        "signals": [
+            Signal(64, 0, 2),
+            Signal(65, 2),
+            Signal(66, 3),
+            Signal(67, 4, bits=1),
+            Signal(68, 4, bit=5, bits=3),
+            Signal(69, 5, bits=1),
+            Signal(70, 6, bits=1),
+            Signal(71, 6, bit=7, bits=1),
+            Signal(72, 7, bits=1),
+            Signal(73, 7, bit=1, bits=1),
+            Signal(74, 7, bit=2, bits=1)
+        ],
     },
     171: {
         "description": "fault codes",
-        "decoder": decode16,
+        "signals": [
+            Signal(75, 0, 2),
+            Signal(76, 2, 2),
+            Signal(77, 4, 2),
+            Signal(78, 6, 2)
+        ],
     },
     172: {
         "description": "torque and timer",
-        "decoder": decode17,
+        "min_length": 3,
+        "signals": [
+            Signal(79, 0, 2, signed=True, scale=TORQUE),
+            Signal(80, 2, 2, signed=True, scale=TORQUE),
+            Signal(81, 4, 4, scale=TIMER)
+        ],
     },
     192: {
         "description": "commanded data",
-        "decoder": decode18,
+        "signals": [
+            Signal(82, 0, 2, signed=True, scale=TORQUE),
+            Signal(83, 2, 2, signed=True, scale=ANGULAR_VELOCITY),
+            Signal(84, 4),
+            Signal(85, 5, bits=1),
+            Signal(86, 5, bit=1, bits=1),
+            Signal(87, 5, bit=2, bits=1),
+            Signal(88, 6, 2, signed=True, scale=TORQUE)
+        ],
     },
     514: {
         "description": "current limits",
-        "decoder": decode19,
+        "min_length": 0,
+        "signals": [
+            Signal(89, 0, 2),
+            Signal(90, 2, 2)
+        ],
     },
     768: {
         "description": "nerduino accelerometer",
-        "decoder": decode20,
+        "signals": [
+            Signal(91, 0, 2, signed=True),
+            Signal(92, 2, 2, signed=True),
+            Signal(93, 4, 2, signed=True)
+        ],
     },
     769: {
         "description": "nerduino humidity",
-        "decoder": decode21,
+        "min_length": 0,
+        "signals": [
+            Signal(94, 0, 2, scale=Fraction(175, 65535), offset=-45),
+            Signal(95, 0, 2, scale=Fraction(315, 65535), offset=-49),
+            Signal(96, 2, 2, scale=Fraction(100, 65535))
+        ],
     },
     7: {
         "description": "cell voltages",
@@ -122,7 +245,10 @@ MESSAGE_IDS = {
     },
     770: {
         "description": "GLV current",
-        "decoder": decode29,
+        "min_length": 0,
+        "signals": [
+            Signal(98, 0, 4, signed=True, scale=Fraction(1, 1000000))
+        ],
     },
     2015: {
         "description": "unknown 2015",
@@ -138,39 +264,77 @@ MESSAGE_IDS = {
     },
     771: {
         "description": "strain gauge",
-        "decoder": decode34,
+        "min_length": 0,
+        "signals": [
+            Signal(99, 0, 4, signed=True, scale=Fraction(1, 1000000)),
+            Signal(100, 4, 4, signed=True, scale=Fraction(1, 1000000))
+        ],
     },
     1024: {
         "description": "wheel state",
-        "decoder": decode35,
+        "signals": [
+            Signal(102, 0, 2, big_endian=True),
+            Signal(103, 2, 2, big_endian=True),
+            Signal(104, 4)
+        ],
     },
     10: {
         "description": "MPU States",
-        "decoder": decodeMPUDashboardInfo,
+        "signals": [
+            Signal(105, 0)
+        ],
     },
     772: {
         "description": "GPS Data 1",
-        "decoder": decodeGPS1,
+        "min_length": 0,
+        "signals": [
+            Signal(108, 0, 4, signed=True, scale=Fraction(1, 10000000)),
+            Signal(109, 4, 4, signed=True, scale=Fraction(1, 10000000))
+        ],
     },
     773: {
         "description": "GPS Data 2",
-        "decoder": decodeGPS2,
+        "min_length": 0,
+        "signals": [
+            Signal(110, 0, 4, signed=True),
+            Signal(111, 4, 4, signed=True, scale=Fraction(1, 1000))
+        ],
     },
     774: {
         "description": "GPS Data 3",
-        "decoder": decodeGPS3,
+        "min_length": 0,
+        "signals": [
+            Signal(112, 0, 4, signed=True, scale=Fraction(1, 1000)),
+            Signal(113, 4, 4, signed=True, scale=Fraction(1, 100000))
+        ],
     },
     8: {
         "description": "Cell Temperatures",
-        "decoder": decodeCellTemps,
+        "min_length": 6,
+        "signals": [
+            Signal(114, 0, 2, big_endian=True),
+            Signal(115, 2, bits=4),
+            Signal(116, 2, bit=4, bits=4),
+            Signal(117, 3, 2, big_endian=True),
+            Signal(118, 5, bits=4),
+            Signal(119, 5, bit=4, bits=4),
+            Signal(120, 6, 2, big_endian=True)
+        ],
     },
     9: {
         "description": "Segment Temperatures",
-        "decoder": decodeSegmentTemps,
+        "signals": [
+            Signal(125, 0, signed=True),
+            Signal(126, 1, signed=True),
+            Signal(127, 2, signed=True),
+            Signal(128, 3, signed=True)
+        ],
     },
     775: {
         "description": "Logging Status",
-        "decoder": decodeLoggingStatus,
+        "signals": [
+            Signal(129, 0)
+        ],
     },
     177: {
         "description": "unknown 177",
@@ -178,6 +342,17 @@ MESSAGE_IDS = {
     }
 }
 
+# Compile the decoders for messages described by signals, and list the data ids each
+# message produces (hand-written decoders always produce the same ids, so an empty
+# payload is decoded to find them)
+for message in MESSAGE_IDS.values():
+    if "signals" in message:
+        message["decoder"] = compileDecoder(message["signals"], message.get("min_length"))
+        message["batch_decoder"] = compileBatchDecoder(message["signals"], message.get("min_length"))
+        message["data_ids"] = [signal.data_id for signal in message["signals"]]
+    else:
+        message["data_ids"] = list(message["decoder"]([0] * 8))
+
 # Mapping from data ids to their description (potentially add format information)
 DATA_IDS = {
     0: {
@@ -0,0 +1,110 @@
+"""
+This file specifies the streaming k-way merge of processed chunks from several log files
+into a single time ordered output.
+
+Each file gives a stream of chunks in file order, and each chunk holds its rows sorted by
+timestamp, as either formatted CSV rows or a DataBatch. Only the current chunk of each
+file is held at once: a heap ordered by the last timestamp of each held chunk gives the
+latest time up to which every file has been seen, and all held rows up to that time are
+merged and written before the next chunk of the exhausted file is taken.
+
+Files are expected to be in time order (as loggers write them). Rows that go back in time
+across chunks of a file are still written, just not in global time order.
+"""
+
+import heapq
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .data import DataBatch
+
+# Rows of a chunk: formatted CSV rows (an object array of strings) or a DataBatch
+MergeRows = Union[np.ndarray, DataBatch]
+
+# A chunk of rows, with the timestamp of each row (ms since epoch) in sorted order
+MergeChunk = Tuple[np.ndarray, MergeRows]
+
+
+def sortChunk(times: np.ndarray, rows: MergeRows) -> MergeChunk:
+    """
+    Sorts the rows of a chunk by timestamp, keeping the order of rows with equal times.
+    """
+    order = np.argsort(times, kind="stable")
+    return times[order], _take(rows, order)
+
+
+def _take(rows: MergeRows, indices) -> MergeRows:
+    if isinstance(rows, DataBatch):
+        return rows.select(indices)
+    return rows[indices]
+
+
+def _concatenate(parts: List[MergeRows]) -> MergeRows:
+    if isinstance(parts[0], DataBatch):
+        return DataBatch.concatenate(parts)
+    return np.concatenate(parts)
+
+
+def mergeChunks(streams: List[Iterator[MergeChunk]]) -> Iterator[MergeChunk]:
+    """
+    Merges streams of time sorted chunks into a single stream of time sorted chunks.
+    Streams are only read as their rows are needed, so at most one chunk of each is held
+    at once.
+    """
+    held: List[Optional[MergeChunk]] = [None] * len(streams)
+    heap: List[Tuple[int, int]] = []  # (last time of the held chunk, stream index)
+
+    def take(index: int) -> None:
+        for times, rows in streams[index]:
+            if times.size > 0:
+                held[index] = (times, rows)
+                heapq.heappush(heap, (int(times[-1]), index))
+                return
+        held[index] = None
+
+    for index in range(len(streams)):
+        take(index)
+
+    while heap:
+        # No stream can give a row before the end of its held chunk, so every held row up
+        # to the earliest such end is final
+        bound = heap[0][0]
+        times_parts, rows_parts = [], []
+        for index, chunk in enumerate(held):
+            if chunk is None:
+                continue
+            times, rows = chunk
+            cut = int(np.searchsorted(times, bound, side="right"))
+            if cut == 0:
+                continue
+            times_parts.append(times[:cut])
+            rows_parts.append(_take(rows, slice(0, cut)))
+            held[index] = (times[cut:], _take(rows, slice(cut, None)))
+
+        if len(times_parts) == 1:
+            yield times_parts[0], rows_parts[0]
+        else:
+            yield sortChunk(np.concatenate(times_parts), _concatenate(rows_parts))
+
+        while heap and held[heap[0][1]][0].size == 0:
+            _, index = heapq.heappop(heap)
+            take(index)
+
+
+def batchToSignalColumns(batch: DataBatch) -> Dict[int, Tuple[np.ndarray, Any]]:
+    """
+    Splits a batch into the timestamp and value arrays of each data ID (see
+    decode_batch.SignalColumns), with integer values restored as ints.
+    """
+    columns = {}
+    for data_id in np.unique(batch.ids).tolist():
+        selected = batch.select(batch.ids == data_id)
+        if selected.values.dtype == object:
+            values = np.array(selected.values.tolist())
+        elif selected.integral.all():
+            values = selected.values.astype(np.int64)
+        else:
+            values = selected.values
+        columns[data_id] = (selected.times, values)
+    return columns
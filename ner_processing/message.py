@@ -1,7 +1,8 @@
-from typing import List, Dict, Any
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple, Union
 from datetime import datetime
 
-from .data import Data
+from .data import Data, fromEpochMillis, toEpochMillis
 from .master_mapping import MESSAGE_IDS
 
 
@@ -14,36 +15,112 @@ class MessageFormatException(Exception):
         self.message = message
 
 
+class DecodeCache:
+    """
+    A bounded cache of decoded message data, keyed on the CAN id and payload bytes.
+
+    Logs are highly repetitive (ex. status messages send the same payload frame after
+    frame), so a hit skips the decoder entirely and only the timestamp is applied. The
+    least recently used payload is evicted once the cache is full.
+    """
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Tuple[int, bytes], Dict[int, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def decode(self, id: int, data: bytes) -> Dict[int, Any]:
+        """
+        Gets the decoded data for the given message fields, decoding them on a miss.
+        Raises a MessageFormatException if the data cannot be decoded (which is not cached).
+        """
+        key = (id, data)
+        decoded = self._entries.get(key)
+        if decoded is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return decoded
+
+        self.misses += 1
+        decoded = Message.decodeFields(id, data)
+        self._entries[key] = decoded
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return decoded
+
+    def getHitRate(self) -> float:
+        """
+        Gets the fraction of lookups that were hits.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self) -> None:
+        """
+        Removes all entries and resets the counters.
+        """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
 class Message:
     """
     Wrapper class for an individual message.
+
+    Uses slots and stores the timestamp as an int in ms since epoch and the data as bytes,
+    since millions of these can be created and sent between processes.
     """
 
-    def __init__(self, timestamp: datetime, id: int, data: List[int]):
-        self.timestamp = timestamp
+    __slots__ = ("time", "id", "data")
+
+    def __init__(self, timestamp: Union[datetime, int], id: int, data: Union[bytes, List[int]]):
+        self.time = toEpochMillis(timestamp)
         self.id = id
-        self.data = data
+        self.data = bytes(data)
+
+    @property
+    def timestamp(self) -> datetime:
+        """
+        Gets the timestamp of the message as a datetime.
+        """
+        return fromEpochMillis(self.time)
 
     def __str__(self):
         """
         Overrides the string representation of the class.
         """
-        return f"[{self.timestamp.strftime('%Y-%m-%dT%H:%M:%S.%fZ')}] {self.id} - {self.data}"
+        return f"[{self.timestamp.strftime('%Y-%m-%dT%H:%M:%S.%fZ')}] {self.id} - {list(self.data)}"
 
-    def decode(self) -> List[Data]:
+    def decode(self, cache: Optional[DecodeCache] = None) -> List[Data]:
         """
         Processes this message's data into a list of data points.
         """
-        return self.decodeMessage(self.timestamp, self.id, self.data)
+        return self.decodeMessage(self.time, self.id, self.data, cache)
+
+    @staticmethod
+    def decodeMessage(timestamp: Union[datetime, int], id: int, data: bytes,
+                      cache: Optional[DecodeCache] = None) -> List[Data]:
+        """
+        Decodes the given message fields into their data points, using the cache if given.
+        """
+        if cache is not None:
+            decoded_data = cache.decode(id, bytes(data))
+        else:
+            decoded_data = Message.decodeFields(id, data)
+        time = toEpochMillis(timestamp)
+        return [Data(time, data_id, decoded_data[data_id]) for data_id in decoded_data]
 
     @staticmethod
-    def decodeMessage(timestamp: datetime, id: int, data: List[int]) -> List[Data]:
+    def decodeFields(id: int, data: bytes) -> Dict[int, Any]:
         """
-        Decodes the given message fields into their data points
+        Decodes the given message data into a dict from data IDs to values.
         """
         try:
-            decoded_data: Dict[int, Any] = MESSAGE_IDS[id]["decoder"](data)
+            return MESSAGE_IDS[id]["decoder"](data)
         except:
-            raise MessageFormatException(f"Invalid data format for can id {id}")
-        
-        return [Data(timestamp, data_id, decoded_data[data_id]) for data_id in decoded_data]
\ No newline at end of file
+            raise MessageFormatException(f"Invalid data format for can id {id}")
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""
+This file specifies the error statistics collected while parsing and decoding logs, so
+malformed lines can be counted and located without stopping processing.
+
+The TEXTUAL1 and TEXTUAL1_LEGACY parsers validate whole arrays of lines rather than catching
+an exception per line, and only the bad lines are dropped: the good lines of a chunk are
+kept. Each bad line (or
+frame) is counted under a category, and the byte offsets of the first few of each category
+are kept to find them in the file.
+
+As with the decode profile, statistics are collected separately by each worker and merged.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+TRUNCATED = "truncated"  # Missing fields (ex. a line cut short by a failed write)
+BAD_TIMESTAMP = "bad timestamp"  # Timestamp that could not be read or is out of range
+BAD_PAYLOAD = "bad payload"  # Payload byte that could not be read or is out of range, or too many bytes
+UNKNOWN_ID = "unknown id"  # CAN id out of range or without a decoder
+DECODER_ERROR = "decoder error"  # Payload the decoder for its CAN id failed on
+
+ERROR_CATEGORIES = (TRUNCATED, BAD_TIMESTAMP, BAD_PAYLOAD, UNKNOWN_ID, DECODER_ERROR)
+MAX_ERROR_OFFSETS = 20  # Offsets kept for each category
+
+
+class ErrorStats:
+    """
+    Counts the bad lines or frames of a log by category (see ERROR_CATEGORIES), along with
+    the byte offsets of the first few of each. Offsets are given relative to the buffer
+    being parsed, and stored relative to the file using the offset of the buffer.
+    """
+
+    def __init__(self, offset: int = 0):
+        self.offset = offset
+        self.counts: Dict[str, int] = dict.fromkeys(ERROR_CATEGORIES, 0)
+        self.offsets: Dict[str, List[int]] = {category: [] for category in ERROR_CATEGORIES}
+        self._frame_offsets: Optional[np.ndarray] = None
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def __bool__(self) -> bool:
+        return self.total > 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The frame offsets are only needed while decoding, not once sent back by a worker
+        state = self.__dict__.copy()
+        state["_frame_offsets"] = None
+        return state
+
+    def add(self, category: str, offsets: np.ndarray) -> None:
+        """
+        Records bad lines or frames of a category, given the offset of each in the buffer.
+        """
+        offsets = np.asarray(offsets)
+        if offsets.size == 0:
+            return
+        self.counts[category] += int(offsets.size)
+        kept = self.offsets[category]
+        if len(kept) < MAX_ERROR_OFFSETS:
+            kept.extend((np.sort(offsets)[:MAX_ERROR_OFFSETS - len(kept)] + self.offset).tolist())
+
+    def setFrames(self, offsets: Optional[np.ndarray]) -> None:
+        """
+        Sets the offset in the buffer of each frame parsed from it, to locate the frames
+        that fail to decode (see addFrames).
+        """
+        self._frame_offsets = offsets
+
+    def addFrames(self, category: str, rows: np.ndarray) -> None:
+        """
+        Records bad frames of a category, given their rows in the parsed frames. Without
+        frame offsets, the frames are only counted.
+        """
+        if self._frame_offsets is None:
+            self.counts[category] += int(np.size(rows))
+        else:
+            self.add(category, self._frame_offsets[rows])
+
+    def merge(self, other: "ErrorStats") -> None:
+        """
+        Adds the counts and offsets of another set of statistics to these.
+        """
+        for category in ERROR_CATEGORIES:
+            self.counts[category] += other.counts[category]
+            kept = self.offsets[category]
+            kept.extend(other.offsets[category][:MAX_ERROR_OFFSETS - len(kept)])
+
+    def toDict(self) -> Dict[str, Any]:
+        """
+        Gets the statistics as a JSON serializable dict.
+        """
+        return {category: {"count": self.counts[category], "offsets": list(self.offsets[category])}
+                for category in ERROR_CATEGORIES if self.counts[category]}
+
+    def formatSummary(self) -> str:
+        """
+        Formats the count of each category, with the first offsets of each.
+        """
+        parts = []
+        for category in ERROR_CATEGORIES:
+            if self.counts[category]:
+                part = f"{self.counts[category]} {category}"
+                if self.offsets[category]:
+                    offsets = ", ".join(str(offset) for offset in self.offsets[category][:5])
+                    more = ", ..." if self.counts[category] > 5 else ""
+                    part += f" (at byte {offsets}{more})"
+                parts.append(part)
+        return "; ".join(parts)
@@ -1,9 +1,166 @@
-from .decode_files import LogFormat, processLine
-from .message import Message
+import csv
+import io
+from typing import Any, Optional, Tuple
 
+import numpy as np
+
+from .data import DataBatch, fromEpochMillis
+from .decode_batch import (
+    decodeFrames, parseBytes, toDataBatch, toSignalColumns
+)
+from .decode_files import BINARY_FRAME_DTYPE, LogFormat, readBinary, readByteRange
+from .decode_profile import DecodeProfile, timeStage
+from .export import OutputFormat
+from .frame_filter import FrameFilter
+from .merge import MergeChunk
+from .master_mapping import DATA_IDS
+from .parse_errors import ErrorStats
+
+# Format of logs processed without one being given (see detect_format)
 FORMAT = LogFormat.TEXTUAL1
 
+# Line ending of rows written by csv.writer
+CSV_LINE_END = "\r\n"
+
+
+def thread_range(filepath: str, offset: int, length: int, output: OutputFormat = OutputFormat.CSV,
+                 frame_filter: Optional[FrameFilter] = None, profile: bool = False,
+                 merge: bool = False, format: LogFormat = FORMAT) -> Tuple[Any, ErrorStats, Optional[DecodeProfile]]:
+    """
+    Processes a byte range of a text log in the given format. The worker reads the range
+    itself, so only its position is sent to it, and only the formatted output is sent back
+    to the writer.
+    If given a filter, only the frames and data ids it selects are decoded and output.
+    Returns the output (see format_output), the lines that failed (see parse_errors), and
+    if profiling, the profile of the range (otherwise None).
+    """
+    stats = DecodeProfile() if profile else None
+    with timeStage(stats, "read"):
+        buf = readByteRange(filepath, offset, length)
+    return parse_and_format(buf, format, output, stats, ErrorStats(offset), frame_filter, merge)
+
+
+def thread_buffer(buf: bytes, offset: int, output: OutputFormat = OutputFormat.CSV,
+                  frame_filter: Optional[FrameFilter] = None, profile: bool = False,
+                  merge: bool = False, format: LogFormat = FORMAT) -> Tuple[Any, ErrorStats, Optional[DecodeProfile]]:
+    """
+    Processes a buffer of whole lines (or binary frame records) that was read by the caller,
+    for logs that cannot be read by position (ex. compressed logs, see compressed). Errors
+    are located by their offset in the (decompressed) log, given the offset of the buffer.
+    Returns the same as thread_range.
+    """
+    stats = DecodeProfile() if profile else None
+    errors = ErrorStats(offset)
+    if format != LogFormat.BINARY:
+        return parse_and_format(buf, format, output, stats, errors, frame_filter, merge)
+    with timeStage(stats, "parse"):
+        frames = np.frombuffer(buf, dtype=BINARY_FRAME_DTYPE)
+        rows = frame_filter.selectRows(frames) if frame_filter is not None else np.arange(frames.size)
+        frames = frames[rows]
+        errors.setFrames(rows * BINARY_FRAME_DTYPE.itemsize)
+        if stats is not None:
+            stats.addBytes(frames["id"], np.full(frames.size, BINARY_FRAME_DTYPE.itemsize))
+    return decode_and_format(frames, output, stats, errors, frame_filter, merge)
+
+
+def parse_and_format(buf: bytes, format: LogFormat, output: OutputFormat, stats: Optional[DecodeProfile],
+                     errors: ErrorStats, frame_filter: Optional[FrameFilter] = None,
+                     merge: bool = False) -> Tuple[Any, ErrorStats, Optional[DecodeProfile]]:
+    """
+    Parses a buffer of whole text lines in the given format, then decodes and formats the
+    frames (see decode_and_format).
+    """
+    with timeStage(stats, "parse"):
+        if stats is not None:
+            frames, _, sizes = parseBytes(buf, format, True, frame_filter, errors)
+            stats.addBytes(frames["id"], sizes)
+        else:
+            frames, _ = parseBytes(buf, format, frame_filter=frame_filter, error_stats=errors)
+    return decode_and_format(frames, output, stats, errors, frame_filter, merge)
+
+
+def thread_binary(filepath: str, start: int, count: int, output: OutputFormat = OutputFormat.CSV,
+                  frame_filter: Optional[FrameFilter] = None, profile: bool = False,
+                  merge: bool = False) -> Tuple[Any, ErrorStats, Optional[DecodeProfile]]:
+    """
+    Processes a chunk of frames of a binary log. The worker maps the file itself, so only
+    the chunk position is sent to it. If given a filter, only the frames it selects are
+    copied out of the file, and only the data ids it selects are decoded and output.
+    Returns the output (see format_output), the frames that failed (see parse_errors), and
+    if profiling, the profile of the chunk (otherwise None).
+    """
+    stats = DecodeProfile() if profile else None
+    errors = ErrorStats(start * BINARY_FRAME_DTYPE.itemsize)
+    with timeStage(stats, "read"):
+        frames = readBinary(filepath)[start:start + count]
+        rows = frame_filter.selectRows(frames) if frame_filter is not None else np.arange(frames.size)
+        frames = frames[rows]
+        errors.setFrames(rows * BINARY_FRAME_DTYPE.itemsize)
+    with timeStage(stats, "parse"):
+        if stats is not None:
+            stats.addBytes(frames["id"], np.full(frames.size, BINARY_FRAME_DTYPE.itemsize))
+    return decode_and_format(frames, output, stats, errors, frame_filter, merge)
+
+
+def decode_and_format(frames: np.ndarray, output: OutputFormat, stats: Optional[DecodeProfile],
+                      errors: ErrorStats, frame_filter: Optional[FrameFilter] = None,
+                      merge: bool = False) -> Tuple[Any, ErrorStats, Optional[DecodeProfile]]:
+    """
+    Decodes parsed frames and formats them for the given output, keeping only the data
+    ids selected by the filter. Frames that fail to decode are added to the errors. If
+    merging, the output is sorted by time for the merge of several files (see
+    format_merge_output).
+    """
+    with timeStage(stats, "decode"):
+        columns, _ = decodeFrames(frames, stats, errors)
+        if frame_filter is not None:
+            columns = frame_filter.selectColumns(frames, columns)
+    with timeStage(stats, "format"):
+        if merge:
+            formatted = format_merge_output(frames, columns, output)
+        else:
+            formatted = format_output(frames, columns, output)
+    return formatted, errors, stats
+
+
+def format_output(frames, columns, output: OutputFormat) -> Any:
+    """
+    Formats decoded columns for the given output: CSV rows as a string, or the timestamp
+    and value arrays of each data ID for the columnar formats.
+    """
+    if output == OutputFormat.CSV:
+        return format_csv(toDataBatch(frames, columns))
+    return toSignalColumns(frames, columns)
+
+
+def format_merge_output(frames, columns, output: OutputFormat) -> MergeChunk:
+    """
+    Formats decoded columns as a chunk for the merge of several files (see merge): the
+    timestamps of the data points in time order, with the CSV row of each (without its
+    line ending) or, for the columnar formats, the data points as a batch.
+    """
+    batch = toDataBatch(frames, columns)
+    order = np.argsort(batch.times, kind="stable")
+    batch = batch.select(order)
+    if output == OutputFormat.CSV:
+        rows = format_csv(batch).split(CSV_LINE_END)[:-1]
+        return batch.times, np.array(rows + [None], dtype=object)[:-1]
+    return batch.times, batch
+
 
-def thread(line):
-    message: Message = processLine(line, FORMAT)
-    return message.decode()
\ No newline at end of file
+def format_csv(batch: DataBatch) -> str:
+    """
+    Formats a batch of data points as CSV rows. Each distinct timestamp is only formatted
+    once, since every message gives several data points with the same timestamp.
+    """
+    times, inverse = np.unique(batch.times, return_inverse=True)
+    time_strs = [fromEpochMillis(time).strftime("%Y-%m-%dT%H:%M:%S.%fZ") for time in times.tolist()]
+    ids = batch.ids.tolist()
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerows(zip(
+        [time_strs[i] for i in inverse.tolist()],
+        ids,
+        [DATA_IDS[id]["name"] for id in ids],
+        batch.getValues()))
+    return output.getvalue()
@@ -0,0 +1,116 @@
+"""
+This file specifies the time index of a log file, which lets readers seek straight to the
+parts of a log covering a time window instead of reading and decoding the whole file.
+
+The index splits the file into segments (byte ranges of whole lines for text logs, runs of
+frames for binary logs) and records the earliest and latest timestamp in each. It is
+stored in a small sidecar file next to the log ('<log>.idx.npz'), built the first time
+the log is read by time and rebuilt whenever the log changes.
+"""
+
+import json
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+from .decode_batch import parseBytes
+from .decode_files import BINARY_FRAME_DTYPE, LogFormat, readBinary, splitByteRanges
+from .manifest import getFileIdentity
+
+INDEX_SUFFIX = ".idx.npz"  # Appended to the path of a log to get its index
+INDEX_SEGMENT_BYTES = 1 << 16  # Approximate size of each segment of a text log
+INDEX_SEGMENT_FRAMES = 4096  # Frames in each segment of a binary log
+
+# A single segment of a log file, with the timestamp range (ms since epoch) of its frames
+SEGMENT_DTYPE = np.dtype([
+    ("offset", np.int64),
+    ("length", np.int64),
+    ("min_time", np.int64),
+    ("max_time", np.int64)
+])
+
+# A window of time in ms since epoch, including the start and excluding the end
+TimeWindow = Tuple[int, int]
+
+_NO_TIME = (np.iinfo(np.int64).max, np.iinfo(np.int64).min)
+
+
+def getIndexPath(filepath: str) -> str:
+    """
+    Gets the path of the sidecar index file of a log file.
+    """
+    return filepath + INDEX_SUFFIX
+
+
+def _segmentTimes(timestamps: np.ndarray) -> Tuple[int, int]:
+    """
+    Gets the timestamp range of a segment. Segments without frames get an empty range.
+    """
+    if timestamps.size == 0:
+        return _NO_TIME
+    return int(timestamps.min()), int(timestamps.max())
+
+
+def buildTimeIndex(filepath: str, format: LogFormat) -> np.ndarray:
+    """
+    Builds the time index of a log file, by parsing (but not decoding) the whole file.
+    """
+    if format == LogFormat.BINARY:
+        timestamps = readBinary(filepath)["timestamp"]
+        starts = range(0, timestamps.size, INDEX_SEGMENT_FRAMES)
+        return np.array([
+            (start * BINARY_FRAME_DTYPE.itemsize,
+             min(INDEX_SEGMENT_FRAMES, timestamps.size - start) * BINARY_FRAME_DTYPE.itemsize,
+             *_segmentTimes(timestamps[start:start + INDEX_SEGMENT_FRAMES]))
+            for start in starts], dtype=SEGMENT_DTYPE)
+
+    segments = []
+    with open(filepath, "rb") as file:
+        for offset, length in splitByteRanges(filepath, INDEX_SEGMENT_BYTES):
+            file.seek(offset)
+            frames, _ = parseBytes(file.read(length), format)
+            segments.append((offset, length, *_segmentTimes(frames["timestamp"])))
+    return np.array(segments, dtype=SEGMENT_DTYPE)
+
+
+def getTimeIndex(filepath: str, format: LogFormat) -> np.ndarray:
+    """
+    Gets the time index of a log file. The index is loaded from its sidecar file if that
+    was built from the same file contents and format, otherwise it is built and saved.
+    """
+    identity = getFileIdentity(filepath)
+    identity["format"] = format.name
+    index_path = getIndexPath(filepath)
+    try:
+        with np.load(index_path) as archive:
+            if json.loads(str(archive["identity"])) == identity:
+                return archive["segments"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    segments = buildTimeIndex(filepath, format)
+    try:
+        with open(index_path, "wb") as file:
+            np.savez(file, segments=segments, identity=np.array(json.dumps(identity)))
+    except OSError:
+        pass  # The index still works, it just has to be rebuilt next time
+    return segments
+
+
+def findTimeRanges(filepath: str, format: LogFormat, window: TimeWindow) -> List[Tuple[int, int]]:
+    """
+    Gets the (offset, length) byte ranges of a log file that may contain frames in the
+    given time window. Adjacent segments are merged into a single range.
+    """
+    segments = getTimeIndex(filepath, format)
+    start, end = window
+    segments = segments[(segments["max_time"] >= start) & (segments["min_time"] < end)]
+
+    ranges: List[Tuple[int, int]] = []
+    for offset, length in zip(segments["offset"].tolist(), segments["length"].tolist()):
+        if ranges and ranges[-1][0] + ranges[-1][1] == offset:
+            ranges[-1] = (ranges[-1][0], ranges[-1][1] + length)
+        else:
+            ranges.append((offset, length))
+    return ranges
@@ -0,0 +1,96 @@
+"""
+This file specifies fast timestamp parsing for the text log formats. Every timestamp is
+parsed straight to an int in ms since epoch, without building a datetime per line.
+
+ISO 8601 timestamps (TEXTUAL1_LEGACY) change far less often than they are logged, so the
+date, hour and minute prefix is converted once and cached, and only the seconds and ms
+suffix is parsed for each line. Arrays of timestamp fields are converted in one go with
+numpy datetime64. As with datetime.strptime and datetime.timestamp, timestamps are read as
+local time, and anything not in the expected layout falls back to datetime.strptime.
+"""
+
+from datetime import datetime
+from typing import Dict
+
+import numpy as np
+
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+ISO_LENGTH = len("2022-07-31T20:04:07.004Z")
+_ISO_PREFIX_LENGTH = len("2022-07-31T20:04:")
+_MAX_CACHED_PREFIXES = 1 << 16
+
+# Epoch ms of the start of each minute seen, keyed on its ISO prefix (ex. 2022-07-31T20:04:)
+_prefixes: Dict[str, int] = {}
+
+
+def _localMinuteMillis(year: int, month: int, day: int, hour: int, minute: int) -> int:
+    """
+    Gets the local time given in ms since epoch.
+    """
+    return round(datetime(year, month, day, hour, minute).timestamp() * 1000)
+
+
+def parseIsoMillis(text: str) -> int:
+    """
+    Parses an ISO 8601 timestamp (ex. 2022-07-31T20:04:07.004Z) into ms since epoch.
+    Raises a ValueError if it is not a valid timestamp.
+    """
+    if (len(text) == ISO_LENGTH and text[19] == "." and text[23] == "Z"
+            and text[17:19].isdigit() and text[20:23].isdigit() and text[17] < "6"):
+        prefix = text[:_ISO_PREFIX_LENGTH]
+        base = _prefixes.get(prefix)
+        if base is None:
+            base = round(datetime.strptime(prefix + "00.000Z", ISO_FORMAT).timestamp() * 1000)
+            if len(_prefixes) >= _MAX_CACHED_PREFIXES:
+                _prefixes.clear()
+            _prefixes[prefix] = base
+        return base + int(text[17:19]) * 1000 + int(text[20:23])
+    return round(datetime.strptime(text, ISO_FORMAT).timestamp() * 1000)
+
+
+def parseEpochMillis(text: str, scale: int = 1) -> int:
+    """
+    Parses a decimal timestamp into ms since epoch, given the number of ms per unit of
+    the timestamp (ex. 1000 for seconds). Timestamps with up to 3 decimal places are
+    parsed exactly as ints, others are rounded to the nearest ms.
+    Raises a ValueError if it is not a number.
+    """
+    whole, dot, fraction = text.partition(".")
+    if whole.isdigit() and (not dot or (fraction.isdigit() and 10 ** len(fraction) <= scale)):
+        if not dot:
+            return int(whole) * scale
+        return int(whole) * scale + int(fraction) * (scale // 10 ** len(fraction))
+    return round(float(text) * scale)
+
+
+def isoFieldsValid(year: np.ndarray, month: np.ndarray, day: np.ndarray, hour: np.ndarray,
+                   minute: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """
+    Gets a mask of the timestamps whose fields are all in range, given arrays of the
+    fields of each.
+    """
+    months = (year.astype(np.int64) - 1970) * 12 + (month.astype(np.int64) - 1)
+    days = months.astype("datetime64[M]").astype("datetime64[D]") + (day.astype(np.int64) - 1)
+    return (~((year < 1) | (year > 9999) | (month < 1) | (month > 12) | (day < 1) | (hour > 23) | (minute > 59) | (second > 59))
+            & (days.astype("datetime64[M]") == months.astype("datetime64[M]")))
+
+
+def isoFieldsToMillis(year: np.ndarray, month: np.ndarray, day: np.ndarray, hour: np.ndarray,
+                      minute: np.ndarray, second: np.ndarray, millis: np.ndarray) -> np.ndarray:
+    """
+    Converts arrays of the fields of local timestamps into ms since epoch, using
+    datetime64 arithmetic rather than a per-timestamp loop. Raises a ValueError if any
+    field is out of range (see isoFieldsValid).
+    """
+    if not np.all(isoFieldsValid(year, month, day, hour, minute, second)):
+        raise ValueError("Timestamp field out of range.")
+    months = (year.astype(np.int64) - 1970) * 12 + (month.astype(np.int64) - 1)
+    days = months.astype("datetime64[M]").astype("datetime64[D]") + (day.astype(np.int64) - 1)
+
+    # Minutes of wall clock time, shifted to local time once for each distinct minute
+    wall_minutes = (days.astype(np.int64) * 24 + hour) * 60 + minute
+    unique_minutes, inverse = np.unique(wall_minutes, return_inverse=True)
+    local_minutes = np.array([
+        _localMinuteMillis(moment.year, moment.month, moment.day, moment.hour, moment.minute)
+        for moment in unique_minutes.astype("datetime64[m]").tolist()], dtype=np.int64)
+    return local_minutes[inverse.reshape(-1)] + second.astype(np.int64) * 1000 + millis
@@ -2,7 +2,7 @@ import csv
 from datetime import datetime
 import numpy as np
 import sys
-from typing import List, Any, Tuple
+from typing import Any, Dict, List, Tuple
 from PyQt6.QtCore import (
     QAbstractTableModel, Qt,
     QReadWriteLock, QModelIndex,
@@ -10,8 +10,10 @@ from PyQt6.QtCore import (
     pyqtBoundSignal, pyqtSignal,
     QObject
 )
-from ner_processing.data import Data
+from ner_processing.cells import CellStore
+from ner_processing.data import Data, DataBatch, fromEpochMillis
 from ner_processing.decode_statuses import getStatus, getStatuses
+from ner_processing.export import OutputFormat, createWriter
 from ner_processing.master_mapping import DATA_IDS
 from ner_telhub.utils.threads import Worker
 
@@ -142,7 +144,29 @@ class DataModel(QAbstractTableModel):
 
     def addData(self, timestamp: datetime, value: Any) -> None:
         """
-        Adds the given piece of data to the model.
+        Adds the given piece of data to the model (see _appendData).
+        """
+        QWriteLocker(self._lock)
+        self._appendData(timestamp, value)
+        self._limitData()
+        self.layoutChanged.emit()
+
+    def addDataList(self, data_list: List[Tuple[datetime, Any]]) -> None:
+        """
+        Adds the given (timestamp, value) pairs to the model in order (see _appendData),
+        emitting a single change for the whole list.
+        """
+        if not data_list:
+            return
+        QWriteLocker(self._lock)
+        for timestamp, value in data_list:
+            self._appendData(timestamp, value)
+        self._limitData()
+        self.layoutChanged.emit()
+
+    def _appendData(self, timestamp: datetime, value: Any) -> None:
+        """
+        Appends the given piece of data to the model, without emitting a change.
 
         Performs filtering of numeric data values by checking for sudden spikes. A spike is
         recognized as a sudden change in value of both more than 1000 and greater than 100%
@@ -152,7 +176,6 @@ class DataModel(QAbstractTableModel):
         This is done by starting to 'compress' once two consecutive data points have the same
         value, and stoping when a new value is reached.
         """
-        QWriteLocker(self._lock)
         # If the value is numeric, perform filtering (from wireless errors) and
         # bounds checking
         if isinstance(value, int) or isinstance(value, float):
@@ -187,10 +210,12 @@ class DataModel(QAbstractTableModel):
                 if value == last_value:
                     self.compressing = True  # Start compressing if two consecutive values found
 
-        while self.isDataLimited and len(self._data) > MAX_LIVE_GRAPH_POINTS:
-            self.deleteFirstData()
-
-        self.layoutChanged.emit()
+    def _limitData(self) -> None:
+        """
+        Deletes the oldest data points past the live graph limit, if limiting.
+        """
+        if self.isDataLimited and len(self._data) > MAX_LIVE_GRAPH_POINTS:
+            del self._data[:len(self._data) - MAX_LIVE_GRAPH_POINTS]
 
     def setDataLimiting(self, isLimiting: bool):
         self.isDataLimited = isLimiting
@@ -242,6 +267,7 @@ class DataModelManager(QObject):
         """
         super(DataModelManager, self).__init__(parent)
         self._datamap: dict[int, DataModel] = {}
+        self._cells = CellStore()
         self.isDataLimiting = False
 
     def _createModelIfNone(self, id: int) -> None:
@@ -299,14 +325,56 @@ class DataModelManager(QObject):
 
     def addDataList(self, data_list: List[Data]) -> None:
         """
-        Adds a list of data to the model. Creates a new model if one for any of
-        the given data IDs doesn't exist.
+        Adds a list of data to the model, one data ID at a time so each model emits a single
+        change. Creates a new model if one for any of the given data IDs doesn't exist.
+        Also accepts a DataBatch.
         """
+        if isinstance(data_list, DataBatch):
+            self.addDataBatch(data_list)
+            return
+        grouped: Dict[int, List[Tuple[datetime, Any]]] = {}
         for data in data_list:
-            self._createModelIfNone(data.id)
-            self._datamap[data.id].addData(data.timestamp, data.value)
+            grouped.setdefault(data.id, []).append((data.timestamp, data.value))
+        self._addGroupedData(grouped)
+
+    def addDataBatch(self, batch: DataBatch) -> None:
+        """
+        Adds a batch of data to the model, one data ID at a time. Creates a new model if
+        one for any of the given data IDs doesn't exist.
+        """
+        values = batch.getValues()
+        order = np.argsort(batch.ids, kind="stable")
+        ids, starts = np.unique(batch.ids[order], return_index=True)
+        ends = np.append(starts[1:], order.size)
+        grouped: Dict[int, List[Tuple[datetime, Any]]] = {}
+        for id, start, end in zip(ids.tolist(), starts.tolist(), ends.tolist()):
+            indices = order[start:end]
+            grouped[id] = [(fromEpochMillis(time), values[i])
+                           for time, i in zip(batch.times[indices].tolist(), indices.tolist())]
+        self._addGroupedData(grouped)
+
+    def _addGroupedData(self, grouped: Dict[int, List[Tuple[datetime, Any]]]) -> None:
+        """
+        Adds the (timestamp, value) pairs of each data ID to its model in one call, then
+        emits a single change for the manager.
+        """
+        for id, data_list in grouped.items():
+            self._createModelIfNone(id)
+            self._datamap[id].addDataList(data_list)
         self.layoutChanged.emit()
 
+    def addCellData(self, cells: np.ndarray) -> None:
+        """
+        Adds decoded battery cell samples (see cells.CELL_DTYPE) to the cell store.
+        """
+        self._cells.add(cells)
+
+    def getCellStore(self) -> CellStore:
+        """
+        Gets the store of the samples of each battery cell.
+        """
+        return self._cells
+
     def filter(self, ids: List[int], keep_ids: bool = True) -> None:
         """
         Filters the model using the given list of IDs.
@@ -344,6 +412,7 @@ class DataModelManager(QObject):
         for model in self._datamap.values():
             model.deleteAllData()
         self._datamap.clear()
+        self._cells.clear()
         self.layoutChanged.emit()
 
     def getAvailableIds(self) -> List[int]:
@@ -428,6 +497,55 @@ class DataModelManager(QObject):
                         [str_time, id, desc, data[1], DATA_IDS[id]["units"]])
         message_signal.emit("Finished CSV export")
 
+    def getColumnarWorker(self, path: str, format: OutputFormat) -> Worker:
+        """
+        Returns a worker to export this model's data to a columnar (NPZ or Parquet) file.
+        """
+        return Worker(
+            self.exportColumnar,
+            file_path=path,
+            format=format,
+            models=list(
+                self._datamap.values()))
+
+    @staticmethod
+    def exportColumnar(*args, **kwargs) -> None:
+        """Exports the data in this model in a columnar format to the specified path.
+        Timestamps are stored as int64 ms since epoch, and values keep their type.
+
+        CAUTION
+        -------
+        This is a worker function meant to be called from a thread (see Worker).
+        Is expecting the following external arguments:
+            - kwargs["file_path"] : str
+            - kwargs["format"] : OutputFormat
+            - kwargs["models"] : List[DataModel]
+        """
+        try:
+            path: str = kwargs["file_path"]
+            format: OutputFormat = kwargs["format"]
+            models: List[DataModel] = kwargs["models"]
+            message_signal: pyqtBoundSignal = kwargs["message"]
+        except BaseException:
+            raise RuntimeError(
+                "Internal processing error - thread configuration invalid")
+
+        columns = {}
+        for model in models:
+            data = model.getData()
+            if len(data) == 0:
+                continue
+            times = np.array([int(point[0].timestamp() * 1000) for point in data], dtype=np.int64)
+            values = np.array([point[1] for point in data])
+            columns[model.getDataId()] = (times, values)
+
+        writer = createWriter(path, format)
+        try:
+            writer.write(columns)
+        finally:
+            writer.close()
+        message_signal.emit(f"Finished {format.value.upper()} export")
+
     def setDataLimiting(self, isLimiting: bool) -> None:
         """
         Sets whether or not the model has a limited data count
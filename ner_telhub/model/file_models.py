@@ -1,24 +1,39 @@
 import os
-from typing import List
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from PyQt6.QtWidgets import QWidget
 from PyQt6.QtCore import (
     QAbstractListModel, Qt,
     pyqtBoundSignal, QModelIndex,
 )
-from ner_processing.decode_files import LogFormat, processLine
-from ner_processing.message import Message
+from ner_processing.cells import CELL_DTYPE, decodeCellFrames
+from ner_processing.compressed import estimateDecompressedSize, isCompressed, readDecompressed, readSample
+from ner_processing.data import DataBatch
+from ner_processing.decode_batch import decodeFrames, parseBytes, toDataBatch
+from ner_processing.decode_files import (
+    BINARY_FRAME_DTYPE, LogFormat, readBinary, readByteRange, splitByteRanges
+)
+from ner_processing.decode_profile import DecodeProfile, timeStage
+from ner_processing.detect_format import detectFormat
+from ner_processing.frame_filter import FrameFilter
+from ner_processing.parse_errors import ErrorStats
+from ner_processing.time_index import TimeWindow, findTimeRanges
 from ner_telhub.model.data_models import DataModelManager
 from ner_telhub.utils.threads import Worker
 
+# Approximate size of each chunk of lines of a text log decoded at once
+PROCESS_CHUNK_BYTES = 1 << 20
+
 
 class FileModel(QAbstractListModel):
     """
     A model class to represent the log files in the system.
     """
 
-    def __init__(self, parent: QWidget, format=LogFormat.TEXTUAL1) -> None:
+    def __init__(self, parent: QWidget, format: Optional[LogFormat] = None) -> None:
         """
-        Initializes the model with a certain format.
+        Initializes the model with a certain format, or None to detect the format of each
+        file (see detect_format).
         """
         super(FileModel, self).__init__(parent)
         self._filepaths = []
@@ -59,28 +74,33 @@ class FileModel(QAbstractListModel):
         self._filepaths.clear()
         self.layoutChanged.emit()
 
-    def getFormat(self) -> LogFormat:
+    def getFormat(self) -> Optional[LogFormat]:
         """
-        Gets the format of the model.
+        Gets the format of the model (None if detected for each file).
         """
         return self.file_format
 
-    def setFormat(self, format: LogFormat) -> None:
+    def setFormat(self, format: Optional[LogFormat]) -> None:
         """
-        Sets the format of the model.
+        Sets the format of the model, or None to detect the format of each file.
         """
         self.file_format = format
 
-    def getProcessWorker(self, manager: DataModelManager) -> Worker:
+    def getProcessWorker(self, manager: DataModelManager, window: TimeWindow = None,
+                         profile: DecodeProfile = None) -> Worker:
         """
         Returns a worker to process this file model's log file paths, storing results
-        in the given data model.
+        in the given data model. If given a time window (start and end in ms since epoch),
+        only data in the window is processed. If given a profile, the per CAN id counters
+        and stage timings of the processing are collected in it (see decode_profile).
         """
         return Worker(
             self._processFileData,
             *self._filepaths,
             format=self.file_format,
-            manager=manager)
+            manager=manager,
+            window=window,
+            profile=profile)
 
     @staticmethod
     def _processFileData(*args, **kwargs) -> None:
@@ -91,76 +111,156 @@ class FileModel(QAbstractListModel):
         -------
         This is a worker function meant to be called from a thread (see Worker).
         Is expecting the following external arguments:
-            - kwargs["format"] : LogFormat
+            - kwargs["format"] : LogFormat (None to detect the format of each file)
             - kwargs["manager"] : DataModelManager
+        And optionally:
+            - kwargs["window"] : TimeWindow
+            - kwargs["profile"] : DecodeProfile
         """
         try:
             filepaths = args
-            format: LogFormat = kwargs["format"]
+            format: Optional[LogFormat] = kwargs["format"]
             manager: DataModelManager = kwargs["manager"]
             progress_signal: pyqtBoundSignal = kwargs["progress"]
             message_signal: pyqtBoundSignal = kwargs["message"]
+            window: TimeWindow = kwargs.get("window")
+            profile: DecodeProfile = kwargs.get("profile")
         except BaseException:
             raise RuntimeError(
                 "Internal processing error - thread configuration invalid")
 
+        # Find the format of each file, detecting it from the start of the file if not given
+        formats: Dict[str, LogFormat] = {}
+        for fp in filepaths:
+            try:
+                formats[fp] = format if format is not None else detectFormat(fp)
+            except ValueError:
+                message_signal.emit(f"Skipping file {fp}, its format could not be detected")
+
+        # Find the parts of each file to read, using the time index if given a window
+        # (compressed files can only be read whole)
+        file_ranges = [findTimeRanges(fp, file_format, window) if window is not None and not isCompressed(fp)
+                       else [(0, os.path.getsize(fp))] for fp, file_format in formats.items()]
+
+        # Frames outside the window are dropped as they are parsed
+        frame_filter = FrameFilter(window=window) if window is not None else None
+
         # Create tracking variables for counts/errors
-        estimated_line_count = FileModel.getLineCount(filepaths)
+        total_bytes = sum(length for ranges in file_ranges for _, length in ranges)
         max_error_count = 500
         error_count = 0
-        lines_processed = 0
+        bytes_processed = 0
+        frames_processed = 0
         current_progress_pct = 0
-        processed_data = []
+        processed_data: List[DataBatch] = []
+        processed_cells: List[np.ndarray] = []
 
-        for fp in filepaths:
-            with open(fp) as file:
-                message_signal.emit(f"Processing file {fp}")
-                file_line_count = 0
-                for line in file:
-                    file_line_count += 1
-                    lines_processed += 1
-                    try:
-                        message: Message = processLine(line, format)
-                        processed_data.extend(message.decode())
-                    except BaseException:
-                        error_count += 1
-                        message_signal.emit(
-                            f" Error processing line {file_line_count}")
-                        if error_count >= max_error_count:
-                            raise RuntimeError(
-                                f"Malformed file or wrong processing format.\nHit max error count ({max_error_count}).")
-                    progress_pct = int(
-                        100 * lines_processed / estimated_line_count)
-                    if progress_pct != current_progress_pct:
-                        current_progress_pct = progress_pct
-                        progress_signal.emit(progress_pct)
-                message_signal.emit(f"Done with file {fp}")
-
-        manager.addDataList(processed_data)
-        message_signal.emit(f"Total message count: {lines_processed}")
+        for (fp, file_format), ranges in zip(formats.items(), file_ranges):
+            message_signal.emit(f"Processing file {fp} ({file_format.name})")
+            chunks = FileModel._readChunks(fp, ranges, file_format)
+            while True:
+                with timeStage(profile, "read"):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                buf, offset, length = chunk
+                bytes_processed += length
+                errors = ErrorStats(offset)
+                with timeStage(profile, "parse"):
+                    if file_format == LogFormat.BINARY:
+                        rows = frame_filter.selectRows(buf) if frame_filter is not None else np.arange(buf.size)
+                        frames, sizes = buf[rows], np.full(rows.size, BINARY_FRAME_DTYPE.itemsize)
+                        errors.setFrames(rows * BINARY_FRAME_DTYPE.itemsize)
+                    else:
+                        frames, _, sizes = parseBytes(buf, file_format, True, frame_filter, errors)
+                    if profile is not None:
+                        profile.addBytes(frames["id"], sizes)
+                with timeStage(profile, "decode"):
+                    columns, _ = decodeFrames(frames, profile, errors)
+                with timeStage(profile, "format"):
+                    processed_data.append(toDataBatch(frames, columns))
+                    processed_cells.append(decodeCellFrames(frames))
+                frames_processed += frames.size
+                if errors:
+                    error_count += errors.total
+                    message_signal.emit(f" Error processing {errors.total} frames: {errors.formatSummary()}")
+                    if error_count >= max_error_count:
+                        raise RuntimeError(
+                            f"Malformed file or wrong processing format.\nHit max error count ({max_error_count}).")
+                progress_pct = min(100, int(100 * bytes_processed / max(total_bytes, 1)))
+                if progress_pct != current_progress_pct:
+                    current_progress_pct = progress_pct
+                    progress_signal.emit(progress_pct)
+            message_signal.emit(f"Done with file {fp}")
+
+        with timeStage(profile, "write"):
+            manager.addDataBatch(DataBatch.concatenate(processed_data))
+            manager.addCellData(np.concatenate(processed_cells + [np.empty(0, dtype=CELL_DTYPE)]))
+        message_signal.emit(f"Total message count: {frames_processed}")
+        if profile is not None:
+            message_signal.emit(profile.formatTable())
+
+    @staticmethod
+    def _readChunks(filepath: str, ranges: List[Tuple[int, int]],
+                    format: LogFormat) -> Iterator[Tuple[Union[bytes, np.ndarray], int, int]]:
+        """
+        Reads the given (offset, length) byte ranges of a log file in chunks: whole lines
+        for text logs, or arrays of frames for binary logs. Gives each chunk along with its
+        offset in the file and the number of bytes of the file it took up (compressed logs
+        are decompressed whole in a background thread, see compressed, so their offsets are
+        in decompressed bytes and their sizes in compressed bytes).
+        """
+        frame_size = BINARY_FRAME_DTYPE.itemsize
+        if isCompressed(filepath):
+            position = 0
+            decompressed_position = 0
+            record_size = frame_size if format == LogFormat.BINARY else None
+            for buf, offset in readDecompressed(filepath, PROCESS_CHUNK_BYTES, record_size):
+                size = len(buf)
+                if format == LogFormat.BINARY:
+                    buf = np.frombuffer(buf, dtype=BINARY_FRAME_DTYPE)
+                yield buf, decompressed_position, offset - position
+                position = offset
+                decompressed_position += size
+        elif format == LogFormat.BINARY:
+            # Binary logs are decoded a range at a time, without a per-line loop
+            chunk_frames = PROCESS_CHUNK_BYTES // frame_size
+            log_frames = readBinary(filepath)
+            for offset, length in ranges:
+                end = (offset + length) // frame_size
+                for start in range(offset // frame_size, end, chunk_frames):
+                    frames = np.array(log_frames[start:min(start + chunk_frames, end)])
+                    yield frames, start * frame_size, frames.nbytes
+        else:
+            for range_offset, range_length in ranges:
+                for offset, length in splitByteRanges(
+                        filepath, PROCESS_CHUNK_BYTES, range_offset, range_offset + range_length):
+                    yield readByteRange(filepath, offset, length), offset, length
 
     @staticmethod
-    def getLineCount(filepaths: List[str]) -> int:
+    def getLineCount(filepaths: List[str], format: LogFormat = LogFormat.TEXTUAL1) -> int:
         """
         Gets the total line count of all the files in the list.
 
         There is no native way to get line counts of files without looping, so
         this function gets the total size and estimates the line count based
-        on a subset of N lines.
+        on a subset of N lines. Binary files have fixed width records, so their
+        count is exact.
         """
         if len(filepaths) == 0:
             return 0
+        if format == LogFormat.BINARY:
+            return sum(estimateDecompressedSize(fp) // BINARY_FRAME_DTYPE.itemsize for fp in filepaths)
 
         N = 20
         tested_lines = 0
         tested_size = 0
-        total_size = sum(os.path.getsize(fp) for fp in filepaths)
+        total_size = sum(estimateDecompressedSize(fp) for fp in filepaths)
 
         for fp in filepaths:
-            with open(fp) as file:
-                for line in file:
-                    tested_lines += 1
-                    tested_size += len(line)
-                    if tested_lines >= N:
-                        return int(total_size / (tested_size / tested_lines))
+            for line in readSample(fp).splitlines(keepends=True):
+                tested_lines += 1
+                tested_size += len(line)
+                if tested_lines >= N:
+                    return int(total_size / (tested_size / tested_lines))
         return int(total_size / (tested_size / tested_lines))
@@ -1,11 +1,13 @@
 from typing import Any, List, Tuple, Dict
+import numpy as np
 from PyQt6.QtWidgets import QWidget
 from PyQt6.QtCore import (
     QAbstractListModel, Qt,
     QModelIndex, QDateTime
 )
-from ner_processing.data import Data
-from ner_processing.message import Message
+from ner_processing.cells import CELL_DATA_ID, CELL_MESSAGE_ID, CELL_PAYLOAD_BYTES, decodeCells, formatCells
+from ner_processing.data import Data, DataBatch
+from ner_processing.message import DecodeCache, Message
 from ner_telhub.model.data_models import DataModelManager
 
 
@@ -29,6 +31,8 @@ class MessageModel(QAbstractListModel):
         self._model = data_model
         self._record = False
         self._filters: Dict[int, Tuple[int, QDateTime]] = {}
+        self._cache = DecodeCache()
+        self._decode_error_count = 0
 
     def data(self, index: QModelIndex, role: int) -> Any:
         """
@@ -48,32 +52,70 @@ class MessageModel(QAbstractListModel):
         """
         Add a message to the model if it matches the filters.
         """
-        if self._filters:
-            # Check if msg is in the filter list and for a valid time interval
-            if msg.id in self._filters.keys():
-                time_since_last_record = self._filters[msg.id][1].msecsTo(
-                    msg.timestamp)
-                if time_since_last_record >= self._filters[msg.id][0]:
-                    self._filters[msg.id] = (
-                        self._filters[msg.id][0], QDateTime(msg.timestamp))
-                    self._decodeAndRecordMessage(msg)
-        else:
-            # No filters set, so record all messages
-            self._decodeAndRecordMessage(msg)
+        self.addMessages([msg])
 
-    def _decodeAndRecordMessage(self, msg: Message) -> None:
+    def addMessages(self, msgs: List[Message]) -> None:
         """
-        Record a message if required, and add the decoded data to the data model.
+        Add a batch of messages to the model, keeping those that match the filters. The
+        decoded data of the whole batch is added to the data model at once, so each data
+        model emits a single change per batch rather than per data point.
         """
+        msgs = [msg for msg in msgs if self._matchesFilters(msg)]
+        if not msgs:
+            return
         if self._record:
-            self._messages.append(msg)
+            self._messages.extend(msgs)
+        data_list: List[Data] = []
+        cell_msgs: List[Message] = []
+        for msg in msgs:
+            try:
+                data_list.extend(msg.decode(self._cache))
+            except BaseException:
+                self._decode_error_count += 1
+                continue
+            if msg.id == CELL_MESSAGE_ID and len(msg.data) >= CELL_PAYLOAD_BYTES:
+                cell_msgs.append(msg)
         try:
-            data_list: List[Data] = msg.decode()
             self._model.addDataList(data_list)
+            if cell_msgs:
+                self._model.addCellData(decodeCells(
+                    np.array([msg.time for msg in cell_msgs]),
+                    np.array([list(msg.data[:CELL_PAYLOAD_BYTES]) for msg in cell_msgs], dtype=np.uint8)))
         except BaseException:
             pass  # TODO: Add error detection
         self.layoutChanged.emit()
 
+    def addDecodedData(self, batch: DataBatch, cells: np.ndarray) -> None:
+        """
+        Adds data already decoded elsewhere (ex. by a live decode process) to the data
+        model, along with the battery cell samples decoded from the same messages (see
+        cells.CELL_DTYPE). Filters and recording only apply to messages, so are skipped.
+        """
+        if cells.size:
+            batch = DataBatch.concatenate([batch, DataBatch.fromValues(
+                cells["timestamp"].tolist(), [CELL_DATA_ID] * cells.size, formatCells(cells))])
+            self._model.addCellData(cells)
+        if len(batch):
+            self._model.addDataBatch(batch)
+        self.layoutChanged.emit()
+
+    def _matchesFilters(self, msg: Message) -> bool:
+        """
+        Checks if a message matches the filters, recording the time it was let through.
+        With no filters set, all messages match.
+        """
+        if not self._filters:
+            return True
+        # Check if msg is in the filter list and for a valid time interval
+        if msg.id in self._filters.keys():
+            time_since_last_record = self._filters[msg.id][1].msecsTo(
+                msg.timestamp)
+            if time_since_last_record >= self._filters[msg.id][0]:
+                self._filters[msg.id] = (
+                    self._filters[msg.id][0], QDateTime(msg.timestamp))
+                return True
+        return False
+
     def deleteMessage(self, index: QModelIndex) -> None:
         """
         Removes a message from the model.
@@ -88,6 +130,18 @@ class MessageModel(QAbstractListModel):
         self._messages.clear()
         self.layoutChanged.emit()
 
+    def getDecodeErrorCount(self) -> int:
+        """
+        Gets the number of messages added to the model that failed to decode.
+        """
+        return self._decode_error_count
+
+    def getDecodeCache(self) -> DecodeCache:
+        """
+        Gets the cache of decoded payloads, which holds the hit and miss counts.
+        """
+        return self._cache
+
     def setRecordState(self, state: bool) -> None:
         """
         Sets whether or not messages will be stored in the model (or data will just
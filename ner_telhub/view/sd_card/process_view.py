@@ -1,11 +1,14 @@
 from PyQt6.QtWidgets import (
       QWidget, QVBoxLayout, QHBoxLayout, QLabel, QProgressBar, QTextEdit,
-      QMessageBox)
+      QMessageBox, QCheckBox, QDateTimeEdit, QGridLayout)
+from ner_processing.data import toEpochMillis
+from ner_processing.decode_profile import DecodeProfile
 from ner_telhub.model.data_models import DataModelManager
 
 from ner_telhub.model.file_models import FileModel
 from ner_telhub.widgets.styled_widgets.ner_button import NERButton
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QDateTime
+from PyQt6.QtGui import QFontDatabase
 
 class ProcessView(QWidget):
     """View section with processing information an control."""
@@ -26,8 +29,33 @@ class ProcessView(QWidget):
 
         self.view = QTextEdit()
         self.view.setReadOnly(True)
+        # Fixed pitch, so the profile table lines up
+        self.view.document().setDefaultFont(
+            QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
         self.view_text = ""
 
+        # Optional time window, in local time like the rest of the views
+        self.window_entry = QCheckBox("Only process a time window")
+        self.window_entry.setToolTip(
+            "Only read the parts of the log files between the start and end times")
+        self.window_entry.toggled.connect(self.set_window_enabled)
+        self.start_time_entry = QDateTimeEdit(QDateTime.currentDateTime().addSecs(-3600))
+        self.end_time_entry = QDateTimeEdit(QDateTime.currentDateTime())
+        for entry in (self.start_time_entry, self.end_time_entry):
+            entry.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+            entry.setCalendarPopup(True)
+        self.set_window_enabled(False)
+        window_layout = QGridLayout()
+        window_layout.addWidget(self.window_entry, 0, 0, 1, 2)
+        window_layout.addWidget(QLabel("Start:"), 1, 0)
+        window_layout.addWidget(self.start_time_entry, 1, 1)
+        window_layout.addWidget(QLabel("End:"), 2, 0)
+        window_layout.addWidget(self.end_time_entry, 2, 1)
+
+        self.profile_entry = QCheckBox("Profile decoding")
+        self.profile_entry.setToolTip(
+            "Show the frames, errors and time spent per CAN id and stage once done")
+
         self.start_button = NERButton("Start", NERButton.Styles.GREEN)
         self.start_button.pressed.connect(self.start_process)
         self.start_button.setToolTip(
@@ -42,11 +70,26 @@ class ProcessView(QWidget):
         layout = QVBoxLayout()
         layout.addWidget(header)
         layout.addWidget(self.view)
+        layout.addLayout(window_layout)
+        layout.addWidget(self.profile_entry)
         layout.addWidget(self.start_button)
         layout.addWidget(self.progress_bar)
         self.setLayout(layout)
 
+    def set_window_enabled(self, enabled: bool):
+        self.start_time_entry.setEnabled(enabled)
+        self.end_time_entry.setEnabled(enabled)
+
     def start_process(self):
+        window = None
+        if self.window_entry.isChecked():
+            window = (toEpochMillis(self.start_time_entry.dateTime().toPyDateTime()),
+                      toEpochMillis(self.end_time_entry.dateTime().toPyDateTime()))
+            if window[0] >= window[1]:
+                QMessageBox.critical(
+                    self, "Time Window Error", "The start time must be before the end time.")
+                return
+
         if not self.data_model.isEmpty():
             button = QMessageBox.question(
                 self, "Warning", "Current model data will be lost. \n"
@@ -59,7 +102,9 @@ class ProcessView(QWidget):
         self.progress_bar.setVisible(True)
         self.clear_view()
 
-        worker = self.file_model.getProcessWorker(self.data_model)
+        profile = DecodeProfile() if self.profile_entry.isChecked() else None
+        worker = self.file_model.getProcessWorker(
+            self.data_model, window=window, profile=profile)
         worker.signals.finished.connect(self.stop_process)
         worker.signals.error.connect(
             lambda error: QMessageBox.critical(
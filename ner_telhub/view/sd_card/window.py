@@ -50,19 +50,22 @@ class SdCardWindow(QMainWindow):
         format_submenu.setToolTip("Change the format of the log files")
         edit_menu.addMenu(format_submenu)
 
+        # Option 0 detects the format of each file (see detect_format)
         self.options: Dict[int, QAction] = {}
-        self.enabled_id = self.file_model.getFormat().value
+        format = self.file_model.getFormat()
+        self.enabled_id = format.value if format is not None else 0
 
-        for format in LogFormat:
-            act = QAction(format.name, self)
+        for format in [None] + list(LogFormat):
+            id = format.value if format is not None else 0
+            act = QAction(format.name if format is not None else "AUTO", self)
             format_submenu.addAction(act)
             act.setCheckable(True)
             act.triggered.connect(
                 lambda state,
-                id=format.value: self.formatClicked(
+                id=id: self.formatClicked(
                     state,
                     id))
-            self.options[format.value] = act
+            self.options[id] = act
 
         self.options.get(self.enabled_id).setChecked(True)
 
@@ -81,4 +84,4 @@ class SdCardWindow(QMainWindow):
         else:
             self.options.get(self.enabled_id).setChecked(False)
             self.enabled_id = id
-            self.file_model.setFormat(LogFormat(id))
+            self.file_model.setFormat(LogFormat(id) if id != 0 else None)
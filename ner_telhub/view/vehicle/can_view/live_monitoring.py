@@ -1,3 +1,4 @@
+import time
 from PyQt6.QtWidgets import (
       QWidget, QVBoxLayout, QLabel, QGridLayout)
 from PyQt6.QtCore import Qt, QTimer
@@ -26,6 +27,11 @@ class LiveMonitoring(QWidget):
         self.biterror_label = QLabel("0")
         self.valueerror_label = QLabel("0")
         self.errorrate_label = QLabel("0.0 %")
+        self.dropped_label = QLabel("0")
+        self.decodeerror_label = QLabel("0")
+        self.framerate_label = QLabel("0 /s")
+        self.rate_time = time.perf_counter()
+        self.rate_count = 0
         self.setStyleSheet("QLabel { font-size: 16px; }")
 
         label_layout = QGridLayout()
@@ -37,6 +43,12 @@ class LiveMonitoring(QWidget):
         label_layout.addWidget(self.valueerror_label, 2, 1)
         label_layout.addWidget(QLabel("Error Rate:"), 3, 0)
         label_layout.addWidget(self.errorrate_label, 3, 1)
+        label_layout.addWidget(QLabel("Dropped Frames:"), 4, 0)
+        label_layout.addWidget(self.dropped_label, 4, 1)
+        label_layout.addWidget(QLabel("Decode Errors:"), 5, 0)
+        label_layout.addWidget(self.decodeerror_label, 5, 1)
+        label_layout.addWidget(QLabel("Frame Rate:"), 6, 0)
+        label_layout.addWidget(self.framerate_label, 6, 1)
 
         header = QLabel("Connection Info")
         header.setStyleSheet("font-size: 30px; font-weight: bold")
@@ -64,6 +76,16 @@ class LiveMonitoring(QWidget):
                                    (error_count + success_count), 2)
             self.biterror_label.setText(str(error_count))
             self.errorrate_label.setText(f"{error_rate} %")
+            self.dropped_label.setText(str(connection.getDroppedCount()))
+
+            # Frames received per second, averaged over each second
+            now = time.perf_counter()
+            if now - self.rate_time >= 1:
+                frame_rate = max(success_count - self.rate_count, 0) / (now - self.rate_time)
+                self.framerate_label.setText(f"{frame_rate:.0f} /s")
+                self.rate_time = now
+                self.rate_count = success_count
 
         self.datacount_label.setText(str(self.data_model.getDataCount()))
         self.valueerror_label.setText(str(self.data_model.getErrorCount()))
+        self.decodeerror_label.setText(str(self.message_model.getDecodeErrorCount()))
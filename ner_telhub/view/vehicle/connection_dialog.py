@@ -1,9 +1,12 @@
 from typing import Callable
 from PyQt6.QtWidgets import (
-      QDialog, QVBoxLayout, QDialogButtonBox, QWidget, QComboBox, QLabel, QRadioButton
+      QDialog, QVBoxLayout, QDialogButtonBox, QWidget, QComboBox, QLabel, QRadioButton, QCheckBox, QFileDialog
 )
 from ner_live.live_input import InputType, LiveInput
 
+# Replay speeds, as multiples of real time (None to replay as fast as possible)
+REPLAY_SPEEDS = {"1x": 1.0, "2x": 2.0, "5x": 5.0, "10x": 10.0, "Max": None}
+
 class ConnectionDialog(QDialog):
     """
     Connection dialog showing serial port connection information.
@@ -30,6 +33,18 @@ class ConnectionDialog(QDialog):
         self.input_entry = QComboBox()
         self.input_entry.addItems([it.name for it in InputType])
         self.layout.addWidget(self.input_entry)
+        self.process_entry = QCheckBox("Decode in a separate process")
+        self.process_entry.setToolTip(
+            "Read and decode the input outside of the GUI, so slow views cannot drop data")
+        self.layout.addWidget(self.process_entry)
+        self.journal_entry = QCheckBox("Record raw frames to disk")
+        self.journal_entry.setToolTip(
+            "Journal every received frame to binary log files in a chosen directory")
+        self.layout.addWidget(self.journal_entry)
+        self.layout.addWidget(QLabel("Replay speed (for a log file replay):"))
+        self.speed_entry = QComboBox()
+        self.speed_entry.addItems(REPLAY_SPEEDS.keys())
+        self.layout.addWidget(self.speed_entry)
 
         self.buttonBox = QDialogButtonBox(
             QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
@@ -40,10 +55,29 @@ class ConnectionDialog(QDialog):
         self.setLayout(self.layout)
 
     def onAccept(self):
+        input_type = InputType[self.input_entry.currentText()]
+        if input_type is InputType.REPLAY:
+            # Replays read a log file instead of a port
+            filepath = QFileDialog.getOpenFileName(self, "Choose a log file to replay")[0]
+            if not filepath:
+                self.reject()
+                return
+            self._acceptSource(filepath, input_type)
+            return
         for i in range(len(self.com_options)):
             if self.com_options[i].isChecked():
-                self.accept()
-                self.callback(self.ports[i][0],
-                              InputType[self.input_entry.currentText()])
+                self._acceptSource(self.ports[i][0], input_type)
                 return
             self.reject()
+
+    def _acceptSource(self, source: str, input_type: InputType):
+        journal_directory = None
+        if self.journal_entry.isChecked():
+            journal_directory = QFileDialog.getExistingDirectory(
+                self, "Choose a directory to record frames to") or None
+        self.accept()
+        self.callback(source,
+                      input_type,
+                      self.process_entry.isChecked(),
+                      journal_directory,
+                      REPLAY_SPEEDS[self.speed_entry.currentText()])
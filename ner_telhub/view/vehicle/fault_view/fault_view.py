@@ -1,5 +1,8 @@
-from typing import Dict, List
+import bisect
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 from PyQt6.QtCore import QTimer
 from PyQt6.QtGui import QColor, QFont
 from PyQt6.QtWidgets import (
@@ -9,7 +12,7 @@ from PyQt6.QtWidgets import (
 
 from ner_telhub.colors import TABLE_BACKGROUND_1, TABLE_BACKGROUND_2
 from ner_telhub.model.data_models import DataModelManager
-from ner_processing.decode_statuses import STATUS_MAP, getStatus
+from ner_processing.decode_statuses import getStatusEdges, getStatusMatrix, getStatusNames
 from ner_telhub.view.vehicle.fault_view.add_dialog import AddDialog
 from ner_telhub.view.vehicle.fault_view.fault_entry import FaultEntry
 from ner_telhub.view.vehicle.fault_view.remove_dialog import RemoveDialog
@@ -24,6 +27,8 @@ class FaultView(QWidget):
         self.model = model
         # Stores the faults used to populate the table
         self.faults: Dict[int, List[FaultEntry]] = {}
+        # Time of the last value read of each data ID, with the statuses it had
+        self.last_read: Dict[int, Tuple[datetime, np.ndarray]] = {}
 
         self.table = QTableWidget()
         self.table.setColumnCount(5)
@@ -61,6 +66,7 @@ class FaultView(QWidget):
 
         # Add rows with fault data
         for _, data_id in enumerate(self.faults):
+            self.update_faults(data_id)
             for fault_index, fault in enumerate(self.faults[data_id]):
                 row_position = self.table.rowCount()
                 self.table.insertRow(row_position)
@@ -84,12 +90,10 @@ class FaultView(QWidget):
 
                 self.table.setItem(row_position, 2, fault_item)
 
-                fault.update()
                 if fault.value is not None:
-                    data_value = fault.value
                     data_time = fault.time
                     last_time_faulted = fault.last_time_high
-                    status_value = getStatus(data_id, data_value, fault.name)
+                    status_value = fault.status
                 else:
                     status_value = "None"
                     data_time = "None"
@@ -134,6 +138,45 @@ class FaultView(QWidget):
                 self.table.setSpan(
                     row_position - num_statuses + 1, 1, num_statuses, 1)
 
+    def update_faults(self, data_id: int):
+        """
+        Update the faults of a data ID with the values added since the last update. The
+        statuses of all the new values are split out at once, and the last time each
+        fault turned on is found from the rising edges of its status.
+        """
+        try:
+            data = self.model.getDataModel(data_id).getData()
+        except ValueError:
+            data = []
+        last_time, last_bits = self.last_read.get(data_id, (None, None))
+        if not data or (last_time is not None and data[-1][0] < last_time):
+            # No data, or the data was replaced, so start over
+            self.last_read.pop(data_id, None)
+            for fault in self.faults[data_id]:
+                fault.value = fault.time = fault.status = fault.last_time_high = None
+            if not data:
+                return
+            last_time, last_bits = None, None
+
+        start = 0 if last_time is None else bisect.bisect_right(data, last_time, key=lambda point: point[0])
+        new_data = data[start:]
+        if not new_data:
+            return
+        names = getStatusNames(data_id)
+        if last_bits is None:
+            # A status already on in the first value counts as turning on there
+            last_bits = np.zeros(len(names), dtype=bool)
+        bits = np.vstack((last_bits, getStatusMatrix(data_id, [value for _, value in new_data])))
+        edges = getStatusEdges(data_id, bits)
+        self.last_read[data_id] = (new_data[-1][0], bits[-1])
+
+        for fault in self.faults[data_id]:
+            fault.time, fault.value = new_data[-1]
+            fault.status = int(bits[-1, names.index(fault.name)])
+            rising = edges[fault.name][0]
+            if rising.size:
+                fault.last_time_high = new_data[rising[-1] - 1][0]
+
     def add_fault(self):
         """
         Add a new fault using the AddDialog.
@@ -145,6 +188,7 @@ class FaultView(QWidget):
             added_ids = dialog.get_selected_fault_ids()
             added_statuses = dialog.get_selected_statuses()
             for index, fault_id in enumerate(added_ids):
+                self.last_read.pop(fault_id, None)
                 self.faults[fault_id] = [
                     FaultEntry(
                         fault_id,
@@ -160,6 +204,7 @@ class FaultView(QWidget):
 
         if result == QDialog.DialogCode.Accepted and dialog.removed_fault is not None:
             self.faults.pop(dialog.removed_fault)
+            self.last_read.pop(dialog.removed_fault, None)
 
 
 
@@ -1,16 +1,17 @@
 from PyQt6.QtWidgets import (
       QDialog, QDialogButtonBox, QWidget, QComboBox, QLabel, QLineEdit, QGridLayout, QMessageBox, QFileDialog
 )
+from ner_processing.export import OutputFormat
 from ner_telhub.model.data_models import DataModelManager
 from ner_telhub.widgets.styled_widgets.ner_button import NERButton
 
 class FileDialog(QDialog):
-    """Dialog to export data to a CSV file."""
+    """Dialog to export data to a CSV, NPZ or Parquet file."""
 
     def __init__(self, parent: QWidget, model: DataModelManager):
         super().__init__(parent)
 
-        self.setWindowTitle("Export as CSV")
+        self.setWindowTitle("Export Data")
         self.model = model
 
         self.filename_input = QLineEdit()
@@ -47,13 +48,17 @@ class FileDialog(QDialog):
             QMessageBox.critical(
                 self,
                 "Invalid File Name",
-                "File must be either a .csv or contain no extension.")
+                "File must be either a .csv, .npz or .parquet, or contain no extension.")
             return
 
         directory = self.directory_input.text()
         full_path = directory + "/" + filename
 
-        worker = self.model.getCSVWorker(full_path)
+        format = OutputFormat(filename.split(".")[1])
+        if format == OutputFormat.CSV:
+            worker = self.model.getCSVWorker(full_path)
+        else:
+            worker = self.model.getColumnarWorker(full_path, format)
         worker.signals.error.connect(
             lambda error: QMessageBox.critical(
                 self, "Export Error", error[1].__str__()))
@@ -68,11 +73,11 @@ class FileDialog(QDialog):
 
     @staticmethod
     def create_extension(name: str):
-        """Verifies the file name has a csv extension, or adds one if not."""
+        """Verifies the file name has an output format extension, or adds csv if not."""
         components = name.split(".")
         if len(components) == 1:
             return name + ".csv"
-        elif len(components) == 2 and components[1] == "csv":
+        elif len(components) == 2 and components[1] in [format.value for format in OutputFormat]:
             return name
         else:
             raise ValueError("Invalid file name format")
@@ -66,10 +66,15 @@ class LiveToolbar(NERToolbar):
                 msg = e.message
             QMessageBox.information(self, "Disconnection Status", msg)
 
-    def _connect(self, port_name: str, input_type: InputType):
+    def _connect(self, port_name: str, input_type: InputType, separate_process: bool = False,
+                 journal_directory: str = None, replay_speed: float = 1.0):
         try:
-            connection = createConnection(input_type, self.message_model)
-            connection.connect(port_name)
+            connection = createConnection(input_type, self.message_model, separate_process)
+            connection.setJournalDirectory(journal_directory)
+            if input_type is InputType.REPLAY:
+                connection.connect(port_name, speed=replay_speed)
+            else:
+                connection.connect(port_name)
             msg = "Successfully connected to " + port_name
             self.connect_button.setText("Disconnect")
             self.connect_button.changeStyle(NERButton.Styles.RED)
@@ -0,0 +1,133 @@
+"""
+Tests of the batch parsers (see decode_batch) against the per-line parser (see
+decode_files.processLine), on the example logs in the data folder and on malformed lines.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from ner_processing.decode_batch import parseBytes, parseTextual1Bytes
+from ner_processing.decode_files import LogFormat, processLine
+from ner_processing.parse_errors import BAD_TIMESTAMP, UNKNOWN_ID, ErrorStats
+from ner_processing.timestamps import parseIsoMillis
+
+DATA_FOLDER = os.path.join(os.path.dirname(__file__), "..", "data")
+
+# Lines the per-line parser rejects, which the batch parser must reject too
+MALFORMED_LINES = [
+    "1679511802367 514 8 [54,0,10,0,0,0,0]",  # Fewer bytes than the length
+    "1679511802367 514 2 [54,0,10]",  # More bytes than the length
+    "1679511802367 514 8 54,0,10,0,0,0,0,0]",  # Missing bracket
+    "1679511802367 514 8 [54,0,10,0,0,0,0,0",  # Cut short
+    "1679511802367 514",
+    "1679511802367 -514 1 [1]",
+    "1679511802367 514 1 [-1]",
+    "1679511802367  514 1 [1]",
+    "1679511802367\t514 1 [1]",
+    "1679511802367 514 2 [54,,0]",
+    "1679511802367 514 2 [54, 0]",
+    "1679511802367 514 1 [ 1]",
+    "1679511802367 514 1 [1.5]",
+    "1679511802367 514 1 [256]",
+    "1679511802367 514 0 []",
+    "1679511802367 514 1 []",
+    "1679511802367 514 1[1]",
+    "1679511802367 514 1 [1],",
+    "1679511802367 514 1 [1]]",
+    "1679511802367 514 1 [[1]",
+    "x1679511802367 514 1 [1]",
+    "1679511802367 514 1 [1]x",
+    "2022-07-31T20:04:07.004Z 514 1 [1]",
+]
+
+# Lines the per-line parser accepts, but that do not fit in a frame (see FRAME_DTYPE)
+UNREPRESENTABLE_LINES = [
+    "1679511802367 65536 1 [1]",
+    "1679511802367 514 9 [1,2,3,4,5,6,7,8,9]",
+    "99999999999999999999 514 1 [1]",
+]
+
+
+def readValidLines():
+    """
+    Gets the lines of the example TEXTUAL1_LEGACY log, and the same lines in TEXTUAL1.
+    """
+    with open(os.path.join(DATA_FOLDER, "format1-valid.txt")) as file:
+        legacy_lines = file.read().splitlines()
+    lines = []
+    for line in legacy_lines:
+        timestamp, rest = line.split(" ", 1)
+        lines.append(f"{parseIsoMillis(timestamp)} {rest}")
+    return legacy_lines, lines
+
+
+def assertFramesMatch(frames: np.ndarray, lines, format: LogFormat):
+    """
+    Checks the frames parsed from some lines against the messages processLine gives.
+    """
+    messages = [processLine(line, format) for line in lines]
+    assert frames.size == len(messages)
+    assert frames["timestamp"].tolist() == [msg.time for msg in messages]
+    assert frames["id"].tolist() == [msg.id for msg in messages]
+    assert frames["length"].tolist() == [len(msg.data) for msg in messages]
+    for frame, msg in zip(frames, messages):
+        assert bytes(frame["data"][:frame["length"]]) == msg.data
+
+
+def test_textual1_matches_process_line():
+    _, lines = readValidLines()
+    frames, errors = parseTextual1Bytes("\n".join(lines).encode())
+    assert errors == 0
+    assertFramesMatch(frames, lines, LogFormat.TEXTUAL1)
+
+
+def test_textual1_legacy_matches_process_line():
+    legacy_lines, _ = readValidLines()
+    frames, errors = parseBytes("\n".join(legacy_lines).encode(), LogFormat.TEXTUAL1_LEGACY)
+    assert errors == 0
+    assertFramesMatch(frames, legacy_lines, LogFormat.TEXTUAL1_LEGACY)
+
+
+def test_textual1_whitespace_around_lines():
+    lines = ["  1679511802367 514 1 [1]  ", "1679511802367 514 3 [1,2,3]\r", "1 2 1 [0]"]
+    frames, errors = parseTextual1Bytes("\n".join(lines).encode())
+    assert errors == 0
+    assertFramesMatch(frames, lines, LogFormat.TEXTUAL1)
+
+
+@pytest.mark.parametrize("line", MALFORMED_LINES)
+def test_textual1_rejects_malformed_line(line):
+    with pytest.raises(Exception):
+        processLine(line, LogFormat.TEXTUAL1)
+    frames, errors = parseTextual1Bytes(line.encode())
+    assert frames.size == 0
+    assert errors == 1
+
+
+@pytest.mark.parametrize("line", UNREPRESENTABLE_LINES)
+def test_textual1_rejects_unrepresentable_line(line):
+    frames, errors = parseTextual1Bytes(line.encode())
+    assert frames.size == 0
+    assert errors == 1
+
+
+def test_textual1_keeps_good_lines_around_bad_ones():
+    _, valid_lines = readValidLines()
+    lines = []
+    for valid, malformed in zip(valid_lines, MALFORMED_LINES + UNREPRESENTABLE_LINES):
+        lines += [valid, malformed, ""]
+    good = valid_lines[:len(MALFORMED_LINES + UNREPRESENTABLE_LINES)]
+    frames, errors = parseTextual1Bytes("\n".join(lines).encode())
+    assert errors == len(MALFORMED_LINES + UNREPRESENTABLE_LINES)
+    assertFramesMatch(frames, good, LogFormat.TEXTUAL1)
+
+
+def test_textual1_error_categories():
+    buf = b"1 2 1 [1]\n99999999999999999999 514 1 [1]\n1679511802367 65536 1 [1]\n"
+    errors = ErrorStats(100)
+    frames, count = parseTextual1Bytes(buf, error_stats=errors)
+    assert frames.size == 1 and count == 2
+    assert errors.counts[BAD_TIMESTAMP] == 1 and errors.offsets[BAD_TIMESTAMP] == [110]
+    assert errors.counts[UNKNOWN_ID] == 1 and errors.offsets[UNKNOWN_ID] == [141]
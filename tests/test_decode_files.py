@@ -0,0 +1,142 @@
+"""
+Tests of splitting text logs into byte ranges at line boundaries, and of reading and
+writing binary logs (see decode_files).
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from ner_processing.decode_batch import parseBytes
+from ner_processing.decode_files import (
+    BINARY_FRAME_DTYPE, LogFormat, findLastLineEnd, readBinary, readByteRange, splitByteRanges, writeBinary
+)
+
+DATA_FOLDER = os.path.join(os.path.dirname(__file__), "..", "data")
+
+
+def readExampleFrames() -> np.ndarray:
+    """
+    Parses the frames of the example TEXTUAL1_LEGACY log.
+    """
+    with open(os.path.join(DATA_FOLDER, "format1-valid.txt"), "rb") as file:
+        frames, errors = parseBytes(file.read(), LogFormat.TEXTUAL1_LEGACY)
+    assert errors == 0
+    return frames
+
+
+@pytest.fixture
+def text_log(tmp_path):
+    """
+    A text log with lines of different lengths (including an empty one).
+    """
+    lines = [f"{1679511802367 + i} {i * 37 % 600} 1 [{i % 256}]" for i in range(200)]
+    lines[50] = ""
+    filepath = tmp_path / "log.txt"
+    filepath.write_bytes(("\n".join(lines) + "\n").encode())
+    return str(filepath)
+
+
+def assertRangesSplitLines(filepath: str, ranges, start: int, end: int):
+    """
+    Checks that byte ranges cover a file from start to end without gaps or overlaps, and
+    that each one ends on a line boundary.
+    """
+    with open(filepath, "rb") as file:
+        contents = file.read()
+    assert ranges[0][0] == start
+    assert sum(length for _, length in ranges) == end - start
+    for (offset, length), (next_offset, _) in zip(ranges, ranges[1:]):
+        assert offset + length == next_offset
+        assert contents[next_offset - 1:next_offset] == b"\n"
+    for offset, length in ranges:
+        assert length > 0
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 29, 30, 31, 1000, 1 << 20])
+def test_split_byte_ranges_on_line_boundaries(text_log, chunk_size):
+    size = os.path.getsize(text_log)
+    ranges = list(splitByteRanges(text_log, chunk_size))
+    assertRangesSplitLines(text_log, ranges, 0, size)
+    # Every range but the last reaches the chunk size before ending its line
+    for _, length in ranges[:-1]:
+        assert length >= chunk_size
+
+
+def test_split_byte_ranges_parse_like_whole_file(text_log):
+    with open(text_log, "rb") as file:
+        whole, whole_errors = parseBytes(file.read(), LogFormat.TEXTUAL1)
+    parts = [parseBytes(readByteRange(text_log, offset, length), LogFormat.TEXTUAL1)
+             for offset, length in splitByteRanges(text_log, 100)]
+    assert sum(errors for _, errors in parts) == whole_errors
+    assert np.array_equal(np.concatenate([frames for frames, _ in parts]), whole)
+
+
+def test_split_byte_ranges_between_offsets(text_log):
+    boundaries = [offset for offset, _ in splitByteRanges(text_log, 500)]
+    start, end = boundaries[1], boundaries[-2]
+    ranges = list(splitByteRanges(text_log, 64, start, end))
+    assertRangesSplitLines(text_log, ranges, start, end)
+
+
+def test_split_byte_ranges_without_final_newline(tmp_path):
+    filepath = tmp_path / "log.txt"
+    filepath.write_bytes(b"1 2 1 [1]\n1 2 1 [2]\n1 2 1")
+    ranges = list(splitByteRanges(str(filepath), 4))
+    assert ranges == [(0, 10), (10, 10), (20, 5)]
+
+
+def test_split_byte_ranges_empty_file(tmp_path):
+    filepath = tmp_path / "log.txt"
+    filepath.write_bytes(b"")
+    assert list(splitByteRanges(str(filepath), 100)) == []
+
+
+@pytest.mark.parametrize("contents, line_end", [
+    (b"", 0),
+    (b"1 2 1 [1]", 0),
+    (b"1 2 1 [1]\n", 10),
+    (b"1 2 1 [1]\n1 2 1", 10),
+    (b"1 2 1 [1]\n" + b"1" * 100000, 10),  # A partial line longer than a block
+    (b"\n" + b"1" * ((1 << 16) - 1), 1),  # The newline is the last byte of the first block
+])
+def test_find_last_line_end(tmp_path, contents, line_end):
+    filepath = tmp_path / "log.txt"
+    filepath.write_bytes(contents)
+    assert findLastLineEnd(str(filepath)) == line_end
+
+
+def test_binary_example_matches_text_example():
+    frames = readBinary(os.path.join(DATA_FOLDER, "binary-valid.txt"))
+    expected = readExampleFrames()
+    for field in BINARY_FRAME_DTYPE.names:
+        assert np.array_equal(frames[field], expected[field])
+
+
+def test_binary_round_trip(tmp_path):
+    frames = readExampleFrames()
+    filepath = str(tmp_path / "log.bin")
+    writeBinary(filepath, frames)
+    assert os.path.getsize(filepath) == frames.size * BINARY_FRAME_DTYPE.itemsize
+    with open(os.path.join(DATA_FOLDER, "binary-valid.txt"), "rb") as file, open(filepath, "rb") as written:
+        assert written.read() == file.read()
+    records = readBinary(filepath)
+    for field in BINARY_FRAME_DTYPE.names:
+        assert np.array_equal(records[field], frames[field])
+
+
+def test_read_binary_ignores_partial_record(tmp_path):
+    frames = readExampleFrames()[:3]
+    filepath = tmp_path / "log.bin"
+    writeBinary(str(filepath), frames)
+    with open(filepath, "ab") as file:
+        file.write(b"\x01" * (BINARY_FRAME_DTYPE.itemsize - 1))
+    assert readBinary(str(filepath)).size == 3
+
+
+def test_read_binary_empty_file(tmp_path):
+    filepath = tmp_path / "log.bin"
+    filepath.write_bytes(b"")
+    records = readBinary(str(filepath))
+    assert records.size == 0 and records.dtype == BINARY_FRAME_DTYPE
@@ -0,0 +1,85 @@
+"""
+Tests of the decoders compiled from the message signals (see decode_signals), on payloads
+from the example log in the data folder.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from ner_processing.decode_batch import decodeFrames, parseBytes, toDataBatch
+from ner_processing.decode_files import LogFormat
+from ner_processing.master_mapping import MESSAGE_IDS
+from ner_processing.message import Message
+
+DATA_FOLDER = os.path.join(os.path.dirname(__file__), "..", "data")
+
+# A payload of each message in data/format1-valid.txt, with the values the hand-written
+# decoders gave for it before they were replaced by signals
+EXPECTED = [
+    (1, [11, 115, 0, 0, 0, 165, 188, 29], {1: 2931, 2: 0.0, 3: 165, 4: 188, 5: 29}),
+    (2, [0, 0, 0, 0, 4, 2, 24, 26], {106: 0, 107: 67108864, 10: 2, 11: 24}),
+    (4, [159, 180, 37, 158, 184, 74, 159, 14],
+     {13: 40884, 121: 5, 122: 2, 15: 40632, 123: 10, 124: 4, 17: 40718}),
+    (160, [2, 1, 3, 1, 2, 1, 251, 0], {18: 25.8, 19: 25.9, 20: 25.8, 21: 25.1}),
+    (161, [254, 0, 50, 8, 23, 8, 240, 216], {22: 25.4, 23: 209.8, 24: 207.1, 25: -1000.0}),
+    (162, [240, 216, 240, 216, 100, 1, 0, 0], {26: -1000.0, 27: -1000.0, 28: 35.6, 29: 0.0}),
+    (165, [30, 13, 0, 0, 0, 0, 241, 0], {44: 335.8, 45: 0, 46: 0.0, 47: 24.1, 101: 0.0}),
+    (166, [4, 0, 255, 255, 2, 0, 0, 0], {48: 0.4, 49: -0.1, 50: 0.2, 51: 0.0}),
+    (167, [24, 0, 0, 0, 254, 255, 5, 0], {52: 2.4, 53: 0.0, 54: -0.2, 55: 0.5}),
+    (170, [7, 0, 9, 0, 0, 0, 192, 2],
+     {64: 7, 65: 9, 66: 0, 67: 0, 68: 0, 69: 0, 70: 0, 71: 1, 72: 0, 73: 1, 74: 0}),
+    (171, [0, 0, 0, 0, 0, 8, 0, 0], {75: 0, 76: 0, 77: 2048, 78: 0}),
+    (192, [0, 0, 0, 0, 1, 0, 0, 0], {82: 0.0, 83: 0, 84: 1, 85: 0, 86: 0, 87: 0, 88: 0.0}),
+    (514, [100, 0, 24, 0, 0, 0, 0, 0], {89: 100, 90: 24}),
+]
+
+
+def decodeScalar(id: int, data):
+    """
+    Decodes a payload with the scalar decoder, giving None if it is rejected.
+    """
+    try:
+        return MESSAGE_IDS[id]["decoder"](data)
+    except IndexError:
+        return None
+
+
+def decodeBatch(id: int, data):
+    """
+    Decodes a payload with the batch decoder, giving None if it is rejected.
+    """
+    try:
+        columns = MESSAGE_IDS[id]["batch_decoder"](np.array([data], dtype=np.uint8).reshape(1, len(data)))
+    except IndexError:
+        return None
+    return {data_id: np.broadcast_to(column, 1)[0].item() for data_id, column in columns.items()}
+
+
+@pytest.mark.parametrize("id, data, expected", EXPECTED)
+def test_decoder_matches_expected(id, data, expected):
+    decoded = MESSAGE_IDS[id]["decoder"](data)
+    assert decoded == expected
+    assert list(decoded) == list(expected)
+    assert [type(value) for value in decoded.values()] == [type(value) for value in expected.values()]
+
+
+@pytest.mark.parametrize("id, data, expected", EXPECTED)
+def test_batch_decoder_matches_decoder(id, data, expected):
+    assert decodeBatch(id, data) == expected
+    # Payloads cut short are read or rejected the same way by both
+    for length in range(len(data)):
+        assert decodeBatch(id, data[:length]) == decodeScalar(id, data[:length])
+
+
+def test_decode_frames_matches_messages():
+    with open(os.path.join(DATA_FOLDER, "format1-valid.txt"), "rb") as file:
+        frames, _ = parseBytes(file.read(), LogFormat.TEXTUAL1_LEGACY)
+    columns, errors = decodeFrames(frames)
+    assert errors == 0
+    batch = toDataBatch(frames, columns)
+    messages = [Message(int(frame["timestamp"]), int(frame["id"]), frame["data"][:frame["length"]].tobytes())
+                for frame in frames]
+    expected = [(data.time, data.id, data.value) for msg in messages for data in msg.decode()]
+    assert list(zip(batch.times.tolist(), batch.ids.tolist(), batch.getValues())) == expected